@@ -0,0 +1,381 @@
+"""
+Per-application attribution: which app the active time went to.
+
+    tracker = AppTracker(select_window_source(), AppUsage(APPS_DIR))
+    tracker.observe(day, seconds)         # once per tick with active credit
+
+Each tick with active time asks a window source for the frontmost
+application and credits it with that tick's seconds. It is a sample, not
+a trace: a tick's time goes to whatever is in front when it's counted.
+
+App names are interned. `names.txt` holds one name per line, and a name's
+id is its line number, so a name is stored once, ever. A day is a flat
+array of u32 seconds indexed by id, `<YYYY-MM-DD>.bin`, so a credit is an
+array add plus one 4-byte pwrite; nothing is keyed by strings and nothing
+is rewritten.
+
+Window sources (all in-process; none forks per tick):
+    MacWindowSource     NSWorkspace.frontmostApplication via the Objective-C runtime
+    X11WindowSource     _NET_ACTIVE_WINDOW and WM_CLASS via libX11
+    FakeWindowSource    scripted, on a virtual clock
+"""
+
+import bisect
+import os
+import struct
+import sys
+from array import array
+from datetime import date, timedelta
+
+_U32 = struct.Struct("<I")
+NAMES_FILE = "names.txt"
+
+
+class WindowSource:
+    """Base class: the frontmost application's name, or None if unknown."""
+
+    name = "none"
+
+    def frontmost(self):
+        return None
+
+    def close(self):
+        pass
+
+
+# ── macOS ───────────────────────────────────────────────
+_LIBOBJC = "/usr/lib/libobjc.A.dylib"
+_APPKIT = "/System/Library/Frameworks/AppKit.framework/AppKit"
+
+
+class MacWindowSource(WindowSource):
+    """NSWorkspace's frontmost application, through objc_msgSend.
+
+    Selectors are registered once. The name is only converted to a Python
+    string when the frontmost process changes, keyed by its pid.
+    """
+
+    name = "macos"
+
+    def __init__(self):
+        import ctypes
+        objc = ctypes.cdll.LoadLibrary(_LIBOBJC)
+        ctypes.cdll.LoadLibrary(_APPKIT)        # registers NSWorkspace
+        objc.objc_getClass.restype = ctypes.c_void_p
+        objc.objc_getClass.argtypes = [ctypes.c_char_p]
+        objc.sel_registerName.restype = ctypes.c_void_p
+        objc.sel_registerName.argtypes = [ctypes.c_char_p]
+        objc.objc_autoreleasePoolPush.restype = ctypes.c_void_p
+        objc.objc_autoreleasePoolPop.argtypes = [ctypes.c_void_p]
+        address = ctypes.cast(objc.objc_msgSend, ctypes.c_void_p).value
+        self._send = ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p)(address)
+        self._send_int = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)(address)
+        self._send_str = ctypes.CFUNCTYPE(ctypes.c_char_p, ctypes.c_void_p, ctypes.c_void_p)(address)
+        self._objc = objc
+        sel = objc.sel_registerName
+        self._front = sel(b"frontmostApplication")
+        self._pid = sel(b"processIdentifier")
+        self._label = sel(b"localizedName")
+        self._utf8 = sel(b"UTF8String")
+        workspace = objc.objc_getClass(b"NSWorkspace")
+        if not workspace:
+            raise OSError("NSWorkspace unavailable")
+        self._workspace = self._send(workspace, sel(b"sharedWorkspace"))
+        self._names = {}
+
+    def frontmost(self):
+        pool = self._objc.objc_autoreleasePoolPush()
+        try:
+            app = self._send(self._workspace, self._front)
+            if not app:
+                return None
+            pid = self._send_int(app, self._pid)
+            name = self._names.get(pid)
+            if name is None:
+                label = self._send(app, self._label)
+                raw = self._send_str(label, self._utf8) if label else None
+                name = raw.decode("utf-8", "replace") if raw else None
+                if name is not None:
+                    self._names[pid] = name
+            return name
+        finally:
+            self._objc.objc_autoreleasePoolPop(pool)
+
+
+# ── Linux (X11) ─────────────────────────────────────────
+_XA_WINDOW = 33
+_SUCCESS = 0
+
+
+class X11WindowSource(WindowSource):
+    """The active window's WM_CLASS, read through libX11.
+
+    The class is only fetched when _NET_ACTIVE_WINDOW changes. Needs an
+    EWMH window manager (nearly all of them) and $DISPLAY; Wayland-only
+    sessions have no equivalent API, so they fall back to none.
+    """
+
+    name = "x11"
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        if not os.environ.get("DISPLAY"):
+            raise OSError("no $DISPLAY")
+        lib = ctypes.cdll.LoadLibrary(ctypes.util.find_library("X11") or "libX11.so.6")
+        lib.XOpenDisplay.restype = ctypes.c_void_p
+        lib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        lib.XDefaultRootWindow.restype = ctypes.c_ulong
+        lib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        lib.XInternAtom.restype = ctypes.c_ulong
+        lib.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+        lib.XGetWindowProperty.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_long, ctypes.c_long, ctypes.c_int,
+            ctypes.c_ulong, ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_int),
+            ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_void_p),
+        ]
+        lib.XGetClassHint.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_void_p]
+        lib.XFree.argtypes = [ctypes.c_void_p]
+        lib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        display = lib.XOpenDisplay(None)
+        if not display:
+            raise OSError("can't open the X display")
+        # A window can vanish between reading its id and asking for its
+        # class; the default handler would exit the process over that
+        handler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)(lambda d, e: 0)
+        lib.XSetErrorHandler(handler)
+
+        class ClassHint(ctypes.Structure):
+            _fields_ = [("res_name", ctypes.c_void_p), ("res_class", ctypes.c_void_p)]
+
+        self._ctypes = ctypes
+        self._lib = lib
+        self._handler = handler
+        self._display = display
+        self._root = lib.XDefaultRootWindow(display)
+        self._active = lib.XInternAtom(display, b"_NET_ACTIVE_WINDOW", 0)
+        self._hint = ClassHint()
+        self._out = (ctypes.c_ulong(), ctypes.c_int(), ctypes.c_ulong(), ctypes.c_ulong(), ctypes.c_void_p())
+        self._window = None
+        self._name = None
+
+    def frontmost(self):
+        ctypes, lib = self._ctypes, self._lib
+        kind, fmt, items, after, prop = self._out
+        status = lib.XGetWindowProperty(self._display, self._root, self._active, 0, 1, 0, _XA_WINDOW,
+                                        ctypes.byref(kind), ctypes.byref(fmt), ctypes.byref(items),
+                                        ctypes.byref(after), ctypes.byref(prop))
+        if status != _SUCCESS or not prop.value:
+            return None
+        window = ctypes.cast(prop, ctypes.POINTER(ctypes.c_ulong))[0] if items.value else 0
+        lib.XFree(prop)
+        if window == self._window:
+            return self._name
+        name = None
+        hint = self._hint
+        if window and lib.XGetClassHint(self._display, window, ctypes.byref(hint)):
+            if hint.res_class:
+                name = ctypes.string_at(hint.res_class).decode("utf-8", "replace")
+            for field in (hint.res_name, hint.res_class):
+                if field:
+                    lib.XFree(field)
+        self._window, self._name = window, name
+        return name
+
+    def close(self):
+        if self._display:
+            self._lib.XCloseDisplay(self._display)
+            self._display = None
+
+
+# ── Deterministic fake ─────────────────────────────────
+class FakeWindowSource(WindowSource):
+    """The app from scripted (start, end, name) spans on a virtual clock; None between them."""
+
+    name = "fake"
+
+    def __init__(self, clock, spans: list = ()):
+        self._clock = clock
+        spans = sorted(spans)
+        self._starts = [s for s, _, _ in spans]
+        self._spans = spans
+
+    def frontmost(self):
+        now = self._clock()
+        i = bisect.bisect_right(self._starts, now) - 1
+        if i < 0 or now >= self._spans[i][1]:
+            return None
+        return self._spans[i][2]
+
+
+def select_window_source() -> WindowSource:
+    """The in-process source for this platform, or one that always says None."""
+    if sys.platform == "darwin":
+        candidates = (MacWindowSource,)
+    elif sys.platform.startswith("linux"):
+        candidates = (X11WindowSource,)
+    else:
+        candidates = ()
+    for cls in candidates:
+        try:
+            return cls()
+        except (OSError, AttributeError):
+            continue
+    return WindowSource()
+
+
+# ── Storage ─────────────────────────────────────────────
+def _load_names(directory: str) -> list:
+    try:
+        with open(os.path.join(directory, NAMES_FILE), encoding="utf-8") as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+
+def _load_day(directory: str, day: str) -> array:
+    seconds = array("I")
+    try:
+        with open(os.path.join(directory, f"{day}.bin"), "rb") as f:
+            data = f.read()
+    except OSError:
+        return seconds
+    seconds.frombytes(data[:len(data) - len(data) % 4])
+    if sys.byteorder != "little":
+        seconds.byteswap()
+    return seconds
+
+
+class AppUsage:
+    """Interned app names and today's seconds per app id."""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.names = _load_names(self.directory)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self._names_fd = os.open(os.path.join(self.directory, NAMES_FILE),
+                                 os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self.day = None
+        self.seconds = array("I")
+        self._fd = None
+
+    def intern(self, name: str) -> int:
+        i = self.ids.get(name)
+        if i is None:
+            name = " ".join(name.split()) or "?"     # one line per name
+            i = self.ids.get(name)
+            if i is None:
+                i = len(self.names)
+                os.write(self._names_fd, (name + "\n").encode("utf-8"))
+                self.names.append(name)
+                self.ids[name] = i
+        return i
+
+    def _open_day(self, day: str):
+        if self._fd is not None:
+            os.close(self._fd)
+        self.day = day
+        self.seconds = _load_day(self.directory, day)
+        self._fd = os.open(os.path.join(self.directory, f"{day}.bin"), os.O_RDWR | os.O_CREAT, 0o600)
+
+    def add(self, day: str, name: str, seconds: float):
+        """Credit `name` with `seconds` on `day` (YYYY-MM-DD)."""
+        if not name or seconds <= 0:
+            return
+        if day != self.day:
+            self._open_day(day)
+        i = self.intern(name)
+        counts = self.seconds
+        if i >= len(counts):
+            counts.extend([0] * (i + 1 - len(counts)))
+        counts[i] = min(counts[i] + int(round(seconds)), 0xFFFFFFFF)
+        os.pwrite(self._fd, _U32.pack(counts[i]), i * 4)
+
+    def top(self, day: str, n: int = 1) -> list:
+        """[(name, seconds)] of the apps with the most time on `day`, most first."""
+        counts = self.seconds if day == self.day else _load_day(self.directory, day)
+        order = sorted(range(len(counts)), key=counts.__getitem__, reverse=True)[:n]
+        return [(self.names[i], counts[i]) for i in order if counts[i]]
+
+    def close(self):
+        os.close(self._names_fd)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def top_apps(directory: str, first: date, last: date, n: int = 5) -> list:
+    """[(name, seconds)] over first..last, most first. Reads nothing but the day files in range."""
+    directory = os.path.expanduser(directory)
+    names = _load_names(directory)
+    totals = array("Q", bytes(8 * len(names)))
+    day = first
+    while day <= last:
+        counts = _load_day(directory, str(day))
+        for i, s in enumerate(counts[:len(totals)]):
+            totals[i] += s
+        day += timedelta(days=1)
+    order = sorted(range(len(totals)), key=totals.__getitem__, reverse=True)[:n]
+    return [(names[i], totals[i]) for i in order if totals[i]]
+
+
+class AppTracker:
+    """A window source plus where its samples go; what run() is handed."""
+
+    def __init__(self, source: WindowSource, usage: AppUsage):
+        self.source = source
+        self.usage = usage
+
+    def observe(self, day: str, seconds: float):
+        if seconds > 0:
+            self.usage.add(day, self.source.frontmost(), seconds)
+
+    def culprit(self, day: str) -> tuple:
+        """(name, seconds) of the app with the most time on `day`, or None."""
+        top = self.usage.top(day)
+        return top[0] if top else None
+
+    def close(self):
+        self.source.close()
+        self.usage.close()
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import time
+
+    from scheduler import FakeClock
+
+    # A scripted workday, sampled every minute like an active daemon would
+    clock = FakeClock(0.0)
+    spans = [(9 * 3600, 10 * 3600, "Slack"), (10 * 3600, 12.5 * 3600, "Code"),
+             (13 * 3600, 15 * 3600, "Firefox"), (15 * 3600, 17 * 3600, "Code"), (17 * 3600, 18 * 3600, "Slack")]
+    root = tempfile.mkdtemp(prefix="philoscreen-apps-")
+    tracker = AppTracker(FakeWindowSource(lambda: clock.now, spans), AppUsage(root))
+    clock.sleep(9 * 3600)
+    ticks = 0
+    t = time.perf_counter()
+    while clock.now < 18 * 3600:
+        clock.sleep(60)
+        tracker.observe("2026-01-05", 60.0)
+        ticks += 1
+    per_tick = (time.perf_counter() - t) / ticks
+    tracker.close()
+    print(f"{ticks} ticks, {per_tick * 1e6:.1f}µs each (fake source, interning, pwrite)")
+    for name, seconds in top_apps(root, date(2026, 1, 5), date(2026, 1, 5)):
+        print(f"  {name:<10} {seconds / 3600:.1f}h")
+    print(f"on disk: {os.path.getsize(os.path.join(root, '2026-01-05.bin'))} bytes for the day, "
+          f"{os.path.getsize(os.path.join(root, NAMES_FILE))} for the names")
+    shutil.rmtree(root)
+
+    src = select_window_source()
+    if src.name != "none":
+        src.frontmost()
+        t = time.perf_counter()
+        for _ in range(200):
+            app = src.frontmost()
+        print(f"{src.name}: {app!r}, {(time.perf_counter() - t) / 200 * 1e6:.1f}µs/probe")
+    else:
+        print("no window source on this machine")
@@ -0,0 +1,236 @@
+"""
+Batch tier evaluation for columnar session state.
+
+For nightly backfills and imported sessions: hand over N sessions' active
+seconds and fired-tier bitmasks as arrays and get back every tier alert
+that's due, in the order the live loop would fire them, plus their Slack
+text rendered in bulk.
+
+    rows, positions, fired = evaluate(active_seconds, fired)
+    texts = render(rows, positions, active_seconds)
+
+With NumPy, evaluation is one searchsorted against THRESHOLDS and a few
+bitwise ops over whole columns. Without it, the same thing runs per
+session with bisect. Messages come from the same message bank and
+rotation as live alerts (--messages / PHILOSCREEN_MESSAGES). Rendering
+builds each distinct header (tier and minutes) and body (message and
+tagline) once; an alert's text is their join, made when it's read.
+
+Run `python3 batch.py [sessions]` to check both against the per-session
+logic and time them.
+"""
+
+import bisect
+import random
+from datetime import datetime
+
+from messages import THRESHOLDS
+from common import SLACK_TAGLINES, TIER_EMOJI, format_time
+from screen_shame import message_bank
+
+try:
+    import numpy as np
+except ImportError:     # optional: everything below has a pure-Python path
+    np = None
+
+if np is not None:
+    _THRESHOLDS = np.asarray(THRESHOLDS, dtype=np.float64)
+    # Per possible due mask: how many bits, and which, low to high
+    _MASKS = range(1 << len(THRESHOLDS))
+    _POPCOUNT = np.asarray([bin(m).count("1") for m in _MASKS], dtype=np.intp)
+    _BITS = np.asarray([b for m in _MASKS for b in range(len(THRESHOLDS)) if m >> b & 1], dtype=np.intp)
+    _BITS_AT = np.cumsum(_POPCOUNT) - _POPCOUNT
+
+
+# ── Evaluation ──────────────────────────────────────────
+def evaluate(active_seconds, fired) -> tuple:
+    """Due alerts for N sessions as (rows, positions, fired after).
+
+    rows[k] is the session and positions[k] the THRESHOLDS position of the
+    k-th due alert, ordered by session then tier, which is the order
+    due_tiers() gives per session. `fired after` is the bitmasks with those
+    tiers set.
+    """
+    if np is not None:
+        hours = np.asarray(active_seconds, dtype=np.float64) / 3600
+        fired = np.asarray(fired, dtype=np.uint32)
+        # Tiers are cumulative: reaching k of them sets the low k bits
+        reached = np.searchsorted(_THRESHOLDS, hours, side="right").astype(np.uint32)
+        due = ((np.uint32(1) << reached) - np.uint32(1)) & ~fired
+        # One output row per set bit: repeat each session by its popcount,
+        # then take the k-th set bit of its mask from a table
+        counts = _POPCOUNT[due]
+        rows = np.repeat(np.arange(len(due)), counts)
+        rank = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = _BITS[_BITS_AT[due[rows]] + rank]
+        return rows, positions, fired | due
+    rows, positions, after = [], [], []
+    for i, (active, mask) in enumerate(zip(active_seconds, fired)):
+        due = ((1 << bisect.bisect_right(THRESHOLDS, active / 3600)) - 1) & ~mask
+        after.append(mask | due)
+        while due:
+            low = due & -due
+            rows.append(i)
+            positions.append(low.bit_length() - 1)
+            due ^= low
+    return rows, positions, after
+
+
+# ── Rendering ───────────────────────────────────────────
+def draw(positions, bank=None, rng=None) -> tuple:
+    """(message index, tagline index) per alert.
+
+    Messages follow each tier's rotation in the message bank (see
+    msgbank.Rotation.cycle), so a backfill uses the same pack as the live
+    daemon and spreads evenly over it. Taglines are random, as in
+    slack_alert().
+    """
+    bank = bank or message_bank()
+    n = len(positions)
+    if np is not None:
+        positions = np.asarray(positions, dtype=np.intp)
+        messages = np.zeros(n, dtype=np.intp)
+        for p, t in enumerate(THRESHOLDS):
+            at = np.flatnonzero(positions == p)
+            if len(at):
+                cycle = np.asarray(bank.cycle(t, len(at)), dtype=np.intp)
+                messages[at] = cycle[np.arange(len(at)) % len(cycle)]
+        rng = rng or np.random.default_rng()
+        return messages, rng.integers(0, len(SLACK_TAGLINES), n)
+    rng = rng or random
+    counts = [0] * len(THRESHOLDS)
+    for p in positions:
+        counts[p] += 1
+    cycles = [bank.cycle(t, counts[p]) if counts[p] else [] for p, t in enumerate(THRESHOLDS)]
+    seen = [0] * len(THRESHOLDS)
+    messages = []
+    for p in positions:
+        messages.append(cycles[p][seen[p] % len(cycles[p])])
+        seen[p] += 1
+    return messages, [rng.randrange(len(SLACK_TAGLINES)) for _ in range(n)]
+
+
+def _header(position: int, minutes: int) -> str:
+    emoji = TIER_EMOJI.get(THRESHOLDS[position], ":eyes:")
+    return f"{emoji} *Screen Time Alert — {format_time(minutes)}*\n\n"
+
+
+class Rendered:
+    """Slack text per alert, joined from a shared header and body when it's read.
+
+    Every distinct header (tier, minutes) and body (tier, message,
+    tagline) is built once by render(); an alert is two indices until
+    it's asked for, so rendering N alerts allocates no strings per alert.
+    """
+
+    __slots__ = ("heads", "head", "bodies", "body")
+
+    def __init__(self, heads, head, bodies, body):
+        self.heads, self.head, self.bodies, self.body = heads, head, bodies, body
+
+    def __len__(self) -> int:
+        return len(self.head)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(len(self)))]
+        return self.heads[self.head[k]] + self.bodies[self.body[k]]
+
+    def __iter__(self):
+        heads, bodies = self.heads, self.bodies
+        head = self.head.tolist() if np is not None and isinstance(self.head, np.ndarray) else self.head
+        body = self.body.tolist() if np is not None and isinstance(self.body, np.ndarray) else self.body
+        for h, b in zip(head, body):
+            yield heads[h] + bodies[b]
+
+
+def render(rows, positions, active_seconds, picks: tuple = None, timestamp: str = None, bank=None) -> Rendered:
+    """Slack text for each due alert, as slack_alert() would write it."""
+    timestamp = timestamp or datetime.now().strftime("%I:%M %p")
+    bank = bank or message_bank()
+    messages, taglines = picks if picks is not None else draw(positions, bank)
+    n_tiers, n_tags = len(THRESHOLDS), len(SLACK_TAGLINES)
+
+    def body(key: int) -> str:
+        message, rest = divmod(key, n_tiers * n_tags)
+        p, g = divmod(rest, n_tags)
+        return f"{bank.text(THRESHOLDS[p], message)}\n\n_{SLACK_TAGLINES[g]} | {timestamp}_"
+
+    if np is not None:
+        if not len(rows):
+            return Rendered([], [], [], [])
+        positions = np.asarray(positions, dtype=np.intp)
+        minutes = (np.asarray(active_seconds, dtype=np.float64)[rows] // 60).astype(np.intp)
+        # Keys index straight into lists of headers and bodies, built only where used
+        head = minutes * n_tiers + positions
+        tail = (np.asarray(messages, dtype=np.intp) * n_tiers + positions) * n_tags + np.asarray(taglines)
+        heads = [None] * (int(head.max()) + 1)
+        for k in np.flatnonzero(np.bincount(head)).tolist():
+            heads[k] = _header(k % n_tiers, k // n_tiers)
+        bodies = [None] * (int(tail.max()) + 1)
+        for k in np.flatnonzero(np.bincount(tail)).tolist():
+            bodies[k] = body(k)
+        return Rendered(heads, head, bodies, tail)
+    heads, bodies, head, tail = {}, {}, [], []
+    for row, p, m, g in zip(rows, positions, messages, taglines):
+        h = int(active_seconds[row] // 60) * n_tiers + p
+        b = (m * n_tiers + p) * n_tags + g
+        if h not in heads:
+            heads[h] = _header(p, h // n_tiers)
+        if b not in bodies:
+            bodies[b] = body(b)
+        head.append(h)
+        tail.append(b)
+    return Rendered(heads, head, bodies, tail)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    import screen_shame
+    from common import slack_alert
+    from screen_shame import due_tiers, pick_message
+
+    screen_shame.ROTATION_FILE = None      # time the choice of message, not writes of the rotation file
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(11)
+    # Imported sessions: anything up to 14h, tiers fired or not in any combination
+    active = [rng.uniform(0, 14 * 3600) for _ in range(n)]
+    fired = [rng.getrandbits(len(THRESHOLDS)) & rng.getrandbits(len(THRESHOLDS)) for _ in range(n)]
+    active[:4] = [7200.0, 7199.999999999999, 0.0, 43200.0]     # boundaries
+
+    t = time.perf_counter()
+    expected = []
+    for i in range(n):
+        for threshold in due_tiers(active[i], fired[i]):
+            expected.append((i, threshold, slack_alert(threshold, active[i], pick_message(threshold))))
+    per_session = time.perf_counter() - t
+
+    cols_active = np.asarray(active) if np is not None else active
+    cols_fired = np.asarray(fired, dtype=np.uint32) if np is not None else fired
+    t = time.perf_counter()
+    rows, positions, after = evaluate(cols_active, cols_fired)
+    evaluated = time.perf_counter() - t
+    picks = draw(positions)
+    texts = render(rows, positions, cols_active, picks, "09:41 AM")
+    batched = time.perf_counter() - t
+
+    rows, positions = list(rows), list(positions)
+    assert [(i, THRESHOLDS[p]) for i, p in zip(rows, positions)] == [(i, th) for i, th, _ in expected]
+    assert list(after) == [f | sum(1 << THRESHOLDS.index(th) for th in due_tiers(a, f)) for a, f in zip(active, fired)]
+    messages, taglines = picks
+    bank = message_bank()
+    for k in range(0, len(texts), max(1, len(texts) // 10_000)):
+        th = THRESHOLDS[positions[k]]
+        want = slack_alert(th, active[rows[k]], bank.text(th, messages[k]), SLACK_TAGLINES[taglines[k]], "09:41 AM")
+        assert texts[k] == want, (k, texts[k], want)
+
+    engine = "numpy" if np is not None else "pure python"
+    print(f"{n:,} sessions, {len(texts):,} alerts due — batch matches per-session ({engine})")
+    print(f"  per session       {per_session:8.3f}s")
+    print(f"  batch evaluate    {evaluated:8.3f}s   {per_session / evaluated:6.0f}x")
+    print(f"  batch + render    {batched:8.3f}s   {per_session / batched:6.0f}x")
+    t = time.perf_counter()
+    total = sum(len(text) for text in texts)
+    print(f"  every text read   {time.perf_counter() - t:8.3f}s   ({total / 1e6:.0f} MB of Slack text)")
@@ -0,0 +1,465 @@
+"""
+Benchmarks for the philoscreen tick loop, with a baseline to catch regressions.
+
+    python3 bench.py                    compare against bench-baseline.json
+    python3 bench.py --save             record this run as the new baseline
+    python3 bench.py --threshold 0.1    flag anything more than 10% worse
+
+Everything runs against throwaway files in a temp directory, never your
+real state. The tick loop is the real run() with an injected FakeClock,
+FakeIdleSource and a counting sink, over a week of scripted workdays:
+CPU time and allocations per tick, and bytes printed per tick. The pieces
+each tick calls are measured on their own: save_state() (bytes journaled),
+render_status() (bytes printed), progress_bar() and the --events log's
+per-tick line, buffered writes and rotation included. load_state() is
+timed cold against a journal one record short of compaction, which is
+the most it ever has to read. Notification latency is the real Slack
+sink end to end, from notify() until a local stand-in server has the
+message. `--tick` is timed as a timer would run it, in a fresh
+interpreter, along with its import time from `python -X importtime`.
+That import time has a hard budget, STARTUP_BUDGET, that fails the run
+whatever the baseline says. So does `--lean`: its RSS after a week of
+virtual time (LEAN_RSS_BUDGET) and the memory it still holds per virtual
+hour once past the first day (LEAN_GROWTH_BUDGET), each measured in a
+fresh interpreter that imports nothing the daemon doesn't.
+
+Every metric is lower-is-better. Anything worse than the baseline by
+more than the threshold is flagged, and the exit status is 1, so this
+can gate CI. Baselines are machine-specific; keep them out of git.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import screen_shame
+from idle import FakeIdleSource
+from journal import COMPACT_EVERY
+from notify import Sink
+from scheduler import FakeClock
+from common import BOLD, DIM, GREEN, RED, RESET, WHITE, YELLOW
+
+BASELINE_FILE = "bench-baseline.json"
+THRESHOLD = 0.25            # fraction worse than baseline that counts as a regression
+STARTUP_BUDGET = 30.0       # ms of imports a --tick run may take
+LEAN_RSS_BUDGET = 16.0      # MB resident for a --lean daemon after a week
+LEAN_GROWTH_BUDGET = 1024   # bytes a --lean daemon may keep allocated per hour once warm
+DAYS = 7
+# Scripted workday: seconds after midnight with continuous input
+WORKDAY = [(8 * 3600, 10.5 * 3600), (10.75 * 3600, 12 * 3600), (13 * 3600, 17.5 * 3600),
+           (17.6 * 3600, 18 * 3600), (20 * 3600, 23.5 * 3600)]
+
+
+class _Done(Exception):
+    pass
+
+
+class _Counter(io.TextIOBase):
+    """A stdout that only counts the bytes written to it."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, s: str) -> int:
+        self.bytes += len(s.encode("utf-8"))
+        return len(s)
+
+
+class _BenchClock(FakeClock):
+    """FakeClock that stops run() after `until` and times each tick.
+
+    A tick is everything between two sleeps, so the first one, which
+    includes startup, isn't counted. With `traced`, it keeps the peak
+    memory allocated within each tick.
+    """
+
+    def __init__(self, start: float, until: float, traced: bool = False):
+        super().__init__(start)
+        self.until = until
+        self.traced = traced
+        self.cpu = 0.0
+        self.peaks = []
+        self._mark = None
+        self._base = 0
+
+    def sleep(self, seconds: float):
+        now = time.process_time()
+        if self._mark is not None:
+            self.cpu += now - self._mark
+            if self.traced:
+                current, peak = tracemalloc.get_traced_memory()
+                self.peaks.append(peak - self._base)
+        super().sleep(seconds)
+        if self.now >= self.until:
+            raise _Done
+        if self.traced:
+            tracemalloc.reset_peak()
+            self._base = tracemalloc.get_traced_memory()[0]
+        self._mark = time.process_time()
+
+
+class _CountingSink(Sink):
+    name = "bench"
+    alerts = 0
+
+    def send(self, alert):
+        self.alerts += 1
+
+
+# ── Measurements ────────────────────────────────────────
+def _median(values: list) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else 0.0
+
+
+def _isolate(tmp: str):
+    """Point every file the daemon touches into `tmp` and drop any open journal."""
+    for name, file in (("STATE_FILE", "state.json"), ("JOURNAL_FILE", "state.wal"),
+                       ("SNAPSHOT_FILE", "state.snap"), ("HISTORY_FILE", "history.bin"),
+                       ("OUTBOX_FILE", "outbox.db"), ("ROTATION_FILE", "rotation")):
+        path = os.path.join(tmp, file)
+        setattr(screen_shame, name, path)
+        for stale in (path, path + ".idx"):
+            if os.path.exists(stale):
+                os.remove(stale)
+    if screen_shame._journal is not None:
+        screen_shame._journal.close()
+    screen_shame._journal = None
+
+
+def bench_tick(tmp: str, traced: bool) -> dict:
+    """Drive run() over DAYS workdays of virtual time."""
+    _isolate(tmp)
+    midnight = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+    clock = _BenchClock(midnight, midnight + DAYS * 86400, traced)
+    spans = [(d * 86400 + s, d * 86400 + e) for d in range(DAYS) for s, e in WORKDAY]
+    source = FakeIdleSource(lambda: clock.now - midnight, spans)
+    sink = _CountingSink()
+    out = _Counter()
+    if traced:
+        tracemalloc.start()
+    try:
+        with redirect_stdout(out):
+            screen_shame.run("", dry_run=True, idle_source=source, clock=clock, sinks=[sink])
+    except _Done:
+        pass
+    finally:
+        if traced:
+            tracemalloc.stop()
+    ticks = max(clock.wakeups - 1, 1)
+    return {"ticks": ticks, "cpu": clock.cpu / ticks, "peak": _median(clock.peaks),
+            "out": out.bytes / clock.wakeups, "alerts": sink.alerts}
+
+
+def bench_call(fn, n: int = 2000) -> tuple:
+    """(seconds per call, median peak bytes allocated within one call)."""
+    for _ in range(50):
+        fn()
+    t = time.perf_counter()
+    for _ in range(n):
+        fn()
+    per_call = (time.perf_counter() - t) / n
+    peaks = []
+    tracemalloc.start()
+    for _ in range(200):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return per_call, _median(peaks)
+
+
+def bench_load_state(tmp: str, runs: int = 20) -> float:
+    """Median cold load_state() with a nearly full journal."""
+    times = []
+    for _ in range(runs):
+        _isolate(tmp)
+        state = screen_shame.new_state()
+        journal = screen_shame._state_journal()
+        for i in range(COMPACT_EVERY - 1):
+            state.active_seconds = i * 60.0
+            screen_shame.save_state(state)
+        journal.close()
+        screen_shame._journal = None
+        t = time.perf_counter()
+        screen_shame.load_state()
+        times.append(time.perf_counter() - t)
+    _isolate(tmp)
+    return _median(times)
+
+
+def bench_notify(tmp: str, n: int = 30) -> tuple:
+    """(p50, p99) seconds from notify() to the stand-in server having the alert."""
+    from delivery import serve_stand_in
+    from notify import Alert, Notifier, SlackSink
+
+    _isolate(tmp)
+    server, url = serve_stand_in()
+    sink = SlackSink(url, screen_shame.OUTBOX_FILE)
+    # Measure the pipeline, not the 1/s pacing Slack asks for
+    sink.delivery.rate = None
+    notifier = Notifier([sink])
+    try:
+        for i in range(n):
+            landed = len(sink.delivered)
+            notifier.notify(Alert(2, 7200.0 + i, "bench", screen_shame.new_state().date))
+            deadline = time.monotonic() + 5
+            while len(sink.delivered) == landed and time.monotonic() < deadline:
+                notifier.poll()
+                time.sleep(0.0005)
+        (*_, p50, p99), = notifier.summary()
+    finally:
+        notifier.close()
+        server.shutdown()
+    return p50, p99
+
+
+def bench_cold_tick(tmp: str, runs: int = 7) -> tuple:
+    """(median wall seconds, import seconds) of `screen_shame.py --tick --dry-run` from cold."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "screen_shame.py")
+    command = [sys.executable, script, "--tick", "--dry-run"]
+    env = dict(os.environ, HOME=tmp)
+    walls = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        subprocess.run(command, env=env, check=True, capture_output=True)
+        walls.append(time.perf_counter() - t)
+    trace = subprocess.run(command[:1] + ["-X", "importtime"] + command[1:], env=env,
+                           check=True, capture_output=True, text=True).stderr
+    # Top-level entries only: their cumulative times cover everything nested
+    imports = 0
+    for line in trace.splitlines():
+        fields = line.split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[2][1:2] != " ":
+            cumulative = fields[1].strip()
+            imports += int(cumulative) if cumulative.isdigit() else 0
+    return _median(walls), imports / 1e6
+
+
+# Runs in a fresh interpreter so nothing the bench itself imports is counted
+_LEAN_CHILD = r"""
+import resource, sys
+from datetime import datetime
+
+import screen_shame
+from idle import FakeIdleSource
+from scheduler import FakeClock
+
+days, traced = int(sys.argv[1]), sys.argv[2] == "traced"
+workday = [tuple(map(float, span.split("-"))) for span in sys.argv[3].split(",")]
+midnight = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+spans = [(d * 86400 + s, d * 86400 + e) for d in range(days) for s, e in workday]
+found = {}
+if traced:
+    import tracemalloc
+
+
+class Done(Exception):
+    pass
+
+
+class Clock(FakeClock):
+    # The first virtual day is warm-up: journal compaction, history, first alerts
+    def sleep(self, seconds):
+        super().sleep(seconds)
+        if traced and not tracemalloc.is_tracing() and self.now >= midnight + 86400:
+            tracemalloc.start()
+            found["start"] = self.now
+        if self.now >= midnight + days * 86400:
+            if traced:
+                found["growth"] = tracemalloc.get_traced_memory()[0] / ((self.now - found["start"]) / 3600)
+            raise Done
+
+
+clock = Clock(midnight)
+try:
+    screen_shame.run_lean("", dry_run=True, idle_source=FakeIdleSource(lambda: clock.now - midnight, spans),
+                          clock=clock)
+except Done:
+    pass
+try:
+    with open("/proc/self/statm") as f:
+        found["rss"] = int(f.read().split()[1]) * resource.getpagesize()
+except OSError:
+    # Peak instead (macOS: bytes); Linux carries the parent's peak across exec, so not there
+    found["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+import json  # only now, so it isn't counted
+print(json.dumps(found))
+"""
+
+
+def bench_lean(tmp: str) -> tuple:
+    """(RSS bytes at the end, bytes still allocated per virtual hour) of run_lean() over DAYS days.
+
+    RSS comes from an untraced run, growth from a traced one that starts
+    tracing after the first day.
+    """
+    home = os.path.join(tmp, "lean")
+    env = dict(os.environ, HOME=home, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    workday = ",".join(f"{start}-{end}" for start, end in WORKDAY)
+    found = {}
+    for traced in (False, True):
+        shutil.rmtree(home, ignore_errors=True)
+        os.makedirs(home)
+        out = subprocess.run([sys.executable, "-c", _LEAN_CHILD, str(DAYS), "traced" if traced else "", workday],
+                             env=env, check=True, capture_output=True, text=True).stdout
+        found.update({k: v for k, v in json.loads(out.splitlines()[-1]).items() if (k == "growth") == traced})
+    return found["rss"], found["growth"]
+
+
+def measure(tmp: str) -> dict:
+    """Every metric: name -> (value, unit)."""
+    results = {}
+    tick = bench_tick(tmp, traced=False)
+    traced = bench_tick(tmp, traced=True)
+    results["tick.cpu"] = (tick["cpu"] * 1e6, "µs")
+    results["tick.alloc_peak"] = (traced["peak"], "B")
+    results["tick.stdout"] = (tick["out"], "B")
+
+    _isolate(tmp)
+    state = screen_shame.State(screen_shame.new_state().date, 5.5 * 3600, [2, 4])
+    journal = screen_shame._state_journal()
+    before = journal.bytes_written
+    n = 5000
+    for _ in range(n):
+        screen_shame.save_state(state)
+    results["save_state.written"] = ((journal.bytes_written - before) / n, "B")
+    per_call, peak = bench_call(lambda: screen_shame.save_state(state))
+    results["save_state.time"] = (per_call * 1e6, "µs")
+    results["save_state.alloc_peak"] = (peak, "B")
+
+    out = _Counter()
+    with redirect_stdout(out):
+        screen_shame.render_status(state, 12.0)
+        printed = out.bytes
+        per_call, peak = bench_call(lambda: screen_shame.render_status(state, 12.0))
+    results["render_status.written"] = (printed, "B")
+    results["render_status.time"] = (per_call * 1e6, "µs")
+    results["render_status.alloc_peak"] = (peak, "B")
+
+    per_call, peak = bench_call(lambda: screen_shame.progress_bar(330))
+    results["progress_bar.size"] = (len(screen_shame.progress_bar(330).encode("utf-8")), "B")
+    results["progress_bar.time"] = (per_call * 1e6, "µs")
+    results["progress_bar.alloc_peak"] = (peak, "B")
+
+    from events import EventLog
+    log = EventLog(os.path.join(tmp, "events.jsonl"), max_bytes=1 << 20, keep=2)
+    per_call, peak = bench_call(lambda: log.tick(state.date, state.active_seconds, 12.0, 60.0, 60.0, 11.5))
+    log.close()
+    results["events.tick.time"] = (per_call * 1e6, "µs")
+    results["events.tick.alloc_peak"] = (peak, "B")
+
+    results["load_state.cold"] = (bench_load_state(tmp) * 1e3, "ms")
+    wall, imports = bench_cold_tick(tmp)
+    results["tick_once.cold_start"] = (wall * 1e3, "ms")
+    results["tick_once.imports"] = (imports * 1e3, "ms")
+    rss, growth = bench_lean(tmp)
+    results["lean.rss"] = (rss / 1e6, "MB")
+    results["lean.growth"] = (growth, "B/h")
+    p50, p99 = bench_notify(tmp)
+    results["notify.p50"] = (p50 * 1e3, "ms")
+    results["notify.p99"] = (p99 * 1e3, "ms")
+    _isolate(tmp)
+    return results
+
+
+# ── Baseline ────────────────────────────────────────────
+def load_baseline(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_baseline(path: str, results: dict):
+    doc = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "metrics": {name: {"value": value, "unit": unit} for name, (value, unit) in results.items()},
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(doc, f, indent=2)
+    os.replace(tmp, path)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """(name, value, unit, baseline value or None, change, regressed) per metric."""
+    old = (baseline or {}).get("metrics", {})
+    rows = []
+    for name, (value, unit) in results.items():
+        base = old.get(name, {}).get("value")
+        change = (value - base) / base if base else None
+        rows.append((name, value, unit, base, change, change is not None and change > threshold))
+    return rows
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the philoscreen tick loop")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help=f"baseline JSON (default: {BASELINE_FILE})")
+    parser.add_argument("--save", action="store_true", help="write this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"regression threshold as a fraction (default: {THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="philoscreen-bench-")
+    saved = {name: getattr(screen_shame, name) for name in
+             ("STATE_FILE", "JOURNAL_FILE", "SNAPSHOT_FILE", "HISTORY_FILE", "OUTBOX_FILE", "ROTATION_FILE")}
+    try:
+        results = measure(tmp)
+    finally:
+        for name, value in saved.items():
+            setattr(screen_shame, name, value)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    baseline = None if args.save else load_baseline(args.baseline)
+    rows = compare(results, baseline, args.threshold)
+    print(f"\n  {BOLD}{WHITE}philoscreen bench{RESET}  {DIM}{platform.python_version()} · "
+          f"{DAYS} virtual days · threshold {args.threshold:.0%}{RESET}")
+    for name, value, unit, base, change, regressed in rows:
+        line = f"  {name:<26} {value:>10.2f} {unit:<3}"
+        if change is not None:
+            color = RED if regressed else GREEN if change < -args.threshold else DIM
+            line += f"  {DIM}was {base:>10.2f}{RESET}  {color}{change:+7.1%}{' REGRESSED' if regressed else ''}{RESET}"
+        print(line)
+    regressions = [r for r in rows if r[5]]
+    imports = results["tick_once.imports"][0]
+    rss, growth = results["lean.rss"][0], results["lean.growth"][0]
+    budgets = [
+        (imports > STARTUP_BUDGET, f"--tick imports {imports:.1f}ms of a {STARTUP_BUDGET:.0f}ms budget"),
+        (rss > LEAN_RSS_BUDGET, f"--lean RSS {rss:.1f}MB of a {LEAN_RSS_BUDGET:.0f}MB budget"),
+        (growth > LEAN_GROWTH_BUDGET, f"--lean keeps {growth:.0f}B/h of a {LEAN_GROWTH_BUDGET}B/h budget"),
+    ]
+    over_budget = any(over for over, _ in budgets)
+    print()
+    for over, text in budgets:
+        print(f"  {RED if over else DIM}{text}{RESET}")
+
+    if args.save or baseline is None:
+        save_baseline(args.baseline, results)
+        print(f"\n  {YELLOW}Baseline saved to {args.baseline}{RESET}\n")
+        return 1 if over_budget else 0
+    if regressions or over_budget:
+        if regressions:
+            print(f"\n  {RED}{len(regressions)} regression{'s' if len(regressions) != 1 else ''} "
+                  f"beyond {args.threshold:.0%}{RESET}\n")
+        return 1
+    print(f"\n  {GREEN}No regressions{RESET}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Constants and terminal/Slack formatting shared by philoscreen's modules.
+
+Kept apart from screen_shame.py so the sinks, the server, the report and
+the other tools can use them without importing the CLI, which would load
+it a second time when it's the program being run.
+"""
+
+import os
+from datetime import datetime
+
+# Snarky taglines for the Slack footer — rotated randomly
+SLACK_TAGLINES = [
+    "your self-appointed screen time parole officer",
+    "the script that cares too much",
+    "judging you so you don't have to",
+    "passive-aggression as a service",
+    "your laptop's disappointed parent",
+    "screen time's least favorite app",
+]
+
+# ── Config ──────────────────────────────────────────────
+POLL_INTERVAL = 60          # seconds — retry cadence and shortest idle back-off
+IDLE_THRESHOLD = 300        # seconds — under this counts as "active"
+HISTORY_FILE = os.path.expanduser("~/.philoscreen-history.bin")
+APPS_DIR = os.path.expanduser("~/.philoscreen-apps")             # per-app seconds per day
+OUTBOX_FILE = os.path.expanduser("~/.philoscreen-outbox.db")
+
+# ── ANSI Colors ─────────────────────────────────────────
+RESET   = "\033[0m"
+BOLD    = "\033[1m"
+DIM     = "\033[2m"
+RED     = "\033[31m"
+GREEN   = "\033[32m"
+YELLOW  = "\033[33m"
+BLUE    = "\033[34m"
+MAGENTA = "\033[35m"
+CYAN    = "\033[36m"
+WHITE   = "\033[37m"
+BG_RED  = "\033[41m"
+
+# Tier colors — escalating warmth
+TIER_COLORS = {
+    2:  CYAN,
+    4:  YELLOW,
+    6:  MAGENTA,
+    8:  RED,
+    10: f"{BOLD}{RED}",
+    12: f"{BOLD}{BG_RED}{WHITE}",
+}
+
+# ── Slack Emoji per tier ────────────────────────────────
+TIER_EMOJI = {
+    2:  ":eyes:",
+    4:  ":sweat_smile:",
+    6:  ":grimacing:",
+    8:  ":skull:",
+    10: ":rotating_light:",
+    12: ":fire::skull::fire:",
+}
+
+
+def log(msg: str, color: str = DIM):
+    """Print a timestamped, styled log line."""
+    ts = datetime.now().strftime("%H:%M:%S")
+    print(f"  {DIM}{ts}{RESET}  {color}{msg}{RESET}")
+
+
+def slack_alert(threshold: int, active_seconds: float, msg: str, tagline: str = None,
+                timestamp: str = None) -> str:
+    """The Slack text for a tier alert (random tagline, current time unless given)."""
+    timestamp = timestamp or datetime.now().strftime("%I:%M %p")
+    emoji = TIER_EMOJI.get(threshold, ":eyes:")
+    if tagline is None:
+        import random
+        tagline = random.choice(SLACK_TAGLINES)
+    return (
+        f"{emoji} *Screen Time Alert — {format_time(int(active_seconds // 60))}*\n\n"
+        f"{msg}\n\n"
+        f"_{tagline} | {timestamp}_"
+    )
+
+
+def format_time(minutes: int) -> str:
+    """Format minutes into a human-readable string."""
+    hours = minutes // 60
+    mins = minutes % 60
+    if hours and mins:
+        return f"{hours}h {mins}m"
+    elif hours:
+        return f"{hours}h"
+    return f"{mins}m"
+
+
+def print_tier_alert(threshold: int, msg: str, dry_run: bool):
+    """Print a beautifully formatted tier alert in the terminal."""
+    color = TIER_COLORS.get(threshold, WHITE)
+    label = "DRY RUN" if dry_run else "SENT"
+
+    print()
+    print(f"  {color}{'━' * 43}{RESET}")
+    print(f"  {color}{BOLD}  ⚡ TIER {threshold}h{RESET}  {DIM}[{label}]{RESET}")
+    print(f"  {color}{'─' * 43}{RESET}")
+    # Word-wrap the message to ~39 chars
+    words = msg.split()
+    lines = []
+    current = ""
+    for word in words:
+        if len(current) + len(word) + 1 <= 39:
+            current = f"{current} {word}" if current else word
+        else:
+            lines.append(current)
+            current = word
+    if current:
+        lines.append(current)
+    for line in lines:
+        print(f"  {color}  {line}{RESET}")
+    print(f"  {color}{'━' * 43}{RESET}")
+    print()
@@ -0,0 +1,450 @@
+"""
+Background webhook delivery for philoscreen.
+
+The tick loop hands messages to a Delivery worker and goes straight back
+to sampling idle time; the worker thread owns the network. It keeps one
+keep-alive connection per webhook host, so only the first alert pays for
+the TCP+TLS handshake, and retries failures with bounded exponential
+backoff plus jitter, honoring Slack's Retry-After on 429s. Each webhook
+gets a token bucket at Slack's documented ~1 message/second, so a burst
+is spread out instead of provoking those 429s in the first place.
+
+    delivery = Delivery(on_result=callback)
+    delivery.start()
+    delivery.submit(url, {"text": "..."}, tag=anything)
+
+Run `python3 delivery.py` to measure send latency against a local
+stand-in server, pooled vs one connection per message.
+"""
+
+import heapq
+import http.client
+import json
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+BASE_DELAY = 1.0        # seconds — first retry
+MAX_DELAY = 300.0       # seconds — backoff ceiling
+MAX_ATTEMPTS = 8
+TIMEOUT = 10.0          # seconds per request
+WEBHOOK_RATE = 1.0      # messages per second per webhook (Slack's limit)
+WEBHOOK_BURST = 1       # messages allowed back to back before the rate applies
+LATENCY_WINDOW = 1024   # recent deliveries kept for percentiles
+
+
+class SendError(Exception):
+    """A delivery attempt failed; `retry_after` is the server's hint, if any."""
+
+    def __init__(self, msg: str, retryable: bool = True, retry_after: float = None,
+                 status: int = None):
+        super().__init__(msg)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.status = status
+
+
+class ConnectionPool:
+    """Persistent HTTP(S) connections, one per (scheme, host, port)."""
+
+    def __init__(self, timeout: float = TIMEOUT):
+        self.timeout = timeout
+        self._conns = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme: str, host: str, port: int):
+        if scheme == "https":
+            import ssl
+            return http.client.HTTPSConnection(
+                host, port, timeout=self.timeout, context=ssl.create_default_context()
+            )
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def post(self, url: str, body: bytes, headers: dict) -> tuple:
+        """POST `body` to `url`; returns (status, response headers, response body)."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        with self._lock:
+            conn = self._conns.pop(key, None)
+        reused = conn is not None
+        if conn is None:
+            conn = self._connect(*key)
+
+        while True:
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # A kept-alive connection the server already closed: redial once
+                if not reused:
+                    raise
+                reused = False
+                conn = self._connect(*key)
+            except Exception:
+                conn.close()
+                raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            with self._lock:
+                old = self._conns.pop(key, None)
+                self._conns[key] = conn
+            if old is not None:
+                old.close()
+        return resp.status, resp.headers, data
+
+    def close(self):
+        with self._lock:
+            conns, self._conns = list(self._conns.values()), {}
+        for conn in conns:
+            conn.close()
+
+
+def _retry_after(headers) -> float:
+    value = headers.get("Retry-After") if headers is not None else None
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+def post_json(pool: ConnectionPool, url: str, payload: dict):
+    """One delivery attempt. Raises SendError unless the server answers 2xx."""
+    body = json.dumps(payload).encode("utf-8")
+    try:
+        status, headers, _ = pool.post(url, body, {"Content-Type": "application/json"})
+    except (OSError, http.client.HTTPException) as e:
+        raise SendError(str(e) or e.__class__.__name__)
+    if 200 <= status < 300:
+        return
+    if status == 429 or status >= 500:
+        raise SendError(f"HTTP {status}", retry_after=_retry_after(headers), status=status)
+    raise SendError(f"HTTP {status}", retryable=False, status=status)
+
+
+def backoff(attempt: int, base: float = BASE_DELAY, cap: float = MAX_DELAY) -> float:
+    """Exponential backoff with "equal jitter": half fixed, half random."""
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class TokenBucket:
+    """`rate` sends per second, `burst` back to back, as one timestamp (GCRA).
+
+    The bucket tracks when the next send would be due at a steady rate;
+    reserving hands out that slot and moves it along, so a backlog of N
+    gets N distinct slots at once instead of N retries per token.
+    """
+
+    __slots__ = ("interval", "burst", "tat")
+
+    def __init__(self, rate: float = WEBHOOK_RATE, burst: int = WEBHOOK_BURST):
+        self.interval = 1.0 / rate
+        self.burst = burst
+        self.tat = 0.0          # theoretical arrival time of the next send
+
+    def reserve(self, now: float) -> float:
+        """Claim the next slot; returns seconds until it comes up (0: go now)."""
+        tat = max(self.tat, now)
+        self.tat = tat + self.interval
+        return max(0.0, tat - (self.burst - 1) * self.interval - now)
+
+    def pause(self, until: float):
+        """Nothing goes out before `until` (the server said Retry-After)."""
+        self.tat = max(self.tat, until)
+
+
+class Job:
+    """One message on its way to a webhook."""
+
+    __slots__ = ("url", "payload", "tag", "attempts", "submitted", "error", "permanent", "slotted")
+
+    def __init__(self, url: str, payload, tag=None):
+        self.url = url
+        self.payload = payload
+        self.tag = tag
+        self.attempts = 0
+        self.submitted = time.monotonic()
+        self.error = None
+        self.permanent = False  # given up on an answer retrying can't change (a 4xx other than 429)
+        self.slotted = False    # holds a rate-limit slot that has come up
+
+
+class Delivery:
+    """Worker thread that delivers jobs in the background and retries failures.
+
+    `on_result(job, ok)` runs on the worker thread once a job is delivered
+    or given up on. Sends to each webhook are paced at `rate` per second
+    (None: unpaced).
+    """
+
+    def __init__(self, on_result=None, pool: ConnectionPool = None,
+                 max_attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY, rate: float = WEBHOOK_RATE,
+                 burst: int = WEBHOOK_BURST):
+        self.on_result = on_result
+        self.pool = pool or ConnectionPool()
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate = rate
+        self.burst = burst
+        self.latencies = deque(maxlen=LATENCY_WINDOW)   # seconds from submit() to delivery, recent ones
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.throttled = 0      # 429 answers
+        self._buckets = {}      # url → TokenBucket
+        self._queue = []        # heap of (due, seq, job)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._busy = 0
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="philoscreen-delivery", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, url: str, payload, tag=None) -> Job:
+        """Queue a message. Never blocks on the network.
+
+        `payload` is a dict, or a callable returning one when the job's
+        first attempt comes up.
+        """
+        job = Job(url, payload, tag)
+        self._push(job, time.monotonic())
+        return job
+
+    def _push(self, job: Job, due: float):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._queue, (due, self._seq, job))
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue) + self._busy
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until nothing is queued or in flight."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """Give queued jobs up to `timeout` seconds, then shut the worker down."""
+        if self._thread is not None:
+            self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        self.pool.close()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._queue:
+                        wait = self._queue[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._stopping:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                if self.rate and not job.slotted:
+                    now = time.monotonic()
+                    wait = self._bucket(job.url).reserve(now)
+                    if wait > 0:
+                        # Back in line for its slot; other webhooks go meanwhile
+                        job.slotted = True
+                        self._seq += 1
+                        heapq.heappush(self._queue, (now + wait, self._seq, job))
+                        continue
+                job.slotted = False
+                self._busy += 1
+            try:
+                self._attempt(job)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    self._cond.notify_all()
+
+    def _bucket(self, url: str) -> TokenBucket:
+        bucket = self._buckets.get(url)
+        if bucket is None:
+            bucket = self._buckets[url] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _attempt(self, job: Job):
+        job.attempts += 1
+        if callable(job.payload):
+            job.payload = job.payload()     # written as late as possible, then fixed for retries
+        try:
+            post_json(self.pool, job.url, job.payload)
+        except SendError as e:
+            job.error = str(e)
+            if e.status == 429:
+                self.throttled += 1
+            if e.retry_after is not None and self.rate:
+                # Hold everything else for this webhook too, not just this job
+                with self._cond:
+                    self._bucket(job.url).pause(time.monotonic() + e.retry_after)
+            if e.retryable and job.attempts < self.max_attempts:
+                delay = backoff(job.attempts - 1, self.base_delay, self.max_delay)
+                if e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                self.retried += 1
+                self._push(job, time.monotonic() + delay)
+                return
+            job.permanent = not e.retryable
+            self.failed += 1
+            self._report(job, False)
+            return
+        job.error = None
+        self.sent += 1
+        self.latencies.append(time.monotonic() - job.submitted)
+        self._report(job, True)
+
+    def _report(self, job: Job, ok: bool):
+        if self.on_result is not None:
+            try:
+                self.on_result(job, ok)
+            except Exception:
+                pass
+
+
+# ── Local stand-in server (benchmarks) ─────────────────
+def serve_stand_in(status: int = 200, delay: float = 0.0, retry_after: float = None,
+                   rate_limit: float = None):
+    """Start a local keep-alive HTTP server that answers every POST.
+
+    Returns (server, url). Stop it with server.shutdown(). `server.hits`
+    counts requests and `server.connections` counts TCP connections. With
+    `rate_limit`, it acts like Slack: posts faster than that many per
+    second get a 429 with Retry-After (`retry_after`, default 1s), counted
+    in `server.throttled`.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            self.server.connections += 1
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.server.hits += 1
+            if delay:
+                time.sleep(delay)
+            code = self.server.status
+            limit = self.server.limit
+            if code == 200 and limit is not None:
+                with self.server.lock:
+                    now = time.monotonic()
+                    # A little slack for scheduling jitter, as the real thing allows
+                    if now < limit.tat - limit.interval * 0.05:
+                        code = 429
+                        self.server.throttled += 1
+                    else:
+                        limit.tat = max(limit.tat, now) + limit.interval
+            self.send_response(code)
+            if code == 429 and (retry_after is not None or limit is not None):
+                self.send_header("Retry-After", str(retry_after if retry_after is not None else 1))
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.handle_error = lambda request, address: None   # clients hanging up on a slow answer
+    server.hits = 0
+    server.connections = 0
+    server.status = status
+    server.limit = TokenBucket(rate_limit) if rate_limit else None
+    server.lock = threading.Lock()
+    server.throttled = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/hook"
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+if __name__ == "__main__":
+    from urllib.request import Request, urlopen
+
+    n = 300
+    server, url = serve_stand_in()
+    payload = {"text": "benchmark"}
+    body = json.dumps(payload).encode("utf-8")
+
+    fresh = []
+    for _ in range(n):
+        t = time.perf_counter()
+        with urlopen(Request(url, data=body, headers={"Content-Type": "application/json"})) as r:
+            r.read()
+        fresh.append(time.perf_counter() - t)
+
+    pool, pooled = ConnectionPool(), []
+    conns = server.connections
+    for _ in range(n):
+        t = time.perf_counter()
+        post_json(pool, url, payload)
+        pooled.append(time.perf_counter() - t)
+    pooled_conns = server.connections - conns
+
+    delivery = Delivery(rate=None).start()
+    submit = []
+    for _ in range(n):
+        t = time.perf_counter()
+        delivery.submit(url, payload)
+        submit.append(time.perf_counter() - t)
+    delivery.flush(30)
+    delivery.stop()
+
+    print(f"{n} sends to a local stand-in server")
+    for label, xs in (("urlopen (new conn)", fresh), ("pooled keep-alive", pooled),
+                      ("Delivery.submit()", submit), ("submit → delivered", delivery.latencies)):
+        print(f"  {label:<20} p50 {_percentile(xs, 50) * 1e6:8.0f}µs"
+              f"  p99 {_percentile(xs, 99) * 1e6:8.0f}µs")
+    print(f"  connections opened: urlopen {n}, pooled {pooled_conns}")
+
+    server.status = 429
+    retrying = Delivery(base_delay=0.05, max_attempts=3, rate=None).start()
+    t = time.perf_counter()
+    retrying.submit(url, payload)
+    retrying.flush(10)
+    print(f"  429 path: {retrying.retried} retries, {retrying.failed} failed "
+          f"after {time.perf_counter() - t:.2f}s")
+    retrying.stop()
+    server.shutdown()
@@ -0,0 +1,223 @@
+"""
+`screen_shame.py evaluate` — one-shot tier check for a whole team.
+
+    python3 screen_shame.py evaluate --state-dir DIR [--workers N] [--webhook URL | --dry-run]
+
+DIR holds one state file per person, named after them: `<user>.json` in
+the format load_state() reads, or a `<user>.wal` journal with its
+`<user>.snap` snapshot. Made for cron: each run fires whatever tiers
+people have crossed since the last one and marks them fired in a
+`<user>.fired` file next to the state. The state files are only read:
+they may belong to a running daemon, whose journal another writer would
+corrupt.
+
+The files are split into shards and a process pool works through them.
+Workers get lists of paths, never file contents, and send back only the
+alerts that are due, a few small tuples per person at most. The parent is
+the single dispatcher. It puts every alert in its own outbox in one
+transaction, marks the tiers fired, then drains.
+
+Run `python3 evaluate.py [files]` to time a synthetic team at each worker
+count up to the number of cores.
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import date
+
+from journal import fired_mask, latest
+from messages import THRESHOLDS
+from common import CYAN, DIM, RED, RESET, TIER_COLORS, WHITE, format_time, log, slack_alert
+from screen_shame import due_tiers, find_webhook, message_bank, pick_message
+
+SHARDS_PER_WORKER = 4       # small enough shards that a slow one can't hold up the pool
+OUTBOX_FILE = os.path.expanduser("~/.philoscreen-evaluate-outbox.db")    # the team's alerts, not yours
+ROTATION_FILE = os.path.expanduser("~/.philoscreen-evaluate-rotation")   # the team's message order, not yours
+
+
+# ── Workers ─────────────────────────────────────────────
+def read_state(path: str) -> tuple:
+    """(day, active seconds, fired mask) from a JSON state file or journal."""
+    if path.endswith(".wal"):
+        rec = latest(path, path[:-4] + ".snap")
+        if rec is None:
+            raise ValueError("no intact journal record")
+        _, day, active, fired = rec
+        return str(date.fromordinal(day)), active, fired
+    with open(path) as f:
+        state = json.load(f)
+    # Older versions counted whole minutes
+    active = state["active_seconds"] if "active_seconds" in state else state["active_minutes"] * 60
+    return state["date"], float(active), fired_mask(state["fired_tiers"], THRESHOLDS)
+
+
+def evaluate_shard(paths: list, today: str) -> tuple:
+    """Due alerts as (path, day, active, fired, due) plus (scanned, stale, unreadable)."""
+    alerts = []
+    stale = bad = 0
+    for path in paths:
+        try:
+            day, active, fired = read_state(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            bad += 1
+            continue
+        if day != today:
+            stale += 1      # a new day starts from zero; nothing left to fire
+            continue
+        fired |= read_fired(path, day)
+        due = due_tiers(active, fired)
+        if due:
+            alerts.append((path, day, active, fired, due))
+    return alerts, (len(paths), stale, bad)
+
+
+def state_files(state_dir: str) -> list:
+    with os.scandir(state_dir) as it:
+        return sorted(e.path for e in it if e.name.endswith((".json", ".wal")) and e.is_file())
+
+
+def evaluate_dir(state_dir: str, workers: int, today: str = None) -> tuple:
+    """Every due alert in `state_dir` and (scanned, stale, unreadable) totals."""
+    today = today or str(date.today())
+    paths = state_files(state_dir)
+    if workers <= 1 or len(paths) < 2:
+        return evaluate_shard(paths, today)
+    from concurrent.futures import ProcessPoolExecutor
+
+    size = -(-len(paths) // (workers * SHARDS_PER_WORKER))
+    shards = [paths[i:i + size] for i in range(0, len(paths), size)]
+    alerts, totals = [], [0, 0, 0]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for found, counts in pool.map(evaluate_shard, shards, [today] * len(shards)):
+            alerts.extend(found)
+            for i, n in enumerate(counts):
+                totals[i] += n
+    return alerts, tuple(totals)
+
+
+# ── Dispatch ────────────────────────────────────────────
+def user_of(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def fired_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".fired"
+
+
+def read_fired(path: str, day: str) -> int:
+    """Tiers a previous run fired on `day` for the state file at `path`, as a mask."""
+    try:
+        with open(fired_path(path)) as f:
+            fired_day, mask = f.read().split()
+        return int(mask) if fired_day == day else 0
+    except (OSError, ValueError):
+        return 0
+
+
+def mark_fired(path: str, day: str, fired: int):
+    """Record the tiers fired on `day` next to the state file; the state file itself is never written."""
+    out = fired_path(path)
+    tmp = f"{out}.{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(f"{day} {fired}\n")
+    os.replace(tmp, out)
+
+
+def dispatch(alerts: list, webhook_url: str, dry_run: bool, outbox_path: str = OUTBOX_FILE,
+             timeout: float = 60.0) -> int:
+    """Send every alert from one place. Returns how many were queued."""
+    queued = sum(len(due) for *_, due in alerts)
+    # One save of the rotation for the whole run, not one per alert
+    bank = message_bank(ROTATION_FILE, save_each=False)
+    if dry_run:
+        for path, _, active, _, due in alerts:
+            for t in due:
+                log(f"{user_of(path)} hit {t}h ({format_time(int(active // 60))}): {pick_message(t, bank=bank)}",
+                    TIER_COLORS.get(t, WHITE))
+        bank.rotation.flush()
+        return queued
+
+    from delivery import Delivery
+    from outbox import Drainer, Outbox, by_user
+
+    now = time.time()
+    rows = [
+        (webhook_url, slack_alert(t, active, f"*{user_of(path)}* — {pick_message(t, bank=bank)}"), day, t,
+         user_of(path), now)
+        for path, day, active, _, due in alerts for t in due
+    ]
+    bank.rotation.flush()
+    outbox = Outbox(outbox_path)
+    # In the outbox before any state says fired, so a crash can't lose one
+    outbox.enqueue_many(rows)
+    for path, day, _, fired, due in alerts:
+        try:
+            mark_fired(path, day, fired | fired_mask(due, THRESHOLDS))
+        except (OSError, ValueError) as e:
+            log(f"Couldn't mark {path}: {e}", RED)
+    delivery = Delivery().start()
+    drainer = Drainer(outbox, delivery, group_by=by_user)
+    try:
+        drainer.drain()
+        if not delivery.flush(timeout):
+            log(f"{len(outbox)} alerts still queued; the next run sends them", RED)
+    finally:
+        delivery.stop()
+        outbox.close()
+    return queued
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        prog="screen_shame.py evaluate",
+        description="Fire due tiers for every state file in a directory",
+    )
+    parser.add_argument("--state-dir", required=True, help="directory of <user>.json / <user>.wal files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes (default: one per core)")
+    parser.add_argument("--webhook", help="Slack Incoming Webhook URL")
+    parser.add_argument("--dry-run", action="store_true", help="print alerts instead of sending or marking them")
+    args = parser.parse_args(argv)
+    webhook_url = find_webhook(args.webhook)
+    if not webhook_url and not args.dry_run:
+        parser.error("provide --webhook (or PHILOSCREEN_WEBHOOK) or --dry-run")
+
+    started = time.perf_counter()
+    alerts, (scanned, stale, bad) = evaluate_dir(args.state_dir, args.workers)
+    elapsed = time.perf_counter() - started
+    log(f"{scanned} state files in {elapsed:.2f}s with {args.workers} workers — "
+        f"{len(alerts)} people due, {stale} from another day, {bad} unreadable", CYAN)
+    queued = dispatch(alerts, webhook_url, args.dry_run)
+    if queued:
+        log(f"{queued} alerts {'printed' if args.dry_run else 'sent'}", CYAN)
+
+
+if __name__ == "__main__":
+    import random
+    import shutil
+    import sys
+    import tempfile
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    state_dir = tempfile.mkdtemp()
+    rng = random.Random(3)
+    today = str(date.today())
+    for i in range(n):
+        active = rng.uniform(0, 10 * 3600)
+        fired = [t for t in THRESHOLDS if active >= t * 3600 and rng.random() < 0.9]
+        with open(os.path.join(state_dir, f"user{i:06d}.json"), "w") as f:
+            json.dump({"date": today, "active_seconds": active, "fired_tiers": fired}, f)
+    try:
+        print(f"{n:,} state files")
+        base = None
+        counts = sorted({1, 2, 4, os.cpu_count() or 1})
+        for workers in counts:
+            t = time.perf_counter()
+            alerts, _ = evaluate_dir(state_dir, workers, today)
+            elapsed = time.perf_counter() - t
+            base = base or elapsed
+            print(f"  {workers:>3} workers  {elapsed:6.2f}s  {n / elapsed:9,.0f} files/s  "
+                  f"{base / elapsed:4.1f}x  {DIM}{len(alerts)} due{RESET}")
+    finally:
+        shutil.rmtree(state_dir)
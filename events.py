@@ -0,0 +1,177 @@
+"""
+Structured event log: what the daemon did, one JSON object per line.
+
+    python3 screen_shame.py --headless --events [PATH] [--events-max-mb 8] [--events-gzip]
+
+Events (every line has "ts", Unix seconds, and "event"):
+
+    start   day, active, sinks
+    tick    day, active, idle, credit, sleep, save_us      one per wakeup
+    tier    day, tier, active, culprit                      a tier fired
+    send    sink, tier, ok, ms, error                       a sink took (or failed) an alert
+    stop    (nothing else)
+
+Tick lines are collected in memory and written together once FLUSH_BYTES
+have built up or the oldest has waited FLUSH_EVERY seconds, so a tick
+costs a string format and a list append, not a write(). The tick loop
+calls poll() before it sleeps, so a line never waits out a long back-off
+in the buffer; the rarer events are written straight away, and close()
+writes whatever is left. When the file passes `max_bytes`
+it's rotated: PATH → PATH.1 → … → PATH.<keep>, the oldest dropped. With
+`compress`, rotated files are gzipped (PATH.1.gz …) on a background
+thread so the tick that rotates doesn't wait for zlib.
+
+Sinks report from their own threads, so emit() takes a lock; it's
+uncontended nearly always. Tick lines are formatted by hand rather than
+through json.dumps since they're the only frequent kind.
+"""
+
+import json
+import os
+import threading
+import time
+
+FLUSH_BYTES = 64 * 1024     # buffered bytes that trigger a write
+FLUSH_EVERY = 30.0          # seconds a tick line may sit in the buffer
+MAX_BYTES = 8 * 2**20       # rotate past this
+KEEP = 5                    # rotated files kept
+
+
+class EventLog:
+    """Buffered JSON-lines writer with size-based rotation."""
+
+    def __init__(self, path: str, max_bytes: int = MAX_BYTES, keep: int = KEEP, compress: bool = False,
+                 flush_bytes: int = FLUSH_BYTES, flush_every: float = FLUSH_EVERY):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.compress = compress
+        self.flush_bytes = flush_bytes
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._lines = []
+        self._buffered = 0
+        self._since = 0.0           # monotonic time of the oldest buffered line
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._size = os.fstat(self._fd).st_size
+        self._gzipping = None
+        self.written = 0            # bytes handed to the OS since start
+
+    # ── Emitting ────────────────────────────────────────
+    def _add(self, line: str, flush: bool = False):
+        with self._lock:
+            if not self._lines:
+                self._since = time.monotonic()
+            self._lines.append(line)
+            self._buffered += len(line)
+            if flush or self._buffered >= self.flush_bytes or time.monotonic() - self._since >= self.flush_every:
+                self._flush()
+
+    def emit(self, event: str, **fields):
+        fields = {"ts": round(time.time(), 3), "event": event, **fields}
+        self._add(json.dumps(fields, ensure_ascii=False, separators=(",", ":")) + "\n", flush=True)
+
+    def tick(self, day: str, active: float, idle: float, credit: float, sleep: float, save_us: float):
+        self._add(f'{{"ts":{time.time():.3f},"event":"tick","day":"{day}","active":{active:.1f},'
+                  f'"idle":{idle:.1f},"credit":{credit:.1f},"sleep":{sleep:.1f},"save_us":{save_us:.1f}}}\n')
+
+    def send_results(self, then=None):
+        """A Notifier on_result callback that logs a send event, then calls `then`."""
+        def on_result(sink, alert, ok: bool, elapsed: float, error: str):
+            self.emit("send", sink=sink.name, tier=alert.tier, ok=ok, ms=round(elapsed * 1e3, 1), error=error)
+            if then is not None:
+                then(sink, alert, ok, elapsed, error)
+        return on_result
+
+    # ── Writing ─────────────────────────────────────────
+    def poll(self, sleep: float = 0.0):
+        """Write the buffer if its oldest line will have waited `flush_every` by `sleep` seconds from now."""
+        if self._lines and time.monotonic() + sleep - self._since >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._lines:
+            data = "".join(self._lines).encode("utf-8")
+            self._lines.clear()
+            self._buffered = 0
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+            self._size += len(data)
+            self.written += len(data)
+        if self._size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        os.close(self._fd)
+        if self._gzipping is not None:
+            self._gzipping.join()   # still compressing the previous one; it's what moves next
+        suffix = ".gz" if self.compress else ""
+        for n in range(self.keep, 0, -1):
+            for ext in (suffix, "") if suffix else ("",):
+                src = f"{self.path}.{n}{ext}"
+                if not os.path.exists(src):
+                    continue
+                if n == self.keep:
+                    os.remove(src)
+                else:
+                    os.replace(src, f"{self.path}.{n + 1}{ext}")
+        os.replace(self.path, f"{self.path}.1")
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._size = 0
+        if self.compress:
+            self._gzipping = threading.Thread(target=_gzip, args=(f"{self.path}.1",),
+                                              name="philoscreen-events-gzip", daemon=True)
+            self._gzipping.start()
+
+    def close(self):
+        self.flush()
+        if self._gzipping is not None:
+            self._gzipping.join()
+        os.close(self._fd)
+
+
+def _gzip(path: str):
+    import gzip
+    import shutil
+    try:
+        with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(path + ".gz.tmp", path + ".gz")
+        os.remove(path)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    root = tempfile.mkdtemp(prefix="philoscreen-events-")
+    path = os.path.join(root, "events.jsonl")
+    log = EventLog(path, max_bytes=1 << 20, keep=3, compress=True)
+
+    n = 100_000
+    t = time.perf_counter()
+    for i in range(n):
+        log.tick("2026-01-05", 3600.0 + i, 4.0, 60.0, 60.0, 11.5)
+    per_tick = (time.perf_counter() - t) / n
+    t = time.perf_counter()
+    for i in range(n // 10):
+        log.emit("send", sink="slack", tier=2, ok=True, ms=120.5, error="")
+    per_emit = (time.perf_counter() - t) / (n // 10)
+    log.close()
+
+    print(f"tick(): {per_tick * 1e6:.2f}µs per line; emit(): {per_emit * 1e6:.2f}µs; "
+          f"{log.written / 1e6:.1f} MB written")
+    for name in sorted(os.listdir(root)):
+        print(f"  {name:<22} {os.path.getsize(os.path.join(root, name)) / 1e3:8.1f} KB")
+    with open(path) as f:
+        last = f.readlines()[-1]
+    json.loads(last)
+    print(f"last line parses: {last.strip()}")
+    shutil.rmtree(root)
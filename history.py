@@ -0,0 +1,304 @@
+"""
+Per-minute activity history for philoscreen.
+
+One memory-mapped file holds every day ever recorded. Each day is a
+fixed 192-byte record at a known offset:
+
+    activity bitmap  180 bytes   1440 bits, bit m = minute m after local midnight
+    fired tiers      u32         bitmask over THRESHOLDS positions
+    active minutes   u16         popcount of the bitmap, kept in step
+    (padding)        6 bytes
+
+so a year is ~70 KB, marking a minute is a couple of byte operations on
+the map, and reading a day hands back a memoryview into the map rather
+than a copy. Release views before writing a day the file has no room for
+yet: growing the file remaps it.
+
+A sidecar index (`<file>.idx`) keeps running totals per day — cumulative
+active minutes, overall and per hour of day — updated as each minute is
+marked, so any date range sums in O(1) by subtracting two rows. Opening
+checks only its newest row against the bitmaps, and rebuilds it from
+them if that's missing or wrong.
+"""
+
+import mmap
+import os
+import struct
+from datetime import datetime
+
+HISTORY_FILE = os.path.expanduser("~/.philoscreen-history.bin")
+
+MINUTES_PER_DAY = 1440
+BITMAP_SIZE = MINUTES_PER_DAY // 8
+RECORD_SIZE = 192
+_FIRED = struct.Struct("<I")
+_MINUTES = struct.Struct("<H")
+FIRED_OFFSET = BITMAP_SIZE
+MINUTES_OFFSET = BITMAP_SIZE + _FIRED.size
+
+MAGIC = b"PHSHIST1"
+_HEADER = struct.Struct("<8sI")     # magic, first day ordinal
+HEADER_SIZE = RECORD_SIZE           # keeps records aligned
+GROW_DAYS = 64                      # file grows this many days at a time
+
+INDEX_MAGIC = b"PHSIDX01"
+_INDEX_HEADER = struct.Struct("<8sIi")  # magic, first day ordinal, last day index (-1: none)
+ROLLUP_FIELDS = 25                      # cumulative minutes, then cumulative per hour 0–23
+_ROW = struct.Struct(f"<{ROLLUP_FIELDS}I")
+_U32 = struct.Struct("<I")
+ROW_SIZE = _ROW.size
+INDEX_HEADER_SIZE = ROW_SIZE
+_HOUR_MASK = (1 << 60) - 1
+
+
+class History:
+    """Day-indexed activity bitmaps in one memory-mapped file."""
+
+    def __init__(self, path: str = HISTORY_FILE):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = os.fstat(self._fd).st_size
+        self._map = None
+        self.base = 0
+        if size >= HEADER_SIZE:
+            self._remap(size)
+            magic, self.base = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a philoscreen history file")
+        self._ifd = os.open(path + ".idx", os.O_RDWR | os.O_CREAT, 0o600)
+        self._imap = None
+        self._last = -1
+        self._open_index()
+
+    # ── Layout ──────────────────────────────────────────
+    def _remap(self, size: int):
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._fd, size)
+
+    def _capacity(self) -> int:
+        return 0 if self._map is None else (len(self._map) - HEADER_SIZE) // RECORD_SIZE
+
+    def _offset(self, day: int, create: bool) -> int:
+        """Byte offset of `day`'s record, or -1 when it isn't stored and `create` is off."""
+        if self._map is None:
+            if not create:
+                return -1
+            self.base = day
+            os.ftruncate(self._fd, HEADER_SIZE + GROW_DAYS * RECORD_SIZE)
+            self._remap(HEADER_SIZE + GROW_DAYS * RECORD_SIZE)
+            _HEADER.pack_into(self._map, 0, MAGIC, day)
+        if day < self.base:
+            if not create:
+                return -1
+            self._rebase(day)
+        index = day - self.base
+        if index >= self._capacity():
+            if not create:
+                return -1
+            days = (index // GROW_DAYS + 1) * GROW_DAYS
+            os.ftruncate(self._fd, HEADER_SIZE + days * RECORD_SIZE)
+            self._remap(HEADER_SIZE + days * RECORD_SIZE)
+        return HEADER_SIZE + index * RECORD_SIZE
+
+    def _rebase(self, day: int):
+        """Make room in front for days older than the first stored one (rare)."""
+        shift = (self.base - day) * RECORD_SIZE
+        old = self._map[HEADER_SIZE:]
+        os.ftruncate(self._fd, len(self._map) + shift)
+        self._remap(len(self._map) + shift)
+        self._map[HEADER_SIZE:HEADER_SIZE + shift] = bytes(shift)
+        self._map[HEADER_SIZE + shift:HEADER_SIZE + shift + len(old)] = old
+        self.base = day
+        _HEADER.pack_into(self._map, 0, MAGIC, day)
+        self.rebuild_index()
+
+    # ── Rollup index ────────────────────────────────────
+    def _index_resize(self, rows: int):
+        """Map at least `rows` rows. Only ever grows the file: another process
+        (a report, a second daemon) may have the old size mapped, and
+        shrinking under its map would kill it with SIGBUS."""
+        size = INDEX_HEADER_SIZE + rows * ROW_SIZE
+        current = os.fstat(self._ifd).st_size
+        if size > current:
+            os.ftruncate(self._ifd, size)
+        else:
+            size = current
+        if self._imap is not None:
+            self._imap.close()
+        self._imap = mmap.mmap(self._ifd, size)
+
+    def _open_index(self):
+        size = os.fstat(self._ifd).st_size
+        if size >= INDEX_HEADER_SIZE:
+            self._imap = mmap.mmap(self._ifd, size)
+            magic, base, last = _INDEX_HEADER.unpack_from(self._imap, 0)
+            if magic == INDEX_MAGIC and base == self.base and self._index_agrees(last):
+                self._last = last
+                return
+        self.rebuild_index()
+
+    def _index_agrees(self, last: int) -> bool:
+        """Cheap consistency check on the newest row only.
+
+        Its day's minutes must match the bitmap's count and its hours must
+        add up, and no later day may hold anything. Later days are at most
+        one GROW_DAYS chunk when the index is current, so this doesn't
+        depend on how much history there is.
+        """
+        if last >= self._capacity() or (last + 1) * ROW_SIZE + INDEX_HEADER_SIZE > len(self._imap):
+            return False
+        for i in range(last + 1, self._capacity()):
+            if self.minutes(self.base + i) or self.fired(self.base + i):
+                return False
+        if last < 0:
+            return True
+        row = _ROW.unpack_from(self._imap, INDEX_HEADER_SIZE + last * ROW_SIZE)
+        before = _U32.unpack_from(self._imap, INDEX_HEADER_SIZE + (last - 1) * ROW_SIZE)[0] if last else 0
+        return row[0] == sum(row[1:]) and row[0] - before == self.minutes(self.base + last)
+
+    def _last_used(self) -> int:
+        """Index of the newest day with any minute marked, or -1."""
+        for i in range(self._capacity() - 1, -1, -1):
+            if self.minutes(self.base + i) or self.fired(self.base + i):
+                return i
+        return -1
+
+    def rebuild_index(self):
+        """Recompute every running total from the bitmaps."""
+        last = self._last_used()
+        self._index_resize(max(last + 1, GROW_DAYS))
+        _INDEX_HEADER.pack_into(self._imap, 0, INDEX_MAGIC, self.base, last)
+        running = [0] * ROLLUP_FIELDS
+        for i in range(last + 1):
+            bits = self.bitmap(self.base + i)
+            x = int.from_bytes(bits, "little")
+            bits.release()
+            for hour in range(24):
+                n = bin(x >> (hour * 60) & _HOUR_MASK).count("1")
+                running[1 + hour] += n
+                running[0] += n
+            _ROW.pack_into(self._imap, INDEX_HEADER_SIZE + i * ROW_SIZE, *running)
+        self._last = last
+
+    def _extend_index(self, index: int):
+        """Carry the running totals forward so the index covers day `index`."""
+        if index <= self._last:
+            return
+        rows = (len(self._imap) - INDEX_HEADER_SIZE) // ROW_SIZE
+        if index >= rows:
+            self._index_resize((index // GROW_DAYS + 1) * GROW_DAYS)
+        m = self._imap
+        prev = (_ROW.unpack_from(m, INDEX_HEADER_SIZE + self._last * ROW_SIZE)
+                if self._last >= 0 else (0,) * ROLLUP_FIELDS)
+        for i in range(self._last + 1, index + 1):
+            _ROW.pack_into(m, INDEX_HEADER_SIZE + i * ROW_SIZE, *prev)
+        self._last = index
+        _INDEX_HEADER.pack_into(m, 0, INDEX_MAGIC, self.base, index)
+
+    def _bump(self, index: int, hour: int):
+        """One more active minute in `hour` of day `index`: update running totals."""
+        self._extend_index(index)
+        m = self._imap
+        # Days after `index` carry the same running totals; normally there are none
+        for i in range(index, self._last + 1):
+            off = INDEX_HEADER_SIZE + i * ROW_SIZE
+            _U32.pack_into(m, off, _U32.unpack_from(m, off)[0] + 1)
+            off += (1 + hour) * 4
+            _U32.pack_into(m, off, _U32.unpack_from(m, off)[0] + 1)
+
+    # ── Writes ──────────────────────────────────────────
+    def mark_minute(self, day: int, minute: int) -> bool:
+        """Set one minute active. Returns True if it wasn't already."""
+        off = self._offset(day, create=True)
+        byte = off + (minute >> 3)
+        bit = 1 << (minute & 7)
+        m = self._map
+        if m[byte] & bit:
+            return False
+        m[byte] |= bit
+        count = off + MINUTES_OFFSET
+        _MINUTES.pack_into(m, count, _MINUTES.unpack_from(m, count)[0] + 1)
+        self._bump(day - self.base, minute // 60)
+        return True
+
+    def mark_span(self, start: float, end: float) -> int:
+        """Mark every local-time minute overlapping [start, end). Returns newly set minutes."""
+        added = 0
+        t = start
+        while t < end:
+            dt = datetime.fromtimestamp(t)
+            added += self.mark_minute(dt.toordinal(), dt.hour * 60 + dt.minute)
+            t += 60 - dt.second - dt.microsecond / 1_000_000
+        return added
+
+    def set_fired(self, day: int, mask: int):
+        _FIRED.pack_into(self._map, self._offset(day, create=True) + FIRED_OFFSET, mask)
+        self._extend_index(day - self.base)
+
+    # ── Reads (zero-copy) ───────────────────────────────
+    def record(self, day: int) -> memoryview:
+        """The raw 192-byte record for `day`, or an empty view if none is stored."""
+        off = self._offset(day, create=False)
+        if off < 0:
+            return memoryview(b"")
+        return memoryview(self._map)[off:off + RECORD_SIZE]
+
+    def bitmap(self, day: int) -> memoryview:
+        return self.record(day)[:BITMAP_SIZE]
+
+    def minutes(self, day: int) -> int:
+        off = self._offset(day, create=False)
+        return 0 if off < 0 else _MINUTES.unpack_from(self._map, off + MINUTES_OFFSET)[0]
+
+    def fired(self, day: int) -> int:
+        off = self._offset(day, create=False)
+        return 0 if off < 0 else _FIRED.unpack_from(self._map, off + FIRED_OFFSET)[0]
+
+    def is_active(self, day: int, minute: int) -> bool:
+        bits = self.bitmap(day)
+        return bool(bits) and bool(bits[minute >> 3] >> (minute & 7) & 1)
+
+    def days(self) -> range:
+        """Day ordinals from the first to the last one recorded."""
+        return range(self.base, self.base + self._last + 1)
+
+    def records(self, first: int, last: int) -> memoryview:
+        """Raw records for days first..last (clamped to what's recorded)."""
+        lo = max(first - self.base, 0)
+        hi = min(last - self.base, self._last)
+        if self._map is None or hi < lo:
+            return memoryview(b"")
+        return memoryview(self._map)[HEADER_SIZE + lo * RECORD_SIZE:HEADER_SIZE + (hi + 1) * RECORD_SIZE]
+
+    def rollup(self, day: int) -> tuple:
+        """Running totals through `day`: (minutes, minutes in hour 0, …, hour 23)."""
+        index = min(day - self.base, self._last)
+        if index < 0:
+            return (0,) * ROLLUP_FIELDS
+        return _ROW.unpack_from(self._imap, INDEX_HEADER_SIZE + index * ROW_SIZE)
+
+    def rollups(self, first: int, last: int) -> memoryview:
+        """Running-total rows for days first..last as a flat uint32 view (zero-copy)."""
+        lo = max(first - self.base, 0)
+        hi = min(last - self.base, self._last)
+        if hi < lo:
+            return memoryview(b"").cast("I")
+        view = memoryview(self._imap)[INDEX_HEADER_SIZE + lo * ROW_SIZE:INDEX_HEADER_SIZE + (hi + 1) * ROW_SIZE]
+        return view.cast("I")
+
+    def flush(self):
+        if self._map is not None:
+            self._map.flush()
+        if self._imap is not None:
+            self._imap.flush()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._imap is not None:
+            self._imap.close()
+            self._imap = None
+        os.close(self._fd)
+        os.close(self._ifd)
@@ -0,0 +1,292 @@
+"""
+Idle-time sources for philoscreen.
+
+Every source answers one question: how many seconds since the last
+keyboard or mouse input? They all run inside the process, so a probe is
+a function call rather than a fork+exec of `ioreg` and a text parse.
+
+    source = select_idle_source()
+    idle = source.idle_seconds()
+
+Sources:
+    MacIdleSource         CoreGraphics via ctypes (symbol resolved once)
+    EvdevIdleSource       Linux /dev/input event timestamps
+    InterruptsIdleSource  Linux /proc/interrupts deltas for input IRQs
+    IoregIdleSource       the original `ioreg` parse, kept as a fallback
+    FakeIdleSource        deterministic, driven by a virtual clock
+"""
+
+import bisect
+import os
+import struct
+import sys
+import time
+import zlib
+
+
+class IdleSource:
+    """Base class: seconds since the last user input.
+
+    On its own it sees no input and always says 0.0, so every second counts
+    as active. It's what select_idle_source() falls back to.
+    """
+
+    name = "none"
+
+    def idle_seconds(self) -> float:
+        return 0.0
+
+    def close(self):
+        pass
+
+
+# ── macOS ───────────────────────────────────────────────
+# kCGEventSourceStateHIDSystemState — the same counter ioreg exposes as HIDIdleTime
+_CG_HID_SYSTEM_STATE = 1
+_CG_ANY_INPUT_EVENT = 0xFFFFFFFF
+
+_COREGRAPHICS = "/System/Library/Frameworks/CoreGraphics.framework/CoreGraphics"
+
+
+class MacIdleSource(IdleSource):
+    """CGEventSourceSecondsSinceLastEventType, looked up once and cached."""
+
+    name = "macos"
+
+    def __init__(self):
+        import ctypes
+        lib = ctypes.cdll.LoadLibrary(_COREGRAPHICS)
+        fn = lib.CGEventSourceSecondsSinceLastEventType
+        fn.argtypes = [ctypes.c_int32, ctypes.c_uint32]
+        fn.restype = ctypes.c_double
+        self._fn = fn
+
+    def idle_seconds(self) -> float:
+        return self._fn(_CG_HID_SYSTEM_STATE, _CG_ANY_INPUT_EVENT)
+
+
+class IoregIdleSource(IdleSource):
+    """Read macOS HIDIdleTime from ioreg (nanoseconds → seconds). Forks per probe."""
+
+    name = "ioreg"
+
+    def idle_seconds(self) -> float:
+        import subprocess
+        try:
+            output = subprocess.check_output(
+                ["ioreg", "-c", "IOHIDSystem", "-d", "4"],
+                text=True,
+            )
+            for line in output.splitlines():
+                if "HIDIdleTime" in line and "=" in line:
+                    raw = line.split("=")[-1].strip()
+                    return int(raw) / 1_000_000_000
+        except (OSError, subprocess.CalledProcessError, ValueError):
+            pass
+        return 0.0
+
+
+# ── Linux ───────────────────────────────────────────────
+_INPUT_EVENT = struct.Struct("llHHi")   # struct input_event: timeval, type, code, value
+_INPUT_DEVICES = "/proc/bus/input/devices"
+_INPUT_HANDLERS = ("kbd", "mouse")
+
+
+def _input_event_nodes() -> list:
+    """Event device nodes for keyboards and pointers, from /proc/bus/input/devices."""
+    nodes = []
+    try:
+        with open(_INPUT_DEVICES) as f:
+            for line in f:
+                if not line.startswith("H: Handlers="):
+                    continue
+                handlers = line.split("=", 1)[1].split()
+                if not any(h in _INPUT_HANDLERS or h.startswith("mouse") for h in handlers):
+                    continue
+                nodes.extend(f"/dev/input/{h}" for h in handlers if h.startswith("event"))
+    except OSError:
+        pass
+    return nodes
+
+
+class EvdevIdleSource(IdleSource):
+    """Drain input events without blocking and keep the newest kernel timestamp.
+
+    Reads go into one preallocated buffer, and only the timestamp of the last
+    event in each read is unpacked, so a probe allocates next to nothing.
+    Requires read access to /dev/input (the `input` group on most distros).
+    """
+
+    name = "evdev"
+
+    def __init__(self, nodes: list = None, batch: int = 64):
+        self._fds = []
+        for node in nodes if nodes is not None else _input_event_nodes():
+            try:
+                self._fds.append(os.open(node, os.O_RDONLY | os.O_NONBLOCK))
+            except OSError:
+                continue
+        if not self._fds:
+            raise OSError("no readable input event devices")
+        self._buf = bytearray(_INPUT_EVENT.size * batch)
+        self._bufs = [self._buf]
+        # Nothing is known about input before we opened the devices
+        self._last = time.time()
+
+    def idle_seconds(self) -> float:
+        buf, bufs, size = self._buf, self._bufs, _INPUT_EVENT.size
+        last = self._last
+        for fd in self._fds:
+            while True:
+                try:
+                    n = os.readv(fd, bufs)
+                except OSError:     # BlockingIOError when drained; ENODEV on unplug
+                    break
+                if n < size:
+                    break
+                sec, usec = _INPUT_EVENT.unpack_from(buf, n - size)[:2]
+                ts = sec + usec / 1_000_000
+                if ts > last:
+                    last = ts
+                if n < len(buf):
+                    break
+        self._last = last
+        return max(0.0, time.time() - last)
+
+    def close(self):
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = []
+
+
+_PROC_INTERRUPTS = "/proc/interrupts"
+_INPUT_IRQ_NAMES = (b"i8042", b"keyboard", b"kbd", b"mouse", b"touchpad", b"hid")
+
+
+class InterruptsIdleSource(IdleSource):
+    """Watch /proc/interrupts for changes on keyboard/mouse IRQ lines.
+
+    Resolution is one probe: a change means "input since the last probe",
+    which is counted as input now. Only a CRC of the relevant lines is kept
+    between probes, computed straight off a reused buffer.
+
+    Only lines named after an input device count. A USB keyboard or mouse
+    raises the xhci controller's IRQ, which it shares with every other USB
+    device (disks, webcams, network adapters), so that line can't be told
+    apart from background traffic and is left out: on a machine with only
+    USB input this source never sees any. Use evdev there (read access to
+    /dev/input, usually the `input` group).
+    """
+
+    name = "interrupts"
+
+    def __init__(self, path: str = _PROC_INTERRUPTS, bufsize: int = 1 << 16):
+        self._fd = os.open(path, os.O_RDONLY)
+        self._buf = bytearray(bufsize)
+        self._bufs = [self._buf]
+        self._view = memoryview(self._buf)
+        self._labels = self._find_input_irqs()
+        if not self._labels:
+            os.close(self._fd)
+            raise OSError("no keyboard/mouse interrupt lines")
+        self._crc = self._signature()
+        self._last = time.monotonic()
+
+    def _read(self) -> int:
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        return os.readv(self._fd, self._bufs)
+
+    def _find_input_irqs(self) -> list:
+        n = self._read()
+        labels = []
+        for line in bytes(self._buf[:n]).splitlines()[1:]:
+            head, _, rest = line.partition(b":")
+            if any(name in rest.lower() for name in _INPUT_IRQ_NAMES):
+                labels.append(b"\n" + head + b":")
+        return labels
+
+    def _signature(self) -> int:
+        n = self._read()
+        buf, view, crc = self._buf, self._view, 0
+        for label in self._labels:
+            start = buf.find(label, 0, n)
+            if start < 0:
+                continue
+            end = buf.find(b"\n", start + 1, n)
+            crc = zlib.crc32(view[start:end if end >= 0 else n], crc)
+        return crc
+
+    def idle_seconds(self) -> float:
+        now = time.monotonic()
+        crc = self._signature()
+        if crc != self._crc:
+            self._crc = crc
+            self._last = now
+        return now - self._last
+
+    def close(self):
+        os.close(self._fd)
+
+
+# ── Deterministic fake ─────────────────────────────────
+class FakeIdleSource(IdleSource):
+    """Idle time derived from scripted activity spans on a virtual clock.
+
+    `spans` is a list of (start, end) times during which the user is
+    continuously giving input; outside them, idle grows from the end of the
+    previous span (or from `origin`). `clock` is any zero-argument callable
+    returning the current virtual time.
+    """
+
+    name = "fake"
+
+    def __init__(self, clock, spans: list = (), origin: float = 0.0):
+        self._clock = clock
+        spans = sorted(spans)
+        self._starts = [s for s, _ in spans]
+        self._ends = [e for _, e in spans]
+        self._origin = origin
+
+    def idle_seconds(self) -> float:
+        now = self._clock()
+        i = bisect.bisect_right(self._starts, now) - 1
+        if i < 0:
+            return max(0.0, now - self._origin)
+        if now <= self._ends[i]:
+            return 0.0
+        return now - self._ends[i]
+
+
+# ── Selection ───────────────────────────────────────────
+def select_idle_source() -> IdleSource:
+    """Pick the cheapest source that works on this machine.
+
+    With none working, the base IdleSource (name "none") comes back; check
+    for it and warn, since it makes every second active.
+    """
+    if sys.platform == "darwin":
+        candidates = (MacIdleSource, IoregIdleSource)
+    elif sys.platform.startswith("linux"):
+        candidates = (EvdevIdleSource, InterruptsIdleSource)
+    else:
+        candidates = ()
+    for cls in candidates:
+        try:
+            return cls()
+        except (OSError, AttributeError):
+            continue
+    return IdleSource()
+
+
+def probe_cost(source: IdleSource, probes: int = 200) -> float:
+    """Average wall time of one probe, in microseconds."""
+    source.idle_seconds()   # warm up
+    start = time.perf_counter()
+    for _ in range(probes):
+        source.idle_seconds()
+    return (time.perf_counter() - start) / probes * 1_000_000
+
+
+if __name__ == "__main__":
+    src = select_idle_source()
+    print(f"{src.name}: idle {src.idle_seconds():.1f}s, {probe_cost(src):.1f}µs/probe")
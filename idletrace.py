@@ -0,0 +1,402 @@
+"""
+Idle traces: record real usage once, replay it through the daemon's logic
+as fast as the CPU allows.
+
+    python3 screen_shame.py trace record ~/traces/me.trace [--every 5]
+    python3 screen_shame.py trace simulate DIR [--thresholds 2,4,6] [--idle-threshold 180,300,600]
+    python3 screen_shame.py trace synth DIR [--people 50 --days 365]
+
+Recording samples get_idle_seconds() and appends to a compact file:
+
+    "PHSTRC01"  origin (float64, unix seconds)
+    zlib stream: varint(dt)  varint(zigzag(idle - (previous idle + dt)))  ...
+    [further zlib streams, one per recording session]
+
+Times are in UNIT steps (100ms). Each record is a delta from the one
+before it, and the second number is how far idle strayed from "no input
+since last time". That number is zero while you're away, and such
+samples are skipped outright, so an idle night costs nothing. An active
+sample is two bytes before zlib, about one after. The stream is
+sync-flushed every FLUSH_EVERY samples, so a crash loses at most the
+unflushed tail, and the reader stops cleanly at a truncated one.
+
+Replay never looks at idle values directly. A trace is a sorted array of
+last-input instants, and TraceIdleSource answers idle_seconds() for any
+virtual time from it. Simulation drives tick() and next_wakeup() with a
+FakeClock, which is exactly what run() does with the real clock, so the
+only wakeups are the ones the daemon itself would take. `simulate`
+spreads a directory of traces over a process pool and reports how often
+each tier fires and when, once per idle threshold.
+"""
+
+import argparse
+import bisect
+import os
+import random
+import struct
+import time
+import zlib
+from array import array
+from datetime import date, datetime
+
+from idle import IdleSource
+from messages import THRESHOLDS
+from scheduler import FakeClock, next_wakeup
+from common import (
+    BOLD, CYAN, DIM, IDLE_THRESHOLD, POLL_INTERVAL, RESET, TIER_COLORS, WHITE,
+    format_time, log,
+)
+from screen_shame import get_idle_seconds, new_state, tick
+
+try:
+    import numpy as np
+except ImportError:     # optional: everything below has a pure-Python path
+    np = None
+
+MAGIC = b"PHSTRC01"
+_HEADER = struct.Struct("<8sd")
+RECORD_EVERY = 5.0          # seconds between samples while recording
+FLUSH_EVERY = 60            # written samples per sync flush
+UNIT = 0.1                  # seconds per stored time step
+SKIP_TOLERANCE = 10         # units: a smaller residual is sampling jitter, not input
+
+
+# ── Encoding ────────────────────────────────────────────
+def _varint(out: bytearray, n: int):
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _zigzag(n: int) -> int:
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+class TraceWriter:
+    """Appends (time, idle) samples to a trace file, one zlib stream per session."""
+
+    def __init__(self, path: str, flush_every: int = FLUSH_EVERY, origin: float = None):
+        self.path = os.path.expanduser(path)
+        self.flush_every = flush_every
+        self._f = open(self.path, "ab")
+        if self._f.tell() == 0:
+            self.origin = time.time() if origin is None else origin
+            self._f.write(_HEADER.pack(MAGIC, self.origin))
+        else:
+            with open(self.path, "rb") as f:
+                magic, self.origin = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a trace file")
+        self._z = zlib.compressobj(9)
+        self._buf = bytearray()
+        self._pending = 0
+        self._t = self._idle = 0        # last written sample, units since origin
+        self._skipped = None            # last sample not written, if any
+        self.samples = self.written = 0
+
+    def sample(self, t: float, idle: float):
+        """Record that idle was `idle` seconds at wall time `t`."""
+        self.samples += 1
+        t_u = round((t - self.origin) / UNIT)
+        idle_u = round(idle / UNIT)
+        residual = idle_u - (self._idle + t_u - self._t)
+        if self.written and -SKIP_TOLERANCE < residual < SKIP_TOLERANCE:
+            self._skipped = (t_u, idle_u)       # no input since the last one written
+            return
+        self._write(t_u, idle_u)
+
+    def _write(self, t_u: int, idle_u: int):
+        t_u = max(t_u, self._t)
+        _varint(self._buf, t_u - self._t)
+        _varint(self._buf, _zigzag(idle_u - (self._idle + t_u - self._t)))
+        self._t, self._idle = t_u, idle_u
+        self._skipped = None
+        self.written += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self._f.write(self._z.compress(bytes(self._buf)) + self._z.flush(zlib.Z_SYNC_FLUSH))
+        self._f.flush()
+        self._buf.clear()
+        self._pending = 0
+
+    def close(self):
+        # The last sample always goes in: it's where the trace ends
+        if self._skipped is not None:
+            self._write(*self._skipped)
+        self._f.write(self._z.compress(bytes(self._buf)) + self._z.flush())
+        self._f.close()
+
+
+# ── Decoding ────────────────────────────────────────────
+def _streams(data: bytes) -> list:
+    """Decompressed bytes of each session; a truncated tail yields what's intact."""
+    out = []
+    while data:
+        z = zlib.decompressobj()
+        try:
+            raw = z.decompress(data)
+        except zlib.error:
+            break
+        out.append(raw)
+        data = z.unused_data
+    return out
+
+
+def _decode(raw: bytes):
+    """(dt, residual) columns of one stream, in units. Drops a half-written record."""
+    if np is not None:
+        b = np.frombuffer(raw, dtype=np.uint8)
+        ends = np.flatnonzero(b < 0x80)
+        ends = ends[:len(ends) // 2 * 2]
+        if not len(ends):
+            return np.zeros(0, np.int64), np.zeros(0, np.int64)
+        b = b[:ends[-1] + 1]
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        # Each byte's 7 bits shifted by its place in its varint, then summed per varint
+        place = np.arange(len(b)) - np.repeat(starts, ends - starts + 1)
+        values = np.add.reduceat((b & 0x7F).astype(np.int64) << (7 * place), starts)
+        dt, zz = values[0::2], values[1::2]
+        return dt, (zz >> 1) ^ -(zz & 1)
+    values = array("q")
+    value = shift = 0
+    for byte in raw:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    del values[len(values) // 2 * 2:]
+    return values[0::2], array("q", ((z >> 1) ^ -(z & 1) for z in values[1::2]))
+
+
+def read_trace(path: str) -> tuple:
+    """(last-input instants, first sample, last sample) in unix seconds.
+
+    Idle at sample j is t_j - L_j, so with idle_j = idle_{j-1} + dt_j + r_j
+    the input instants are just L = -cumsum(r) from the start of each stream.
+    """
+    with open(os.path.expanduser(path), "rb") as f:
+        data = f.read()
+    magic, origin = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a trace file")
+    inputs, first, last = [], None, None
+    for raw in _streams(data[_HEADER.size:]):
+        dt, r = _decode(raw)
+        if not len(dt):
+            continue
+        if np is not None:
+            t = np.cumsum(dt)
+            inputs.append(-np.cumsum(r))
+            t0, t1 = int(t[0]), int(t[-1])
+        else:
+            acc, col = 0, array("q")
+            for x in r:
+                acc -= x
+                col.append(acc)
+            inputs.append(col)
+            t0, t1 = dt[0], sum(dt)
+        first = t0 if first is None else min(first, t0)
+        last = t1 if last is None else max(last, t1)
+    if first is None:
+        return array("d"), origin, origin
+    if np is not None:
+        # Running max: rounding can nudge an instant back past the previous one
+        instants = np.maximum.accumulate(np.concatenate(inputs)) * UNIT + origin
+        return array("d", instants.tolist()), origin + first * UNIT, origin + last * UNIT
+    instants, top = array("d"), None
+    for col in inputs:
+        for x in col:
+            top = x if top is None or x > top else top
+            instants.append(top * UNIT + origin)
+    return instants, origin + first * UNIT, origin + last * UNIT
+
+
+class TraceIdleSource(IdleSource):
+    """Idle time on a virtual clock from a trace's last-input instants.
+
+    Idle is measured from the latest recorded input at or before now.
+    Time only moves forward, so each call searches only past the last one.
+    """
+
+    name = "trace"
+
+    def __init__(self, clock, instants):
+        self._clock = clock
+        self._instants = instants
+        self._k = -1
+
+    def idle_seconds(self) -> float:
+        now = self._clock()
+        instants, k = self._instants, self._k
+        if k + 1 < len(instants) and instants[k + 1] <= now:
+            k = self._k = bisect.bisect_right(instants, now, k + 1) - 1
+        return now - instants[k] if k >= 0 else 0.0
+
+
+# ── Simulation ──────────────────────────────────────────
+def simulate(instants, start: float, end: float, thresholds: list = THRESHOLDS,
+             idle_threshold: float = IDLE_THRESHOLD, poll_interval: float = POLL_INTERVAL) -> dict:
+    """Replay one trace through tick() and next_wakeup(), as run() would.
+
+    Returns active seconds per day, every fire as (day, tier, wall time),
+    and the number of wakeups taken.
+    """
+    clock = FakeClock(start)
+    source = TraceIdleSource(clock.time, instants)
+    state = new_state(str(date.fromtimestamp(start)))
+    days, fires = {}, []
+    last, was_idle, slept = start, False, 0.0
+    while clock.now < end:
+        now = clock.time()
+        idle = source.idle_seconds()
+        prev = state
+        state, _, due = tick(state, now, now - last, idle, was_idle, thresholds, idle_threshold)
+        if state is not prev:
+            days[prev.date] = prev.active_seconds
+        for t in due:
+            fires.append((state.date, t, now))
+        was_idle = idle >= idle_threshold
+        last = now
+        slept = next_wakeup(now, idle, state.active_seconds, state.fired_tiers,
+                            thresholds, idle_threshold, poll_interval, slept)
+        clock.sleep(slept)
+    days[state.date] = state.active_seconds
+    return {"days": days, "fires": fires, "wakeups": clock.wakeups}
+
+
+def simulate_file(path: str, thresholds: list, idle_thresholds: list) -> tuple:
+    """One trace at every idle threshold: (simulated seconds, {threshold: result})."""
+    instants, start, end = read_trace(path)
+    return end - start, {i: simulate(instants, start, end, thresholds, i) for i in idle_thresholds}
+
+
+def simulate_dir(trace_dir: str, thresholds: list, idle_thresholds: list, workers: int) -> list:
+    paths = sorted(e.path for e in os.scandir(trace_dir) if e.name.endswith(".trace"))
+    args = ([thresholds] * len(paths), [idle_thresholds] * len(paths))
+    if workers <= 1 or len(paths) < 2:
+        return list(map(simulate_file, paths, *args))
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(simulate_file, paths, *args, chunksize=max(1, len(paths) // (workers * 4))))
+
+
+def summarize(results: list, thresholds: list, idle_threshold: float) -> list:
+    """Report lines for one idle threshold across every trace."""
+    days, fires = [], {t: [] for t in thresholds}
+    for _, by_threshold in results:
+        r = by_threshold[idle_threshold]
+        days.extend(a for a in r["days"].values() if a)
+        for _, t, when in r["fires"]:
+            moment = datetime.fromtimestamp(when)
+            fires[t].append(moment.hour * 60 + moment.minute)
+    lines = [f"  {BOLD}idle threshold {idle_threshold:g}s{RESET}  {DIM}{len(results)} people, "
+             f"{len(days):,} active days{RESET}"]
+    if not days:
+        return lines
+    days.sort()
+    mid, p90 = days[len(days) // 2], days[int(len(days) * 0.9)]
+    lines.append(f"    {DIM}active{RESET} {format_time(int(sum(days) / len(days) // 60))} / day  "
+                 f"{DIM}median{RESET} {format_time(int(mid // 60))}  {DIM}p90{RESET} {format_time(int(p90 // 60))}")
+    for t in thresholds:
+        times = sorted(fires[t])
+        when = f"{times[len(times) // 2] // 60:02d}:{times[len(times) // 2] % 60:02d}" if times else "--:--"
+        lines.append(f"    {TIER_COLORS.get(t, WHITE)}{t:>3}h{RESET}  fires on {len(times) / len(days):4.0%} of days"
+                     f"  {DIM}median at{RESET} {when}")
+    return lines
+
+
+# ── Recording ───────────────────────────────────────────
+def record(path: str, every: float = RECORD_EVERY):
+    """Sample idle time until interrupted."""
+    writer = TraceWriter(path)
+    log(f"Recording idle time to {writer.path} every {every:g}s — Ctrl-C to stop", CYAN)
+    try:
+        while True:
+            writer.sample(time.time(), get_idle_seconds())
+            time.sleep(every)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+    log(f"{writer.samples:,} samples, {writer.written:,} written, {os.path.getsize(writer.path):,} bytes", CYAN)
+
+
+def synth(trace_dir: str, people: int, days: int, every: float = RECORD_EVERY, seed: int = 7):
+    """Plausible traces to try the simulator on: workdays of sessions and breaks."""
+    os.makedirs(trace_dir, exist_ok=True)
+    rng = random.Random(seed)
+    midnight = datetime.combine(date.today(), datetime.min.time()).timestamp() - days * 86400
+    for p in range(people):
+        path = os.path.join(trace_dir, f"person{p:04d}.trace")
+        if os.path.exists(path):
+            os.remove(path)
+        writer = TraceWriter(path, origin=midnight)
+        hours = rng.uniform(2, 11)      # how much this person uses their computer
+        last_input = midnight
+        for d in range(days):
+            day = midnight + d * 86400
+            t = day + rng.gauss(9, 1) * 3600
+            budget = max(rng.gauss(hours, 1.5), 0.5) * 3600
+            while budget > 0:
+                session = min(rng.expovariate(1 / 2400), budget)
+                stop = t + session
+                while t < stop:
+                    if rng.random() < 0.97:     # typing, scrolling, reading
+                        last_input = t - rng.uniform(0, 3)
+                    writer.sample(t, t - last_input)
+                    t += every
+                budget -= session
+                t += rng.expovariate(1 / 900)   # a break
+        writer.close()
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(prog="screen_shame.py trace", description="Record and replay idle traces")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("record", help="sample idle time into a trace file until Ctrl-C")
+    p.add_argument("path")
+    p.add_argument("--every", type=float, default=RECORD_EVERY, help="seconds between samples (default: 5)")
+    p = sub.add_parser("simulate", help="replay a directory of traces and report tier fire rates")
+    p.add_argument("dir")
+    p.add_argument("--thresholds", default=",".join(map(str, THRESHOLDS)), help="tiers in hours, comma-separated")
+    p.add_argument("--idle-threshold", default=str(IDLE_THRESHOLD), help="seconds, comma-separated to compare several")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes (default: one per core)")
+    p = sub.add_parser("synth", help="write synthetic traces to a directory")
+    p.add_argument("dir")
+    p.add_argument("--people", type=int, default=20)
+    p.add_argument("--days", type=int, default=90)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(args.path, args.every)
+    elif args.command == "synth":
+        t = time.perf_counter()
+        synth(args.dir, args.people, args.days)
+        size = sum(e.stat().st_size for e in os.scandir(args.dir) if e.name.endswith(".trace"))
+        log(f"{args.people} traces × {args.days} days in {time.perf_counter() - t:.1f}s, {size:,} bytes", CYAN)
+    else:
+        thresholds = sorted(int(x) for x in args.thresholds.split(","))
+        idle_thresholds = [float(x) for x in args.idle_threshold.split(",")]
+        t = time.perf_counter()
+        results = simulate_dir(args.dir, thresholds, idle_thresholds, args.workers)
+        elapsed = time.perf_counter() - t
+        if not results:
+            parser.error(f"no .trace files in {args.dir}")
+        simulated = sum(s for s, _ in results) * len(idle_thresholds)
+        wakeups = sum(r["wakeups"] for _, by in results for r in by.values())
+        print()
+        for i in idle_thresholds:
+            print("\n".join(summarize(results, thresholds, i)))
+        print(f"\n  {DIM}{simulated / 86400:,.0f} simulated days in {elapsed:.2f}s with {args.workers} workers: "
+              f"{simulated / elapsed:,.0f} simulated seconds/s, {wakeups / elapsed:,.0f} wakeups/s{RESET}\n")
+
+
+if __name__ == "__main__":
+    main()
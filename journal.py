@@ -0,0 +1,193 @@
+"""
+Append-only state journal for philoscreen.
+
+Each tick appends one fixed-size record instead of truncating and
+rewriting a JSON file:
+
+    seq u32 | day ordinal u32 | active seconds f64 | fired-tier bitmask u32 | crc32 u32
+
+Records reach the kernel with a single write() per tick, so a kill -9
+loses nothing that was written; fsync runs every FSYNC_EVERY records to
+bound what a power cut can take. Every COMPACT_EVERY records the latest
+state is written to a snapshot (atomically, via rename) and the journal
+starts over. On recovery a torn or corrupt tail record fails its CRC and
+is cut off; everything before it stands.
+"""
+
+import os
+import struct
+import zlib
+
+RECORD = struct.Struct("<IIdI")
+CRC = struct.Struct("<I")
+RECORD_SIZE = RECORD.size + CRC.size
+
+FSYNC_EVERY = 16        # records between fsyncs
+COMPACT_EVERY = 1024    # records between snapshots
+
+
+def pack(seq: int, day: int, active: float, fired: int) -> bytes:
+    body = RECORD.pack(seq, day, active, fired)
+    return body + CRC.pack(zlib.crc32(body))
+
+
+def unpack(buf, offset: int = 0):
+    """(seq, day, active, fired) for an intact record, else None."""
+    if len(buf) - offset < RECORD_SIZE:
+        return None
+    end = offset + RECORD.size
+    (crc,) = CRC.unpack_from(buf, end)
+    if zlib.crc32(buf[offset:end]) != crc:
+        return None
+    return RECORD.unpack_from(buf, offset)
+
+
+def fired_mask(fired: list, thresholds: list) -> int:
+    """Fired tiers as a bitmask over THRESHOLDS positions."""
+    mask = 0
+    for i, t in enumerate(thresholds):
+        if t in fired:
+            mask |= 1 << i
+    return mask
+
+
+def fired_list(mask: int, thresholds: list) -> list:
+    return [t for i, t in enumerate(thresholds) if mask >> i & 1]
+
+
+def latest(journal_path: str, snapshot_path: str):
+    """Newest intact (seq, day, active, fired) without touching the files, or None."""
+    best = None
+    try:
+        with open(snapshot_path, "rb") as f:
+            best = unpack(f.read(RECORD_SIZE))
+    except OSError:
+        pass
+    try:
+        with open(journal_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return best
+    for offset in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+        rec = unpack(data, offset)
+        if rec is None:
+            break
+        if best is None or rec[0] > best[0]:
+            best = rec
+    return best
+
+
+class StateJournal:
+    """Write-ahead journal plus snapshot for one day's counters."""
+
+    def __init__(self, journal_path: str, snapshot_path: str,
+                 fsync_every: int = FSYNC_EVERY, compact_every: int = COMPACT_EVERY):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.fsync_every = fsync_every
+        self.compact_every = compact_every
+        self.bytes_written = 0
+        self._fd = None
+        self._seq = 0
+        self._records = 0       # in the journal since the last compaction
+        self._unsynced = 0
+        self._last = None
+
+    def recover(self):
+        """Latest intact (day, active, fired) or None. Drops a torn tail."""
+        latest = None
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                latest = unpack(f.read(RECORD_SIZE))
+        except OSError:
+            pass
+
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = b""
+        good = 0
+        count = 0
+        view = memoryview(data)
+        while True:
+            rec = unpack(view, good)
+            if rec is None:
+                break
+            good += RECORD_SIZE
+            count += 1
+            # Records older than the snapshot survived a crash mid-compaction
+            if latest is None or rec[0] > latest[0]:
+                latest = rec
+        view.release()
+        if good < len(data):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+
+        self._records = count
+        if latest is None:
+            return None
+        self._seq = latest[0]
+        self._last = latest
+        return latest[1:]
+
+    def _open(self):
+        if self._fd is None:
+            self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+    def append(self, day: int, active: float, fired: int):
+        """Record the current counters: one write() of RECORD_SIZE bytes."""
+        self._open()
+        self._seq += 1
+        self._last = (self._seq, day, active, fired)
+        os.write(self._fd, pack(*self._last))
+        self.bytes_written += RECORD_SIZE
+        self._records += 1
+        self._unsynced += 1
+        if self._records >= self.compact_every:
+            self.compact()
+        elif self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        if self._fd is not None and self._unsynced:
+            os.fsync(self._fd)
+            self._unsynced = 0
+
+    def compact(self):
+        """Fold the journal into the snapshot and start it over."""
+        if self._last is None:
+            return
+        tmp = self.snapshot_path + ".tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.write(fd, pack(*self._last))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, self.snapshot_path)
+        _fsync_dir(self.snapshot_path)
+        self.bytes_written += RECORD_SIZE
+        self._open()
+        os.ftruncate(self._fd, 0)
+        self._records = 0
+        self._unsynced = 0
+
+    def close(self):
+        if self._fd is not None:
+            self.sync()
+            os.close(self._fd)
+            self._fd = None
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -57,5 +57,15 @@ TIERS = {
     ],
 }
 
+# Tacked onto the alert when it's known which app got most of the day;
+# {app} and {time} are filled in
+CULPRITS = [
+    "Most of it was {app}. {time} of {app}. I'm not judging. I'm counting.",
+    "Top offender today: {app}, with {time}. Take a bow. Then close it.",
+    "For the record, {app} got {time} of your one precious life today.",
+    "{time} of that was {app}. You and {app} should see other people.",
+    "{app} has had you for {time}. Blink if it's holding you hostage.",
+]
+
 # Thresholds in order for the tracker to iterate through
 THRESHOLDS = sorted(TIERS.keys())
@@ -0,0 +1,203 @@
+"""
+OpenMetrics endpoint for a long-running philoscreen.
+
+    python3 screen_shame.py --metrics-port 9464
+    curl -s localhost:9464/metrics
+
+The tick loop records three timings per tick: the idle probe, the state
+save and the whole tick. Each is a bisect and two adds into a fixed
+bucket histogram, with nothing allocated and no lock taken. Slack
+delivery latency comes from the outbox's delivery callback on its own
+thread. Everything else is read only when someone scrapes: the current
+counters, the per-sink and delivery totals, and the time until the next
+tier.
+
+The endpoint is a small HTTP server on its own daemon thread, bound to
+localhost. A scrape never touches the tick loop. Each histogram has a
+single writer, and a scrape copies it under the GIL, so at worst a
+sample lands one scrape late.
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from messages import THRESHOLDS
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+PROBE_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 1e-3, 1e-2)
+TICK_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 5e-3, 2.5e-2)
+SAVE_BUCKETS = (2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 1e-3, 1e-2, 0.1)
+SEND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class Histogram:
+    """Fixed buckets, non-cumulative counts; cumulated when rendered."""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)     # last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str) -> list:
+        counts, total = list(self.counts), self.sum
+        out, running = [], 0
+        for bound, n in zip(self.bounds + (float("inf"),), counts):
+            running += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            out.append(f'{name}_bucket{{le="{le}"}} {running}')
+        out.append(f"{name}_count {running}")
+        out.append(f"{name}_sum {total!r}")
+        return out
+
+
+class Metrics:
+    """Everything the endpoint reports. The tick loop calls observe_tick()."""
+
+    def __init__(self, thresholds: list = THRESHOLDS):
+        self.thresholds = thresholds
+        self.probe = Histogram(PROBE_BUCKETS)
+        self.tick = Histogram(TICK_BUCKETS)
+        self.save = Histogram(SAVE_BUCKETS)
+        self.slack = Histogram(SEND_BUCKETS)
+        self.slack_sent = 0
+        self.slack_failed = 0
+        self.ticks = 0
+        self.state = None
+        self.idle = 0.0
+        self.notifier = None
+        self.started = time.time()
+
+    def observe_tick(self, probe: float, save: float, total: float, state, idle: float):
+        self.probe.observe(probe)
+        self.save.observe(save)
+        self.tick.observe(total)
+        self.ticks += 1
+        self.state = state
+        self.idle = idle
+
+    def slack_results(self, then=None):
+        """A SlackSink on_result callback that records latency, then calls `then`."""
+        def on_result(entries: list, ok: bool, error: str):
+            if ok:
+                now = time.time()
+                for e in entries:
+                    self.slack.observe(now - e.created)
+                self.slack_sent += len(entries)
+            else:
+                self.slack_failed += len(entries)
+            if then is not None:
+                then(entries, ok, error)
+        return on_result
+
+    def render(self) -> str:
+        out = []
+
+        def family(name: str, kind: str, text: str, samples: list):
+            out.append(f"# TYPE {name} {kind}")
+            out.append(f"# HELP {name} {text}")
+            out.extend(samples)
+
+        family("philoscreen_idle_probe_seconds", "histogram", "Time to read the idle source.",
+               self.probe.lines("philoscreen_idle_probe_seconds"))
+        family("philoscreen_tick_seconds", "histogram", "Time spent in one tick, excluding the sleep.",
+               self.tick.lines("philoscreen_tick_seconds"))
+        family("philoscreen_state_save_seconds", "histogram", "Time to journal the state.",
+               self.save.lines("philoscreen_state_save_seconds"))
+        family("philoscreen_slack_send_seconds", "histogram", "Alert created to Slack accepting it.",
+               self.slack.lines("philoscreen_slack_send_seconds"))
+        family("philoscreen_ticks", "counter", "Ticks since start.", [f"philoscreen_ticks_total {self.ticks}"])
+        family("philoscreen_slack_alerts", "counter", "Slack alerts delivered or given up on.", [
+            f'philoscreen_slack_alerts_total{{result="sent"}} {self.slack_sent}',
+            f'philoscreen_slack_alerts_total{{result="failed"}} {self.slack_failed}',
+        ])
+
+        notifier = self.notifier
+        if notifier is not None:
+            sent, failed, late, retried, throttled = [], [], [], [], []
+            for sink, s in list(notifier.stats.items()):
+                label = f'{{sink="{sink.name}"}}'
+                sent.append(f"philoscreen_sink_alerts_total{label} {s.sent}")
+                failed.append(f"philoscreen_sink_failures_total{label} {s.failed}")
+                late.append(f"philoscreen_sink_late_total{label} {s.late}")
+                delivery = getattr(sink, "delivery", None)
+                if delivery is not None:
+                    retried.append(f"philoscreen_sink_retries_total{label} {delivery.retried}")
+                    throttled.append(f"philoscreen_sink_throttled_total{label} {delivery.throttled}")
+            family("philoscreen_sink_alerts", "counter", "Alerts each sink accepted.", sent)
+            family("philoscreen_sink_failures", "counter", "Alerts each sink failed to take.", failed)
+            family("philoscreen_sink_late", "counter", "Sends that took longer than the sink's timeout.", late)
+            if retried:
+                family("philoscreen_sink_retries", "counter", "Posts retried after a failure.", retried)
+                family("philoscreen_sink_throttled", "counter", "429 answers received.", throttled)
+
+        state = self.state
+        if state is not None:
+            active = state.active_seconds
+            fired = state.fired_tiers
+            nxt = next((t for t in self.thresholds if t not in fired), None)
+            family("philoscreen_active_seconds", "gauge", "Active time today.", [f"philoscreen_active_seconds {active!r}"])
+            family("philoscreen_idle_seconds", "gauge", "Idle time at the last tick.", [f"philoscreen_idle_seconds {self.idle!r}"])
+            family("philoscreen_fired_tiers", "gauge", "Tiers fired today.", [f"philoscreen_fired_tiers {len(fired)}"])
+            if nxt is not None:
+                family("philoscreen_next_tier_hours", "gauge", "The next tier to fire.", [f"philoscreen_next_tier_hours {nxt}"])
+                family("philoscreen_next_tier_remaining_seconds", "gauge", "Active time left until the next tier.",
+                       [f"philoscreen_next_tier_remaining_seconds {max(nxt * 3600 - active, 0.0)!r}"])
+        family("philoscreen_start_time_seconds", "gauge", "When the daemon started.",
+               [f"philoscreen_start_time_seconds {self.started!r}"])
+        out.append("# EOF")
+        return "\n".join(out) + "\n"
+
+
+def serve_metrics(metrics: Metrics, port: int, host: str = "127.0.0.1") -> HTTPServer:
+    """Serve /metrics from a daemon thread. Stop it with server.shutdown()."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="philoscreen-metrics", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    from urllib.request import urlopen
+
+    from screen_shame import State
+
+    m = Metrics()
+    state = State("2026-01-05", 5000.0, [2])
+    n = 200_000
+    t = time.perf_counter()
+    for i in range(n):
+        m.observe_tick(3e-6, 1.2e-5, 6e-5, state, 4.0)
+    per_tick = (time.perf_counter() - t) / n
+    server = serve_metrics(m, 0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    t = time.perf_counter()
+    with urlopen(url) as r:
+        body = r.read().decode()
+    scrape = time.perf_counter() - t
+    server.shutdown()
+    print(body[:body.index("philoscreen_tick_seconds_bucket")], "...")
+    print(f"observe_tick(): {per_tick * 1e6:.2f}µs per tick; scrape {scrape * 1e3:.1f}ms, {len(body)} bytes")
@@ -0,0 +1,455 @@
+"""
+Message packs: the alert text from files, read a message at a time.
+
+    PHILOSCREEN_MESSAGES=team python3 screen_shame.py
+    python3 screen_shame.py --messages ~/our-pack.txt
+
+A pack is a UTF-8 text file, one message per line, in sections:
+
+    # comments and blank lines are skipped
+    [2]
+    {hours} hours. Day {streak} of this, if anyone's counting. I am.
+    [4]
+    ...
+    [culprits]
+    {app} had you for {time}.
+
+Tier sections may use {hours} and {streak} (days in a row this tier has
+been reached, today included); [culprits] lines are tacked onto an alert
+that knows the day's top app and may use {app} and {time}. Anything else
+in braces is an error, reported with its line number when the pack is
+indexed. A tier missing from the pack falls back to messages.py.
+
+Next to the pack goes PACK.idx, rebuilt whenever the pack's size or
+mtime changes:
+
+    header      "PSMI", u16 version, u16 sections, u64 pack size, u64 mtime_ns
+    sections    16-byte name, u32 count, u32 idx offset of its spans
+    spans       u32 start, u32 end: each message's bytes in the pack
+
+Picking a message is two pread()s, eight bytes from the index and one
+line from the pack, so a pack can hold any number of messages and none
+of them are in memory until they're picked. Each line is compiled into
+a Template the first time it's picked and kept with the pack after that.
+
+Rotation doesn't repeat: each section is walked in a shuffled order,
+message (a * cursor + b) mod n with gcd(a, n) = 1, and reshuffled with a
+fresh a and b once all n have been used. That's O(1) per pick and four
+numbers of state per section (sections of up to SMALL_SECTION messages
+keep the whole shuffled order instead), kept in a small text file, one
+"a b cursor n section" line each, so it survives
+restarts and the --tick and --send processes that pick one message and
+exit. The file is rewritten (to a temporary file, then renamed) after
+every pick, so a crash never replays messages already sent. Bulk callers
+(the team server, evaluate) open their bank with save_each=False and
+flush() once per batch of picks instead.
+"""
+
+import os
+import random
+import struct
+from math import gcd
+
+CULPRIT_SECTION = "culprits"
+TIER_FIELDS = frozenset(("hours", "streak"))
+CULPRIT_FIELDS = frozenset(("app", "time"))
+
+SMALL_SECTION = 64          # sections up to this size keep their whole shuffled order
+
+_MAGIC = b"PSMI"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHQQ")
+_SECTION = struct.Struct("<16sII")
+_SPAN = struct.Struct("<II")
+
+
+# ── Templates ───────────────────────────────────────────
+class Template:
+    """A message with its placeholders split out once, so rendering is a join."""
+
+    __slots__ = ("text", "parts", "fields", "plain")
+
+    def __init__(self, text: str, allowed: frozenset = TIER_FIELDS | CULPRIT_FIELDS):
+        self.text = text
+        parts = _parse(text)
+        for _, name, _ in parts:
+            if name is not None and name not in allowed:
+                raise ValueError(f"unknown placeholder {{{name}}} (allowed: "
+                                 f"{', '.join('{' + f + '}' for f in sorted(allowed))})")
+        self.parts = tuple(parts)
+        self.fields = frozenset(name for _, name, _ in parts if name)
+        self.plain = None if self.fields else "".join(literal for literal, _, _ in parts)
+
+    def render(self, values: dict) -> str:
+        if self.plain is not None:
+            return self.plain
+        return "".join(literal + (format(values[name], spec) if name else "") for literal, name, spec in self.parts)
+
+
+def _parse(text: str) -> list:
+    """[(literal, field name or None, format spec)], with {{ and }} for literal braces."""
+    parts, literal, i = [], "", 0
+    while True:
+        j = min((k for k in (text.find("{", i), text.find("}", i)) if k >= 0), default=-1)
+        if j < 0:
+            literal += text[i:]
+            break
+        literal += text[i:j]
+        c = text[j]
+        if text[j + 1:j + 2] == c:
+            literal += c
+            i = j + 2
+        elif c == "}":
+            raise ValueError("single '}' (write }} for a brace)")
+        else:
+            end = text.find("}", j)
+            if end < 0:
+                raise ValueError("unmatched '{'")
+            name, _, spec = text[j + 1:end].partition(":")
+            parts.append((literal, name.strip(), spec))
+            literal, i = "", end + 1
+    if literal or not parts:
+        parts.append((literal, None, ""))
+    return parts
+
+
+# ── Packs ───────────────────────────────────────────────
+class BuiltinPack:
+    """messages.py as a pack: what's used when there's no file, or a tier is missing from it."""
+
+    name = "builtin"
+
+    def __init__(self):
+        from messages import CULPRITS, TIERS
+        # A few dozen lines: compiled up front, once per load
+        self._sections = {str(t): [Template(m) for m in msgs] for t, msgs in TIERS.items()}
+        self._sections[CULPRIT_SECTION] = [Template(m) for m in CULPRITS]
+
+    def count(self, section: str) -> int:
+        return len(self._sections.get(section, ()))
+
+    def template(self, section: str, i: int) -> Template:
+        return self._sections[section][i]
+
+    def close(self):
+        pass
+
+
+class Pack:
+    """A pack file, read through its index one message at a time."""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.name = self.path
+        self._fd = os.open(self.path, os.O_RDONLY)
+        st = os.fstat(self._fd)
+        self._idx = None            # the index in memory, if it couldn't be saved
+        self._templates = {}        # (section, i) -> Template, for lines picked so far
+        self._idx_fd = None
+        try:
+            self._idx_fd = os.open(self.path + ".idx", os.O_RDONLY)
+            magic, version, n, size, mtime = _HEADER.unpack(os.pread(self._idx_fd, _HEADER.size, 0))
+            if (magic, version, size, mtime) != (_MAGIC, _VERSION, st.st_size, st.st_mtime_ns):
+                raise ValueError("stale")
+        except (OSError, ValueError, struct.error):
+            if self._idx_fd is not None:
+                os.close(self._idx_fd)
+                self._idx_fd = None
+            self._build(st)
+        self.sections = self._read_sections()
+
+    def _read(self, offset: int, size: int) -> bytes:
+        if self._idx is not None:
+            return self._idx[offset:offset + size]
+        return os.pread(self._idx_fd, size, offset)
+
+    def _read_sections(self) -> dict:
+        n = _HEADER.unpack(self._read(0, _HEADER.size))[2]
+        table = self._read(_HEADER.size, n * _SECTION.size)
+        sections = {}
+        for i in range(n):
+            name, count, offset = _SECTION.unpack_from(table, i * _SECTION.size)
+            sections[name.rstrip(b"\0").decode("ascii")] = (count, offset)
+        return sections
+
+    def _build(self, st):
+        """Scan the pack once, checking every template, and write PATH.idx."""
+        sections, spans, section = {}, None, None
+        offset = 0
+        with open(self.path, "rb") as f:
+            for lineno, raw in enumerate(f, 1):
+                start, offset = offset, offset + len(raw)
+                line = raw.strip()
+                if not line or line.startswith(b"#"):
+                    continue
+                if line.startswith(b"[") and line.endswith(b"]"):
+                    section = line[1:-1].strip().decode("ascii", "replace").lower()
+                    if len(section.encode()) > 16 or not (section == CULPRIT_SECTION or section.isdigit()):
+                        raise ValueError(f"{self.path}:{lineno}: sections are tier hours or [{CULPRIT_SECTION}]")
+                    spans = sections.setdefault(section, [])
+                    continue
+                if spans is None:
+                    raise ValueError(f"{self.path}:{lineno}: message before the first [section]")
+                try:
+                    text = line.decode("utf-8")
+                    if b"{" in line or b"}" in line:
+                        Template(text, CULPRIT_FIELDS if section == CULPRIT_SECTION else TIER_FIELDS)
+                except (ValueError, UnicodeDecodeError) as e:
+                    raise ValueError(f"{self.path}:{lineno}: {e}") from None
+                lead = len(raw) - len(raw.lstrip())
+                spans.append((start + lead, start + lead + len(line)))
+
+        out = bytearray(_HEADER.pack(_MAGIC, _VERSION, len(sections), st.st_size, st.st_mtime_ns))
+        at = _HEADER.size + len(sections) * _SECTION.size
+        for name, spans in sections.items():
+            out += _SECTION.pack(name.encode("ascii"), len(spans), at)
+            at += len(spans) * _SPAN.size
+        for spans in sections.values():
+            for span in spans:
+                out += _SPAN.pack(*span)
+        tmp = f"{self.path}.idx.{os.getpid()}"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(out)
+            os.replace(tmp, self.path + ".idx")
+            self._idx_fd = os.open(self.path + ".idx", os.O_RDONLY)
+        except OSError:
+            self._idx = bytes(out)          # read-only directory: keep it for this run
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def count(self, section: str) -> int:
+        return self.sections.get(section, (0, 0))[0]
+
+    def template(self, section: str, i: int) -> Template:
+        template = self._templates.get((section, i))
+        if template is None:
+            count, offset = self.sections[section]
+            start, end = _SPAN.unpack(self._read(offset + i * _SPAN.size, _SPAN.size))
+            template = self._templates[section, i] = Template(os.pread(self._fd, end - start, start).decode("utf-8"))
+        return template
+
+    def close(self):
+        os.close(self._fd)
+        if self._idx_fd is not None:
+            os.close(self._idx_fd)
+
+
+def find_pack(name: str, dirs: list) -> str:
+    """A pack path as given, or `name` (e.g. "team", "de") looked up as NAME.txt in `dirs`."""
+    path = os.path.expanduser(name)
+    if os.sep in name or os.path.exists(path):
+        return path
+    for d in dirs:
+        candidate = os.path.join(os.path.expanduser(d), name + ".txt")
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"no message pack {name!r} in {', '.join(dirs)}")
+
+
+# ── Rotation ────────────────────────────────────────────
+class Rotation:
+    """A no-repeat shuffled walk through each section, saved as it goes."""
+
+    def __init__(self, path: str = None, save_each: bool = True):
+        self.path = path
+        self.save_each = save_each  # False: the caller flush()es after a batch of picks
+        self.walks = {}             # key -> [a, b, cursor, n]
+        self._dirty = False
+        if path:
+            try:
+                with open(path) as f:
+                    for line in f:
+                        a, b, cursor, n, key = line.rstrip("\n").split(" ", 4)
+                        a = [int(x) for x in a.split(",") if x] if "," in a else int(a)
+                        self.walks[key] = [a, int(b), int(cursor), int(n)]
+            except (OSError, ValueError):
+                self.walks = {}
+
+    def next(self, key: str, n: int) -> int:
+        walk = self.walks.get(key)
+        if walk is None or walk[3] != n or walk[2] >= n:
+            last = _at(walk, walk[2] - 1) if walk and walk[3] == n and walk[2] else None
+            walk = self.walks[key] = _shuffle(n, last)
+        cursor = walk[2]
+        walk[2] = cursor + 1
+        self._dirty = True
+        if self.save_each:
+            self.flush()
+        return _at(walk, cursor)
+
+    def cycle(self, key: str, n: int, count: int) -> list:
+        """For a bulk job: the next `count` picks are cycle[k % n], k = 0, 1, …
+
+        The current shuffled order from the cursor on, repeated rather than
+        reshuffled every n picks, so it costs O(n) however big `count` is.
+        Neighbouring picks still differ and each message comes up evenly.
+        """
+        walk = self.walks.get(key)
+        if walk is None or walk[3] != n:
+            walk = self.walks[key] = _shuffle(n)
+        start = walk[2] % n
+        walk[2] = (start + count) % n
+        if count:
+            self._dirty = True
+            if self.save_each:
+                self.flush()
+        return [_at(walk, (start + i) % n) for i in range(n)]
+
+    def flush(self):
+        if not self._dirty or not self.path:
+            return
+        tmp = f"{self.path}.{os.getpid()}"
+        try:
+            with open(tmp, "w") as f:
+                for key, (a, b, cursor, n) in self.walks.items():
+                    a = ",".join(map(str, a)) + "," if isinstance(a, list) else a
+                    f.write(f"{a} {b} {cursor} {n} {key}\n")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass                    # rotation just won't survive a restart
+        self._dirty = False
+
+
+def _at(walk: list, cursor: int) -> int:
+    a, b, _, n = walk
+    return a[cursor] if isinstance(a, list) else (a * cursor + b) % n
+
+
+def _shuffle(n: int, last: int = None) -> list:
+    """A fresh [a, b, 0, n] whose first pick isn't `last`, so no repeat across the seam.
+
+    Up to SMALL_SECTION messages, `a` is the shuffled order itself: an
+    affine walk over six messages has only twelve orders to choose from.
+    """
+    if n <= SMALL_SECTION:
+        order = random.sample(range(n), n)
+        if n > 1 and order[0] == last:
+            order[0], order[-1] = order[-1], order[0]
+        return [order, 0, 0, n]
+    a = 1
+    if n > 2:
+        a = random.randrange(1, n)
+        while gcd(a, n) != 1:
+            a = random.randrange(1, n)
+    b = random.randrange(n)
+    if b == last and n > 1:
+        b = (b + 1) % n
+    return [a, b, 0, n]
+
+
+# ── Bank ────────────────────────────────────────────────
+class Bank:
+    """Picks tier messages and culprit lines from a pack, falling back to messages.py."""
+
+    def __init__(self, pack=None, rotation: Rotation = None):
+        self.builtin = BuiltinPack()
+        self.pack = pack or self.builtin
+        self.rotation = rotation or Rotation()
+
+    def _source(self, section: str):
+        return self.pack if self.pack.count(section) else self.builtin
+
+    def _pick(self, section: str) -> Template:
+        pack = self._source(section)
+        n = pack.count(section)
+        return pack.template(section, self.rotation.next(f"{pack.name}:{section}", n))
+
+    def message(self, tier: int, streak: int = 1) -> str:
+        return self._pick(str(tier)).render({"hours": tier, "streak": streak})
+
+    def cycle(self, tier: int, count: int) -> list:
+        """Message indices for `count` alerts at `tier` in a bulk job; see Rotation.cycle."""
+        pack = self._source(str(tier))
+        return self.rotation.cycle(f"{pack.name}:{tier}", pack.count(str(tier)), count)
+
+    def text(self, tier: int, i: int, streak: int = 1) -> str:
+        """Message `i` of `tier`, rendered: the text behind an index from cycle()."""
+        return self._source(str(tier)).template(str(tier), i).render({"hours": tier, "streak": streak})
+
+    def culprit(self, app: str, time: str) -> str:
+        return self._pick(CULPRIT_SECTION).render({"app": app, "time": time})
+
+    def close(self):
+        self.rotation.flush()
+        if self.pack is not self.builtin:
+            self.pack.close()
+
+
+_banks = {}
+
+
+def open_bank(pack: str = None, rotation_file: str = None, dirs: list = (), save_each: bool = True) -> Bank:
+    """The Bank for this pack name/path and rotation file, opened once per process."""
+    key = (pack, rotation_file)
+    if key not in _banks:
+        _banks[key] = Bank(Pack(find_pack(pack, list(dirs))) if pack else None, Rotation(rotation_file, save_each))
+    return _banks[key]
+
+
+def close_banks():
+    """Save every open bank's rotation and close its pack."""
+    for bank in _banks.values():
+        bank.close()
+    _banks.clear()
+
+
+if __name__ == "__main__":
+    from messages import TIERS
+    import shutil
+    import tempfile
+    import time
+    import tracemalloc
+
+    root = tempfile.mkdtemp(prefix="philoscreen-msgbank-")
+    path = os.path.join(root, "big.txt")
+    per_tier = 10_000
+    with open(path, "w") as f:
+        for t in TIERS:
+            f.write(f"[{t}]\n")
+            f.writelines(f"{{hours}}h, message {i} of tier {t}, day {{streak}} in a row.\n" for i in range(per_tier))
+        f.write(f"[{CULPRIT_SECTION}]\n{{time}} of {{app}}. Noted.\n")
+
+    t = time.perf_counter()
+    Pack(path).close()
+    built = time.perf_counter() - t
+    tracemalloc.start()
+    t = time.perf_counter()
+    bank = Bank(Pack(path), Rotation(os.path.join(root, "rotation")))
+    opened = time.perf_counter() - t
+    seen = [bank.message(2, streak=3) for _ in range(per_tier)]
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(set(seen)) == per_tier, "a message repeated within one rotation"
+    print(f"{len(TIERS) * per_tier} messages: index built in {built * 1e3:.0f}ms, "
+          f"reopened in {opened * 1e6:.0f}µs; {per_tier} picks from one tier, no repeats, "
+          f"{held / 1e3:.0f} KB held (the picked strings and their cached templates)")
+    print(f"  {seen[0]}")
+
+    # Persistent: a new process (a fresh Rotation on the same file) carries on the walk
+    rot = os.path.join(root, "rotation")
+    picks = []
+    for _ in range(6):
+        restarted = Bank(rotation=Rotation(rot))
+        picks.append(restarted.message(4))
+        restarted.close()
+    assert len(set(picks)) == len(TIERS[4]), picks
+    print(f"built-in tier 4 across 6 restarts: all {len(set(picks))} messages, none twice")
+
+    n = 200
+    t = time.perf_counter()
+    for _ in range(n):
+        bank.message(6, streak=2)
+    print(f"pick + render + save rotation: {(time.perf_counter() - t) / n * 1e6:.0f}µs")
+    n = 20_000
+    bank.rotation.save_each = False
+    t = time.perf_counter()
+    for _ in range(n):
+        bank.message(6, streak=2)
+    bank.rotation.flush()
+    print(f"pick + render, rotation saved once per {n} (save_each=False): "
+          f"{(time.perf_counter() - t) / n * 1e6:.1f}µs")
+    bank.close()
+    shutil.rmtree(root)
@@ -0,0 +1,404 @@
+"""
+Notifier sinks for philoscreen: where tier alerts go.
+
+    notifier = Notifier(parse_sinks(["slack", "jsonl=~/shame.jsonl"], webhook_url))
+    notifier.notify(Alert(tier, active_seconds, msg, day))
+
+Sinks:
+    slack           Slack Incoming Webhook, through the durable outbox
+    slack=URL       same, to a specific webhook
+    webhook=URL     any HTTP endpoint; the alert as a JSON object
+    jsonl=PATH      one JSON object per line, appended to a local file
+    stdout          the terminal (what --dry-run uses)
+
+Every alert goes to every sink at once through a small thread pool. Each
+sink works through its own queue one alert at a time, so a slow or hung
+sink holds up only its own alerts: never another sink, never the tick
+loop. Each sink has a timeout: a send still going when it runs out is
+abandoned and counted as failed, and the sink moves on to its next alert
+(network sinks also apply the timeout to their sockets). The notifier
+counts sends, failures, timed-out sends and latency per sink.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from delivery import LATENCY_WINDOW, ConnectionPool, Delivery, SendError, post_json
+from outbox import Drainer, Outbox
+from common import OUTBOX_FILE, log, print_tier_alert, slack_alert
+
+SINK_TIMEOUT = 10.0         # seconds a sink may take over one alert
+
+
+class Alert:
+    """One tier crossing, independent of where it's going."""
+
+    __slots__ = ("tier", "active_seconds", "msg", "day", "user", "created")
+
+    def __init__(self, tier: int, active_seconds: float, msg: str, day: str,
+                 user: str = "", created: float = None):
+        self.tier = tier
+        self.active_seconds = active_seconds
+        self.msg = msg
+        self.day = day
+        self.user = user
+        self.created = created or time.time()
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# ── Sinks ───────────────────────────────────────────────
+class Sink:
+    """Somewhere alerts go. send() may block; the Notifier keeps it off the tick loop."""
+
+    name = "sink"
+
+    def __init__(self, timeout: float = SINK_TIMEOUT):
+        self.timeout = timeout
+
+    def send(self, alert: Alert):
+        """Deliver one alert or raise."""
+        raise NotImplementedError
+
+    def test(self, text: str) -> bool:
+        """Deliver a one-off test message and report whether it landed."""
+        return True
+
+    def poll(self):
+        """Periodic upkeep from the tick loop. Must not block."""
+
+    def close(self):
+        pass
+
+
+class StdoutSink(Sink):
+    name = "stdout"
+
+    def __init__(self, label_dry_run: bool = True, timeout: float = SINK_TIMEOUT):
+        super().__init__(timeout)
+        self.label_dry_run = label_dry_run
+
+    def send(self, alert: Alert):
+        print_tier_alert(alert.tier, alert.msg, dry_run=self.label_dry_run)
+
+    def test(self, text: str) -> bool:
+        print(f"\n  {text}\n")
+        return True
+
+
+class SlackSink(Sink):
+    """Slack via the outbox: send() only writes to disk; the Delivery thread posts.
+
+    `delivered` keeps the alert-to-Slack latency of recent messages, since
+    the time send() takes is just the local write.
+    """
+
+    name = "slack"
+
+    def __init__(self, webhook_url: str, outbox_path: str = OUTBOX_FILE, on_result=None,
+                 timeout: float = SINK_TIMEOUT):
+        super().__init__(timeout)
+        self.webhook_url = webhook_url
+        self.on_result = on_result
+        self.delivered = deque(maxlen=LATENCY_WINDOW)
+        self.delivery = Delivery(pool=ConnectionPool(timeout)).start()
+        self.drainer = Drainer(Outbox(outbox_path), self.delivery, on_result=self._landed)
+        # Anything left over from before a crash or restart goes first
+        self.drainer.drain()
+
+    def _landed(self, entries: list, ok: bool, error: str):
+        if ok:
+            now = time.time()
+            self.delivered.extend(now - e.created for e in entries)
+        if self.on_result is not None:
+            self.on_result(entries, ok, error)
+
+    def send(self, alert: Alert):
+        # On disk before it goes anywhere near the network
+        text = slack_alert(alert.tier, alert.active_seconds, alert.msg)
+        self.drainer.outbox.enqueue(self.webhook_url, text, alert.day, alert.tier, alert.msg, alert.created)
+        self.drainer.drain()
+
+    def test(self, text: str) -> bool:
+        try:
+            post_json(self.delivery.pool, self.webhook_url, {"text": text})
+            return True
+        except SendError as e:
+            log(f"Slack send failed: {e}")
+            return False
+
+    def poll(self):
+        self.drainer.drain()
+
+    def close(self):
+        self.delivery.stop()
+        self.drainer.outbox.close()
+
+
+class WebhookSink(Sink):
+    """Any HTTP endpoint: POSTs the alert as JSON. One attempt, best effort."""
+
+    def __init__(self, url: str, timeout: float = SINK_TIMEOUT):
+        super().__init__(timeout)
+        self.url = url
+        self.name = f"webhook:{url.split('/')[2] if '//' in url else url}"
+        self.pool = ConnectionPool(timeout)
+
+    def send(self, alert: Alert):
+        post_json(self.pool, self.url, alert.as_dict())
+
+    def test(self, text: str) -> bool:
+        try:
+            post_json(self.pool, self.url, {"test": text})
+            return True
+        except SendError:
+            return False
+
+    def close(self):
+        self.pool.close()
+
+
+class JsonlSink(Sink):
+    """Appends one JSON line per alert; a single write() each, so lines never interleave."""
+
+    def __init__(self, path: str, timeout: float = SINK_TIMEOUT):
+        super().__init__(timeout)
+        self.path = os.path.expanduser(path)
+        self.name = f"jsonl:{os.path.basename(self.path)}"
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+    def _write(self, obj: dict):
+        os.write(self._fd, (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def send(self, alert: Alert):
+        self._write(alert.as_dict())
+
+    def test(self, text: str) -> bool:
+        self._write({"test": text, "created": time.time()})
+        return True
+
+    def close(self):
+        os.close(self._fd)
+
+
+def parse_sinks(specs: list, webhook_url: str = "", on_slack_result=None,
+                outbox_path: str = OUTBOX_FILE) -> list:
+    """Sinks from `--sink` specs (see the module docstring). Raises ValueError on a bad one."""
+    sinks = []
+    for spec in specs:
+        kind, _, arg = spec.partition("=")
+        if kind == "stdout":
+            sinks.append(StdoutSink())
+        elif kind == "slack":
+            url = arg or webhook_url
+            if not url:
+                raise ValueError("slack sink needs a webhook: --webhook URL or --sink slack=URL")
+            sinks.append(SlackSink(url, outbox_path, on_result=on_slack_result))
+        elif kind == "webhook" and arg:
+            sinks.append(WebhookSink(arg))
+        elif kind == "jsonl" and arg:
+            sinks.append(JsonlSink(arg))
+        else:
+            raise ValueError(f"unknown sink {spec!r} (slack[=URL], webhook=URL, jsonl=PATH, stdout)")
+    return sinks
+
+
+# ── Fan-out ─────────────────────────────────────────────
+class SinkStats:
+    """Send counters and recent latencies for one sink."""
+
+    __slots__ = ("sent", "failed", "late", "queued", "latencies")
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.late = 0           # abandoned at the sink's timeout (also counted in failed)
+        self.queued = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+class _Sender:
+    """One sink's sends on a daemon thread of their own, reused from send to send.
+
+    A send that outlives its timeout keeps the thread; the Notifier stops
+    this sender (it exits once that send returns) and starts another.
+    """
+
+    def __init__(self, sink: Sink):
+        self.sink = sink
+        self._jobs = queue.SimpleQueue()
+        threading.Thread(target=self._run, name=f"philoscreen-send-{sink.name}", daemon=True).start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            alert, outcome, done = job
+            try:
+                self.sink.send(alert)
+                outcome.append("")
+            except Exception as e:
+                outcome.append(f"{e.__class__.__name__}: {e}")
+            done.set()
+
+    def send(self, alert: Alert, timeout: float):
+        """The send's error ("" if none), or None if it's still going after `timeout`."""
+        outcome = []
+        done = threading.Event()
+        self._jobs.put((alert, outcome, done))
+        return outcome[0] if done.wait(timeout) else None
+
+    def stop(self):
+        self._jobs.put(None)
+
+
+class Notifier:
+    """Hands each alert to every sink concurrently; notify() never blocks.
+
+    `on_result(sink, alert, ok, seconds, error)`, if given, is called on the
+    sink's thread after each send.
+    """
+
+    def __init__(self, sinks: list, on_result=None):
+        self.sinks = sinks
+        self.on_result = on_result
+        self.stats = {sink: SinkStats() for sink in sinks}
+        self._queues = {sink: deque() for sink in sinks}
+        self._running = set()
+        self._senders = {}              # sink -> _Sender, started on its first alert
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(sinks)), thread_name_prefix="philoscreen-sink")
+
+    def notify(self, alert: Alert):
+        with self._cond:
+            for sink in self.sinks:
+                self._queues[sink].append(alert)
+                self.stats[sink].queued += 1
+                if sink not in self._running:
+                    self._running.add(sink)
+                    self._pool.submit(self._work, sink)
+
+    def _work(self, sink: Sink):
+        """Drain one sink's queue; at most one of these runs per sink."""
+        stats = self.stats[sink]
+        while True:
+            with self._cond:
+                queue = self._queues[sink]
+                if not queue:
+                    self._running.discard(sink)
+                    self._cond.notify_all()
+                    return
+                alert = queue.popleft()
+            start = time.monotonic()
+            ok, error, late = self._send(sink, alert)
+            elapsed = time.monotonic() - start
+            if not ok:
+                log(f"{sink.name}: couldn't deliver {alert.tier}h alert ({error})")
+            with self._cond:
+                stats.queued -= 1
+                stats.latencies.append(elapsed)
+                if ok:
+                    stats.sent += 1
+                else:
+                    stats.failed += 1
+                if late:
+                    stats.late += 1
+            if self.on_result is not None:
+                self.on_result(sink, alert, ok, elapsed, error)
+
+    def _send(self, sink: Sink, alert: Alert) -> tuple:
+        """(ok, error, timed out) of one send, given up on after `sink.timeout` seconds.
+
+        Only the sink's own _work calls this, so its sender is never shared.
+        """
+        sender = self._senders.get(sink)
+        if sender is None:
+            sender = self._senders[sink] = _Sender(sink)
+        error = sender.send(alert, sink.timeout)
+        if error is None:
+            # Leave the hung send its thread; later alerts get a fresh one
+            sender.stop()
+            self._senders[sink] = _Sender(sink)
+            return False, f"no answer in {sink.timeout:g}s, abandoned", True
+        return not error, error, False
+
+    def poll(self):
+        for sink in self.sinks:
+            sink.poll()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every sink has taken every alert so far."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Give pending alerts `timeout` seconds, then close the sinks."""
+        self.flush(timeout)
+        # A hung sink keeps its thread; don't wait on it
+        self._pool.shutdown(wait=False)
+        for sender in list(self._senders.values()):
+            sender.stop()
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception:
+                pass
+
+    def summary(self) -> list:
+        """(name, sent, failed, late, p50 s, p99 s) per sink.
+
+        Latency is until the sink has the alert; for Slack, until Slack does.
+        """
+        out = []
+        with self._cond:
+            for sink, s in self.stats.items():
+                lat = s
+                if getattr(sink, "delivered", None):
+                    lat = SinkStats()
+                    lat.latencies.extend(sink.delivered)
+                out.append((sink.name, s.sent, s.failed, s.late, lat.percentile(50), lat.percentile(99)))
+        return out
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from delivery import serve_stand_in
+
+    # One healthy webhook, one that takes 300ms per alert, and a file
+    fast, fast_url = serve_stand_in()
+    slow, slow_url = serve_stand_in(delay=0.3)
+    path = os.path.join(tempfile.mkdtemp(), "alerts.jsonl")
+    notifier = Notifier([WebhookSink(fast_url), WebhookSink(slow_url, timeout=1.0), JsonlSink(path)])
+    notifier.sinks[1].name = "webhook:slow"
+
+    n = 20
+    t = time.perf_counter()
+    for i in range(n):
+        notifier.notify(Alert(2 * (1 + i % 6), 3600.0 * (i + 1), f"alert {i}", "2026-01-05"))
+    handed = time.perf_counter() - t
+    notifier.flush(30)
+    print(f"{n} alerts to 3 sinks: notify() took {handed / n * 1e6:.0f}µs each")
+    for name, sent, failed, late, p50, p99 in notifier.summary():
+        print(f"  {name:<28} sent {sent:>3}  failed {failed}  timed out {late:>2}  "
+              f"p50 {p50 * 1e3:7.2f}ms  p99 {p99 * 1e3:7.2f}ms")
+    notifier.close()
+    fast.shutdown()
+    slow.shutdown()
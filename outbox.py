@@ -0,0 +1,371 @@
+"""
+Durable outbox for philoscreen alerts.
+
+Every outgoing notification is written here before anything touches the
+network, so a crash, restart or long offline stretch can't lose one —
+including when it was due and what it said. A Drainer hands pending
+entries to the Delivery worker and deletes them once they land. An entry
+whose delivery was given up on waits longer before each new try (from
+RETRY_BASE, doubling up to RETRY_MAX), and one the webhook refused
+outright (a 4xx other than 429: revoked, deleted, malformed) moves to a
+dead-letter table instead of being retried forever.
+
+Entries are rows in a small SQLite database in WAL mode: an enqueue
+appends to the log instead of rewriting a file, and thousands of queued
+alerts cost nothing until they drain. When the backlog finally drains,
+alerts for the same webhook and day are coalesced into one message
+rather than arriving as a burst of stale pings. A group's text is only
+written when its rate-limit slot comes up, so alerts that turn up while
+it waits join the same digest instead of queueing behind it.
+
+Run `python3 outbox.py` to queue a few thousand alerts while a local
+stand-in server is "down" and watch them drain, then to push a team's
+worth of alerts through one rate-limited webhook.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from common import OUTBOX_FILE
+
+STALE_AFTER = 15 * 60       # seconds — older than this gets a "held while offline" note
+RETRY_BASE = 60.0           # seconds before an entry given up on is tried again; doubles each time
+RETRY_MAX = 3600.0          # seconds — longest wait between tries
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    url      TEXT NOT NULL,
+    day      TEXT NOT NULL,
+    tier     INTEGER NOT NULL,
+    text     TEXT NOT NULL,
+    note     TEXT NOT NULL DEFAULT '',
+    created  REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error    TEXT NOT NULL DEFAULT '',
+    retry_at REAL NOT NULL DEFAULT 0
+)
+"""
+
+# Entries the webhook refused for good, kept for a look rather than dropped
+_DEAD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dead (
+    id       INTEGER PRIMARY KEY,
+    url      TEXT NOT NULL,
+    day      TEXT NOT NULL,
+    tier     INTEGER NOT NULL,
+    text     TEXT NOT NULL,
+    note     TEXT NOT NULL,
+    created  REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    error    TEXT NOT NULL,
+    died     REAL NOT NULL
+)
+"""
+
+
+class Entry:
+    """One queued notification."""
+
+    __slots__ = ("id", "url", "day", "tier", "text", "note", "created", "attempts")
+
+    def __init__(self, id, url, day, tier, text, note, created, attempts):
+        self.id = id
+        self.url = url
+        self.day = day
+        self.tier = tier
+        self.text = text
+        self.note = note
+        self.created = created
+        self.attempts = attempts
+
+
+class Outbox:
+    """Crash-safe queue of undelivered notifications."""
+
+    def __init__(self, path: str = OUTBOX_FILE, retry_base: float = RETRY_BASE, retry_max: float = RETRY_MAX):
+        self.path = path
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        # Rows carry webhook URLs: owner-only, like .env
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(_SCHEMA)
+        self._db.execute(_DEAD_SCHEMA)
+        if "retry_at" not in {row[1] for row in self._db.execute("PRAGMA table_info(outbox)")}:
+            self._db.execute("ALTER TABLE outbox ADD COLUMN retry_at REAL NOT NULL DEFAULT 0")
+
+    def enqueue(self, url: str, text: str, day: str, tier: int, note: str = "",
+                created: float = None) -> int:
+        """Persist one notification and return its id."""
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO outbox (url, day, tier, text, note, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, day, tier, text, note, created or time.time()),
+            )
+            return cur.lastrowid
+
+    def enqueue_many(self, rows: list):
+        """Persist (url, text, day, tier, note, created) rows in one transaction."""
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO outbox (url, text, day, tier, note, created) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def pending(self, limit: int = 10_000, now: float = None) -> list:
+        """Queued entries due for a try, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, url, day, tier, text, note, created, attempts "
+                "FROM outbox WHERE retry_at <= ? ORDER BY id LIMIT ?", (now or time.time(), limit),
+            ).fetchall()
+        return [Entry(*row) for row in rows]
+
+    def ack(self, ids: list):
+        """Drop delivered entries."""
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+
+    def failed(self, ids: list, error: str, permanent: bool = False):
+        """Record a failed delivery.
+
+        The entries stay queued, not tried again for retry_base × 2^attempts
+        seconds (at most retry_max), or with `permanent` move to the dead
+        letters.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            if permanent:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO dead SELECT id, url, day, tier, text, note, created, attempts + 1, ?, ? "
+                    "FROM outbox WHERE id = ?", [(error, now, i) for i in ids],
+                )
+                self._db.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+                return
+            self._db.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, error = ?, "
+                "retry_at = ? + min(? * (1 << min(attempts, 30)), ?) WHERE id = ?",
+                [(error, now, self.retry_base, self.retry_max, i) for i in ids],
+            )
+
+    def dead(self, limit: int = 100) -> list:
+        """(entry, error) for the most recent dead letters, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, url, day, tier, text, note, created, attempts, error "
+                "FROM dead ORDER BY died DESC, id DESC LIMIT ?", (limit,),
+            ).fetchall()
+        return [(Entry(*row[:8]), row[8]) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def coalesce(entries: list, now: float = None, stale_after: float = STALE_AFTER) -> str:
+    """One message for a same-day group: the highest tier, plus what was held back."""
+    now = now or time.time()
+    top = max(entries, key=lambda e: (e.tier, e.id))
+    oldest = min(e.created for e in entries)
+    if now - oldest < stale_after:
+        if len(entries) == 1:
+            return top.text
+        # Crossed together (a restart, a slow tick): one digest, not a burst
+        also = ", ".join(f"{t}h" for t in sorted({e.tier for e in entries} - {top.tier}))
+        return f"{top.text}\n\n_also crossed: {also}_" if also else top.text
+    held = ", ".join(
+        f"{e.tier}h at {datetime.fromtimestamp(e.created).strftime('%I:%M %p')}"
+        for e in sorted(entries, key=lambda e: e.created)
+    )
+    return f"{top.text}\n\n_held while offline: {held}_"
+
+
+def by_user(entry: Entry) -> tuple:
+    """Drainer grouping for team alerts, whose note carries the user."""
+    return entry.url, entry.day, entry.note
+
+
+class Drainer:
+    """Feeds outbox entries to a Delivery worker and acks what lands.
+
+    `on_result(entries, ok, error)` runs on the delivery thread after each
+    coalesced message is delivered or given up on. Given-up entries stay in
+    the outbox and go out with a drain() once their wait is over, unless the
+    webhook refused them for good (see Outbox.failed). Entries coalesce by
+    `group_by(entry)`, (url, day) by default; a team sender adds the note
+    (the user) so one person's alerts never swallow another's.
+    """
+
+    def __init__(self, outbox: Outbox, delivery, on_result=None,
+                 stale_after: float = STALE_AFTER, group_by=None):
+        self.outbox = outbox
+        self.delivery = delivery
+        self.on_result = on_result
+        self.stale_after = stale_after
+        self.group_by = group_by or (lambda e: (e.url, e.day))
+        self._in_flight = set()
+        self._open = {}         # key → group still waiting for its slot (still growing)
+        self._busy = set()      # keys with a message queued or on its way
+        self._held = set()      # busy keys with more entries waiting behind them
+        self._lock = threading.Lock()
+        delivery.on_result = self._delivered
+
+    def drain(self) -> int:
+        """Submit everything queued and not already in flight. Returns messages sent."""
+        entries = self.outbox.pending()
+        groups = {}
+        with self._lock:
+            for e in entries:
+                if e.id in self._in_flight:
+                    continue
+                key = self.group_by(e)
+                if key in self._open:
+                    self._open[key].append(e)       # not written yet: joins the digest
+                elif key in self._busy:
+                    self._held.add(key)             # already sending: next digest
+                    continue
+                else:
+                    groups.setdefault(key, []).append(e)
+                self._in_flight.add(e.id)
+            self._open.update(groups)
+            self._busy.update(groups)
+        for key, group in groups.items():
+            self.delivery.submit(group[0].url, lambda key=key: self._seal(key), tag=group)
+        return len(groups)
+
+    def _seal(self, key) -> dict:
+        """The group's slot came up: write its message; later entries start a new one."""
+        with self._lock:
+            group = self._open.pop(key)
+        return {"text": coalesce(group, time.time(), self.stale_after)}
+
+    def _delivered(self, job, ok: bool):
+        group = job.tag
+        ids = [e.id for e in group]
+        if ok:
+            self.outbox.ack(ids)
+        else:
+            self.outbox.failed(ids, job.error or "", permanent=job.permanent)
+        with self._lock:
+            self._in_flight.difference_update(ids)
+            key = self.group_by(group[0])
+            self._busy.discard(key)
+            held = key in self._held
+            self._held.discard(key)
+        if self.on_result is not None:
+            self.on_result(group, ok, job.error)
+        if ok and held:
+            self.drain()    # what piled up behind it goes out as one digest
+
+
+def _shared_webhook(digest: bool, users: int, scale: float) -> dict:
+    """Everyone's restart-burst alerts through one Slack-like webhook, sped up `scale` times.
+
+    Each user crosses three tiers at once, then half of them a fourth one
+    a moment later. With `digest`, alerts go through the outbox, are
+    grouped per user and paced by the token bucket. Without it, every
+    alert is posted on its own, as before, and leans on 429 retries.
+    """
+    import tempfile
+
+    from delivery import BASE_DELAY, MAX_DELAY, WEBHOOK_RATE, Delivery, serve_stand_in
+
+    server, url = serve_stand_in(rate_limit=WEBHOOK_RATE * scale, retry_after=1 / scale)
+    latencies = []
+    delivery = Delivery(base_delay=BASE_DELAY / scale, max_delay=MAX_DELAY / scale,
+                        rate=WEBHOOK_RATE * scale if digest else None)
+    if digest:
+        box = Outbox(os.path.join(tempfile.mkdtemp(), "outbox.db"))
+        drainer = Drainer(box, delivery, group_by=by_user, on_result=lambda group, ok, _: ok and latencies.extend(
+            time.time() - e.created for e in group))
+        send = lambda user, tier: box.enqueue(url, f"{user} hit {tier}h", "2026-01-05", tier, user)
+    else:
+        box = None
+        delivery.on_result = lambda job, ok: ok and latencies.append(time.time() - job.tag)
+        send = lambda user, tier: delivery.submit(url, {"text": f"{user} hit {tier}h"}, tag=time.time())
+    delivery.start()
+
+    t = time.perf_counter()
+    for u in range(users):
+        for tier in (2, 4, 6):
+            send(f"user{u:03d}", tier)
+    if digest:
+        drainer.drain()
+    time.sleep(0.5)
+    for u in range(0, users, 2):
+        send(f"user{u:03d}", 8)
+    if digest:
+        drainer.drain()
+    delivery.flush(600)
+    elapsed = time.perf_counter() - t
+    delivery.stop()
+    server.shutdown()
+    if box is not None:
+        box.close()
+    latencies.sort()
+    return {
+        "alerts": users * 3 + (users + 1) // 2,
+        "messages": server.hits - server.throttled,
+        "429s": server.throttled,
+        "failed": delivery.failed,
+        "elapsed": elapsed * scale,
+        "p50": latencies[len(latencies) // 2] * scale,
+        "p99": latencies[int(len(latencies) * 0.99)] * scale,
+    }
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from delivery import Delivery, serve_stand_in
+
+    n = 5000
+    path = os.path.join(tempfile.mkdtemp(), "outbox.db")
+    box = Outbox(path, retry_base=0.0)     # no wait between drains, to keep the demo short
+    server, url = serve_stand_in(status=503)
+    delivery = Delivery(base_delay=0.05, max_delay=0.2, max_attempts=2, rate=None).start()
+    drainer = Drainer(box, delivery)
+
+    t = time.perf_counter()
+    for i in range(n):
+        box.enqueue(url, f"alert {i}", f"2026-01-{1 + i % 28:02d}", 2 * (1 + i % 6),
+                    created=time.time() - 3600)
+    per = (time.perf_counter() - t) / n
+    size = os.path.getsize(path) + os.path.getsize(path + "-wal")
+    print(f"enqueued {n} alerts: {per * 1e6:.0f}µs each, {size // 1024} KiB on disk")
+
+    drainer.drain()
+    delivery.flush(30)
+    print(f"network down: {len(box)} still queued, {delivery.failed} messages given up")
+
+    server.status = 200
+    hits = server.hits
+    t = time.perf_counter()
+    drainer.drain()
+    delivery.flush(30)
+    print(f"network back: drained in {time.perf_counter() - t:.2f}s as "
+          f"{server.hits - hits} coalesced messages, {len(box)} left")
+    delivery.stop()
+    box.close()
+    server.shutdown()
+
+    users, scale = 60, 5
+    print(f"\n{users} users sharing one webhook limited to 1 msg/s (run {scale}x faster, times scaled back)")
+    for label, digest in (("one post per alert", False), ("digest + token bucket", True)):
+        r = _shared_webhook(digest, users, scale)
+        print(f"  {label:<22} {r['alerts']} alerts → {r['messages']} messages, {r['429s']} 429s, "
+              f"{r['failed']} failed; done in {r['elapsed']:.0f}s, latency p50 {r['p50']:.0f}s p99 {r['p99']:.0f}s")
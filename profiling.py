@@ -0,0 +1,172 @@
+"""
+`--profile DIR`: find out where a long-running philoscreen spends its
+time and memory, without attaching anything.
+
+    python3 screen_shame.py --profile ~/philoscreen-profile [--profile-every 12]
+
+While profiling, cProfile runs on the tick loop and tracemalloc traces
+every allocation. The loop also reports its own timings for the idle
+probe, the state save and the status line. Every N ticks (12 is about
+an hour of active use) DIR gets three files:
+
+    profile-<stamp>.prof   cProfile stats for those ticks (open with pstats or snakeviz)
+    heap-<stamp>.snap      tracemalloc snapshot (tracemalloc.Snapshot.load)
+    growth-<stamp>.txt     RSS, hot-path timings, per-sink send times, and
+                           the lines whose memory grew the most since the
+                           previous snapshot and since the first one
+
+Only the newest KEEP sets are kept. A leak shows up as the same line
+near the top of "since start" in file after file.
+
+cProfile only sees the thread it runs on. Sinks deliver on their own
+threads, so their send times come from the notifier's counters instead.
+Taking a snapshot blocks the tick for a moment, usually tens of
+milliseconds, which is fine for a diagnostic mode.
+"""
+
+import cProfile
+import os
+import time
+import tracemalloc
+
+PROFILE_EVERY = 12          # ticks per rotation
+KEEP = 24                   # rotations kept on disk
+TOP = 15                    # lines listed per growth table
+
+# Allocations made by the profiler itself aren't the daemon's
+_IGNORE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> int:
+    """Current resident set size, or peak where current isn't available (macOS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Timer:
+    __slots__ = ("count", "total", "worst")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.worst:
+            self.worst = seconds
+
+
+class Profiler:
+    """Rotates cProfile stats and tracemalloc snapshots into a directory."""
+
+    def __init__(self, directory: str, every: int = PROFILE_EVERY, keep: int = KEEP):
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.every = every
+        self.keep = keep
+        self.notifier = None
+        self.timers = {name: _Timer() for name in ("idle probe", "save_state", "render", "tick")}
+        self._ticks = 0
+        self._seq = 0
+        self._first = None
+        self._last = None
+        self._profile = None
+
+    def start(self):
+        tracemalloc.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def observe_tick(self, probe: float, save: float, render: float, total: float):
+        t = self.timers
+        t["idle probe"].add(probe)
+        t["save_state"].add(save)
+        t["render"].add(render)
+        t["tick"].add(total)
+        self._ticks += 1
+        if self._ticks >= self.every:
+            self.rotate()
+
+    def rotate(self):
+        """Write this period's files and start the next one."""
+        if self._profile is None:
+            return
+        self._profile.disable()
+        self._seq += 1
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._seq:04d}"
+        self._profile.dump_stats(os.path.join(self.directory, f"profile-{stamp}.prof"))
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORE)
+        snapshot.dump(os.path.join(self.directory, f"heap-{stamp}.snap"))
+        with open(os.path.join(self.directory, f"growth-{stamp}.txt"), "w") as f:
+            f.write(self.summary(snapshot))
+        self._first = self._first or snapshot
+        self._last = snapshot
+        for name in self.timers:
+            self.timers[name] = _Timer()
+        self._ticks = 0
+        self._prune()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def summary(self, snapshot) -> str:
+        traced, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f"{time.strftime('%Y-%m-%d %H:%M:%S')}  {self._ticks} ticks",
+            f"rss {rss_bytes() / 1e6:.1f} MB  traced {traced / 1e6:.2f} MB  (peak {peak / 1e6:.2f} MB)",
+            "",
+            "hot paths            calls      mean       max",
+        ]
+        for name, t in self.timers.items():
+            mean = t.total / t.count if t.count else 0.0
+            lines.append(f"  {name:<16} {t.count:>7}  {mean * 1e6:7.1f}µs  {t.worst * 1e6:8.1f}µs")
+        if self.notifier is not None:
+            for name, sent, failed, late, p50, p99 in self.notifier.summary():
+                lines.append(f"  sink {name:<11} {sent + failed:>7}  p50 {p50 * 1e3:.1f}ms  p99 {p99 * 1e3:.1f}ms"
+                             f"  ({failed} failed, {late} over timeout)")
+        for title, base in (("since the previous snapshot", self._last), ("since the first snapshot", self._first)):
+            lines.append("")
+            lines.append(f"memory growth {title}")
+            if base is None:
+                lines.append("  (no earlier snapshot yet)")
+                continue
+            stats = [s for s in snapshot.compare_to(base, "lineno") if s.size_diff > 0][:TOP]
+            for s in stats:
+                frame = s.traceback[0]
+                lines.append(f"  {s.size_diff / 1024:+9.1f} KiB {s.count_diff:+7d} blocks  "
+                             f"{frame.filename}:{frame.lineno}")
+            if not stats:
+                lines.append("  (nothing grew)")
+        return "\n".join(lines) + "\n"
+
+    def _prune(self):
+        for prefix in ("profile-", "heap-", "growth-"):
+            names = sorted(n for n in os.listdir(self.directory) if n.startswith(prefix))
+            for name in names[:-self.keep]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def stop(self):
+        """Write the partial period, if any, and stop tracing."""
+        if self._profile is not None and self._ticks:
+            self.rotate()
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile = None
+        tracemalloc.stop()
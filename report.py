@@ -0,0 +1,279 @@
+"""
+`screen_shame.py report` — what the activity history says about you.
+
+    python3 screen_shame.py report --from 2026-01-01 --to 2026-06-30 [--by week]
+
+Totals, averages and percentiles of daily active time, the longest
+unbroken session, the longest run of days over the first tier, tier hit
+rates, an hour-of-day heatmap and the apps that got the most of it.
+
+Range sums never walk the days: the history keeps running totals per
+day, so any period is two row lookups. Per-day columns (minutes, fired
+tiers) are read straight out of the memory-mapped records — as NumPy
+arrays when NumPy is installed, as strided memoryviews when it isn't —
+and bitmaps are scanned as one big integer.
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+
+from history import BITMAP_SIZE, FIRED_OFFSET, MINUTES_OFFSET, RECORD_SIZE, History
+from messages import THRESHOLDS
+from common import (
+    APPS_DIR, BOLD, CYAN, DIM, GREEN, HISTORY_FILE, RESET, TIER_COLORS, WHITE, YELLOW,
+    format_time,
+)
+
+try:
+    import numpy as np
+except ImportError:     # optional: everything below has a pure-Python path
+    np = None
+
+HEAT = " ▁▂▃▄▅▆▇█"
+BAR_WIDTH = 24
+
+
+# ── Columns ─────────────────────────────────────────────
+def _columns(records: memoryview):
+    """(minutes, fired) per day, zero-copy views over the raw records."""
+    if np is not None:
+        rows = np.frombuffer(records, dtype=np.uint8).reshape(-1, RECORD_SIZE)
+        minutes = rows[:, MINUTES_OFFSET:MINUTES_OFFSET + 2].copy().view("<u2").ravel()
+        fired = rows[:, FIRED_OFFSET:FIRED_OFFSET + 4].copy().view("<u4").ravel()
+        return minutes, fired
+    minutes = records.cast("H")[MINUTES_OFFSET // 2::RECORD_SIZE // 2]
+    fired = records.cast("I")[FIRED_OFFSET // 4::RECORD_SIZE // 4]
+    return minutes, fired
+
+
+def percentile(values, pct: float) -> float:
+    """Linear-interpolated percentile (NumPy's default method)."""
+    if np is not None:
+        return float(np.percentile(values, pct)) if len(values) else 0.0
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def longest_session(records: memoryview) -> tuple:
+    """(minutes, day index) of the longest unbroken active run within one day.
+
+    Bitwise over one big integer for the whole range — a handful of shifts
+    and ANDs, which beats unpacking the bits into a NumPy array.
+    """
+    days = len(records) // RECORD_SIZE
+    if not days:
+        return 0, 0
+    # All days as one big integer with padding and fired bits masked off
+    mask = int.from_bytes((b"\xff" * BITMAP_SIZE + bytes(RECORD_SIZE - BITMAP_SIZE)) * days, "little")
+    x = int.from_bytes(records, "little") & mask
+    if not x:
+        return 0, 0
+    # runs[j]: bit i set iff bits i .. i + 2**j - 1 are all set
+    runs, length = [x], 1
+    while True:
+        nxt = runs[-1] & (runs[-1] >> length)
+        if not nxt:
+            break
+        runs.append(nxt)
+        length *= 2
+    starts = runs[-1]
+    for j in range(len(runs) - 2, -1, -1):
+        longer = starts & (runs[j] >> length)
+        if longer:
+            starts = longer
+            length += 1 << j
+    first = (starts & -starts).bit_length() - 1
+    return length, first // (RECORD_SIZE * 8)
+
+
+def longest_streak(flags) -> tuple:
+    """(length, end index) of the longest run of truthy days."""
+    if np is not None:
+        flat = np.concatenate(([0], np.asarray(flags, dtype=np.int8), [0]))
+        edges = np.diff(flat)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        if not len(starts):
+            return 0, 0
+        lengths = ends - starts
+        best = int(lengths.argmax())
+        return int(lengths[best]), int(ends[best]) - 1
+    best, best_end, run = 0, 0, 0
+    for i, flag in enumerate(flags):
+        run = run + 1 if flag else 0
+        if run > best:
+            best, best_end = run, i
+    return best, best_end
+
+
+def tier_hit_rates(fired, minutes) -> list:
+    """Share of active days on which each tier fired."""
+    if np is not None:
+        active = np.asarray(minutes) > 0
+        n = int(active.sum())
+        if not n:
+            return [0.0] * len(THRESHOLDS)
+        f = np.asarray(fired)[active]
+        return [float(((f >> i) & 1).sum()) / n for i in range(len(THRESHOLDS))]
+    active = [f for f, m in zip(fired, minutes) if m]
+    if not active:
+        return [0.0] * len(THRESHOLDS)
+    return [sum(f >> i & 1 for f in active) / len(active) for i in range(len(THRESHOLDS))]
+
+
+# ── Periods ─────────────────────────────────────────────
+def periods(first: date, last: date, by: str) -> list:
+    """(label, start, end) buckets covering first..last."""
+    out = []
+    start = first
+    while start <= last:
+        if by == "day":
+            end, label = start, start.strftime("%a %m-%d")
+        elif by == "week":
+            end = start + timedelta(days=6 - start.weekday())
+            label = f"{start.isocalendar()[0]}-W{start.isocalendar()[1]:02d}"
+        else:
+            nxt = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+            end, label = nxt - timedelta(days=1), start.strftime("%Y-%m")
+        end = min(end, last)
+        out.append((label, start, end))
+        start = end + timedelta(days=1)
+    return out
+
+
+def range_minutes(history: History, first: date, last: date) -> int:
+    """Active minutes in first..last from the running totals: O(1)."""
+    return history.rollup(last.toordinal())[0] - history.rollup(first.toordinal() - 1)[0]
+
+
+def hour_totals(history: History, first: date, last: date) -> list:
+    hi = history.rollup(last.toordinal())
+    lo = history.rollup(first.toordinal() - 1)
+    return [hi[i] - lo[i] for i in range(1, 25)]
+
+
+# ── Rendering ───────────────────────────────────────────
+def _tier_color(minutes: float) -> str:
+    color = GREEN
+    for t in THRESHOLDS:
+        if minutes >= t * 60:
+            color = TIER_COLORS.get(t, WHITE)
+    return color
+
+
+def _bar(value: float, peak: float, color: str) -> str:
+    filled = int(round(value / peak * BAR_WIDTH)) if peak else 0
+    return f"{color}{'█' * filled}{DIM}{'░' * (BAR_WIDTH - filled)}{RESET}"
+
+
+def render(history: History, first: date, last: date, by: str = None, apps: list = None) -> str:
+    """The report; `apps` is the [(name, seconds)] top list from apps.top_apps()."""
+    started = time.perf_counter()
+    lo, hi = first.toordinal(), last.toordinal()
+    records = history.records(lo, hi)
+    minutes, fired = _columns(records)
+    n_days = hi - lo + 1
+    recorded = len(minutes)
+    active_days = [m for m in minutes if m] if np is None else minutes[minutes > 0]
+
+    total = range_minutes(history, first, last)
+    avg_cal = total / n_days if n_days else 0
+    avg_active = total / len(active_days) if len(active_days) else 0
+    session, session_day = longest_session(records)
+    first_recorded = max(lo, history.base)
+    over = [m >= THRESHOLDS[0] * 60 for m in minutes] if np is None else minutes >= THRESHOLDS[0] * 60
+    streak, streak_end = longest_streak(over)
+    rates = tier_hit_rates(fired, minutes)
+    hours = hour_totals(history, first, last)
+    records.release()
+
+    lines = []
+    w = 43
+    lines.append("")
+    lines.append(f"  {BOLD}{WHITE}philoscreen report{RESET}  {DIM}{first} → {last}  ({n_days} days){RESET}")
+    lines.append(f"  {DIM}{'─' * w}{RESET}")
+    if not recorded or not total:
+        lines.append(f"  {DIM}No activity recorded in this range. Suspiciously healthy.{RESET}")
+        lines.append("")
+        return "\n".join(lines)
+
+    lines.append(f"  {DIM}total{RESET}     {BOLD}{format_time(total)}{RESET}  {DIM}over {len(active_days)} active days{RESET}")
+    lines.append(f"  {DIM}average{RESET}   {_tier_color(avg_active)}{format_time(int(avg_active))}{RESET} / active day"
+                 f"  {DIM}({format_time(int(avg_cal))} / calendar day){RESET}")
+    p50, p90 = percentile(active_days, 50), percentile(active_days, 90)
+    peak = max(active_days)
+    lines.append(f"  {DIM}median{RESET}    {format_time(int(p50))}  {DIM}p90{RESET} {format_time(int(p90))}"
+                 f"  {DIM}max{RESET} {_tier_color(peak)}{format_time(int(peak))}{RESET}")
+    when = date.fromordinal(first_recorded + session_day)
+    lines.append(f"  {DIM}longest{RESET}   {format_time(session)} without a break {DIM}({when}){RESET}")
+    if streak:
+        end = date.fromordinal(first_recorded + streak_end)
+        lines.append(f"  {DIM}streak{RESET}    {streak} day{'s' if streak != 1 else ''} in a row over "
+                     f"{THRESHOLDS[0]}h {DIM}(ending {end}){RESET}")
+    tiers = f" {DIM}·{RESET} ".join(
+        f"{TIER_COLORS.get(t, WHITE)}{t}h{RESET} {rate:.0%}" for t, rate in zip(THRESHOLDS, rates)
+    )
+    lines.append(f"  {DIM}tiers{RESET}     {tiers}")
+    lines.append(f"  {DIM}{'─' * w}{RESET}")
+
+    by = by or ("day" if n_days <= 14 else "week" if n_days <= 120 else "month")
+    buckets = [(label, range_minutes(history, s, e), (e - s).days + 1) for label, s, e in periods(first, last, by)]
+    top = max(m for _, m, _ in buckets) or 1
+    lines.append(f"  {DIM}by {by}{RESET}")
+    for label, m, days in buckets:
+        lines.append(f"    {label:<10} {format_time(m):>8}  {_bar(m, top, _tier_color(m / days))}")
+    lines.append(f"  {DIM}{'─' * w}{RESET}")
+
+    peak_hour = max(hours) or 1
+    heat = "".join(HEAT[min(len(HEAT) - 1, round(h / peak_hour * (len(HEAT) - 1)))] for h in hours)
+    busiest = hours.index(max(hours))
+    lines.append(f"  {DIM}hour of day{RESET}  {DIM}busiest {busiest:02d}:00{RESET}")
+    lines.append(f"    {YELLOW}{heat}{RESET}")
+    lines.append(f"    {DIM}{'0':<6}{'6':<6}{'12':<6}{'18':<5}24{RESET}")
+    lines.append(f"  {DIM}{'─' * w}{RESET}")
+
+    if apps:
+        lines.append(f"  {DIM}top apps{RESET}")
+        most = apps[0][1]
+        for name, seconds in apps:
+            lines.append(f"    {name[:10]:<10} {format_time(int(seconds // 60)):>8}  {_bar(seconds, most, CYAN)}")
+        lines.append(f"  {DIM}{'─' * w}{RESET}")
+    elapsed = (time.perf_counter() - started) * 1000
+    engine = "numpy" if np is not None else "pure python"
+    lines.append(f"  {DIM}{elapsed:.1f}ms · {engine}{RESET}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        prog="screen_shame.py report",
+        description="Summarize your recorded screen time",
+    )
+    today = date.today()
+    parser.add_argument("--from", dest="first", type=date.fromisoformat,
+                        default=today - timedelta(days=29), help="first day, YYYY-MM-DD (default: 30 days ago)")
+    parser.add_argument("--to", dest="last", type=date.fromisoformat,
+                        default=today, help="last day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--by", choices=("day", "week", "month"), help="bucket size (default: by range length)")
+    args = parser.parse_args(argv)
+    if args.last < args.first:
+        parser.error("--to is before --from")
+
+    from apps import top_apps
+
+    history = History(HISTORY_FILE)
+    try:
+        print(render(history, args.first, args.last, args.by, top_apps(APPS_DIR, args.first, args.last)))
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
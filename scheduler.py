@@ -0,0 +1,177 @@
+"""
+Deadline-driven wakeups for the philoscreen loop.
+
+Instead of waking every POLL_INTERVAL no matter what, the loop sleeps
+until the next moment that can change anything:
+
+  - the current idle streak crossing IDLE_THRESHOLD (while active),
+  - the next THRESHOLDS entry being reached,
+  - midnight rollover,
+
+and backs off sharply while the machine sits idle or locked.
+
+Accounting stays exact while active: waking no later than the moment the
+idle streak could cross the threshold means a sample that still says
+"active" proves the whole interval was active, and a sample that says
+"idle" pins down exactly when activity stopped. The only estimate left is
+the moment someone comes back during an idle back-off.
+
+Run `python3 scheduler.py` to count wakeups over a simulated day.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+IDLE_BACKOFF = 2.0          # idle sleeps grow by this factor per wakeup
+MAX_IDLE_SLEEP = 600        # seconds — longest sleep while away
+MIN_SLEEP = 1.0             # never spin
+
+
+class SystemClock:
+    """Real wall clock and sleep."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class FakeClock:
+    """Virtual clock: sleeping advances time instantly and counts wakeups."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self.wakeups = 0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+        self.wakeups += 1
+
+
+def seconds_to_midnight(now: float) -> float:
+    """Seconds from the wall-clock time `now` until the next local midnight."""
+    dt = datetime.fromtimestamp(now)
+    midnight = datetime.combine(dt.date() + timedelta(days=1), datetime.min.time())
+    return midnight.timestamp() - now
+
+
+def active_span(elapsed: float, idle: float, was_idle: bool, idle_threshold: float) -> float:
+    """Seconds of the last `elapsed` that count as active, given the idle sample now.
+
+    While active we wake before the idle streak can cross the threshold, so:
+      - still active, and active last time: the whole interval was active
+      - idle now: activity ran until the last input plus the threshold
+      - back from an idle back-off: the return moment is unknown; take the
+        midpoint, but never less than the streak the sample proves
+    """
+    if idle >= idle_threshold:
+        return min(max(idle_threshold - idle + elapsed, 0.0), elapsed)
+    if was_idle:
+        return min(max(elapsed / 2, idle), elapsed)
+    return elapsed
+
+
+def next_wakeup(now: float, idle: float, active_seconds: float, fired: list,
+                thresholds: list, idle_threshold: float, poll_interval: float,
+                last_sleep: float = 0.0) -> float:
+    """Seconds to sleep until the next moment that matters."""
+    deadlines = [seconds_to_midnight(now) + MIN_SLEEP]
+
+    if idle < idle_threshold:
+        # Earliest the current streak could go idle
+        deadlines.append(idle_threshold - idle)
+        # Earliest the next unfired tier could be reached
+        for t in thresholds:
+            if t not in fired:
+                due = t * 3600 - active_seconds
+                # A due tier still unfired: look again on the poll cadence
+                deadlines.append(due if due > 0 else poll_interval)
+                break
+    else:
+        # Away: nothing accrues, so back off geometrically
+        deadlines.append(min(max(last_sleep * IDLE_BACKOFF, poll_interval), MAX_IDLE_SLEEP))
+
+    return max(min(deadlines), MIN_SLEEP)
+
+
+# ── Simulation harness ─────────────────────────────────
+def _true_active(spans: list, idle_threshold: float, day: float) -> float:
+    """Seconds in [0, day) where idle < threshold, for continuous activity spans."""
+    total, covered = 0.0, 0.0
+    for start, end in sorted(spans):
+        start, end = max(start, covered), min(end + idle_threshold, day)
+        if end > start:
+            total += end - start
+            covered = end
+    return total
+
+
+def simulate_day(spans: list, thresholds: list, idle_threshold: float = 300,
+                 poll_interval: float = 60, fixed: bool = False) -> dict:
+    """Drive the scheduler over one virtual day and count wakeups.
+
+    `spans` are (start, end) seconds after midnight of continuous input.
+    With `fixed=True`, replays the old fixed-interval loop (+1 minute per
+    active tick) for comparison.
+    """
+    from idle import FakeIdleSource
+
+    midnight = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+    clock = FakeClock(midnight)
+    source = FakeIdleSource(lambda: clock.now - midnight, spans)
+    end = midnight + 86400
+    active, fired, last, was_idle, slept = 0.0, [], midnight, False, 0.0
+
+    while clock.now < end:
+        now = clock.time()
+        idle = source.idle_seconds()
+        if fixed:
+            active += poll_interval if idle < idle_threshold else 0
+            delay = poll_interval
+        else:
+            active += active_span(now - last, idle, was_idle, idle_threshold)
+            was_idle = idle >= idle_threshold
+            delay = next_wakeup(now, idle, active, fired, thresholds,
+                                idle_threshold, poll_interval, slept)
+        for t in thresholds:
+            if active >= t * 3600 and t not in fired:
+                fired.append(t)
+        last, slept = now, delay
+        clock.sleep(min(delay, end - now))
+
+    return {
+        "wakeups": clock.wakeups,
+        "active": active,
+        "true_active": _true_active(spans, idle_threshold, 86400),
+        "fired": fired,
+    }
+
+
+if __name__ == "__main__":
+    from messages import THRESHOLDS
+
+    h = 3600
+    # A typical laptop day: two work blocks, a lunch break, an evening session
+    workday = [(9 * h, 12.5 * h), (13.25 * h, 17.75 * h), (20 * h, 22.5 * h)]
+    # Short breaks inside the work blocks, shorter than the idle threshold
+    choppy = [(s, s + 50 * 60) for s in range(9 * h, 18 * h, h)]
+
+    for name, spans in (("workday", workday), ("choppy", choppy)):
+        old = simulate_day(spans, THRESHOLDS, fixed=True)
+        new = simulate_day(spans, THRESHOLDS)
+        print(f"{name}:")
+        for label, r in (("fixed 60s", old), ("scheduled", new)):
+            err = r["active"] - r["true_active"]
+            print(f"  {label:<10} {r['wakeups']:>5} wakeups  "
+                  f"active {r['active'] / 60:7.1f}m (truth {r['true_active'] / 60:.1f}m, "
+                  f"error {err / 60:+.1f}m)  fired {r['fired']}")
@@ -15,56 +15,32 @@ Usage:
 Resets daily at midnight.
 """
 
-import argparse
-import json
 import os
-import random
-import subprocess
 import sys
 import time
-from datetime import datetime, date
-from urllib.request import Request, urlopen
-from urllib.error import URLError
-
-from messages import TIERS, THRESHOLDS
-
-# Snarky taglines for the Slack footer — rotated randomly
-SLACK_TAGLINES = [
-    "your self-appointed screen time parole officer",
-    "the script that cares too much",
-    "judging you so you don't have to",
-    "passive-aggression as a service",
-    "your laptop's disappointed parent",
-    "screen time's least favorite app",
-]
+from collections import deque
+from datetime import date
+
+from common import (
+    APPS_DIR, BOLD, CYAN, DIM, GREEN, HISTORY_FILE, IDLE_THRESHOLD, MAGENTA, OUTBOX_FILE, POLL_INTERVAL,
+    RED, RESET, TIER_COLORS, WHITE, YELLOW, format_time, log, print_tier_alert,
+)
+from history import History
+from idle import IdleSource, probe_cost, select_idle_source
+from journal import StateJournal, fired_list, fired_mask
+from messages import THRESHOLDS
+from scheduler import SystemClock, active_span, next_wakeup
 
 # ── Config ──────────────────────────────────────────────
-POLL_INTERVAL = 60          # seconds between checks
-IDLE_THRESHOLD = 300        # seconds — under this counts as "active"
-STATE_FILE = os.path.expanduser("~/.philoscreen-state.json")
-
-# ── ANSI Colors ─────────────────────────────────────────
-RESET   = "\033[0m"
-BOLD    = "\033[1m"
-DIM     = "\033[2m"
-RED     = "\033[31m"
-GREEN   = "\033[32m"
-YELLOW  = "\033[33m"
-BLUE    = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN    = "\033[36m"
-WHITE   = "\033[37m"
-BG_RED  = "\033[41m"
-
-# Tier colors — escalating warmth
-TIER_COLORS = {
-    2:  CYAN,
-    4:  YELLOW,
-    6:  MAGENTA,
-    8:  RED,
-    10: f"{BOLD}{RED}",
-    12: f"{BOLD}{BG_RED}{WHITE}",
-}
+STATE_FILE = os.path.expanduser("~/.philoscreen-state.json")      # pre-journal format, imported once
+JOURNAL_FILE = os.path.expanduser("~/.philoscreen-state.wal")
+SNAPSHOT_FILE = os.path.expanduser("~/.philoscreen-state.snap")
+STATUS_SOCKET = os.path.expanduser("~/.philoscreen.sock")         # --status-socket default
+EVENTS_FILE = os.path.expanduser("~/.philoscreen-events.jsonl")   # --events default
+ROTATION_FILE = os.path.expanduser("~/.philoscreen-rotation")   # where each tier's no-repeat order is
+PACK_DIRS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs"), "~/.philoscreen-packs"]
+TICK_FILE = os.path.expanduser("~/.philoscreen-tick.bin")      # --tick: when the last one ran
+TICK_SEND_TIMEOUT = 20      # seconds --tick waits for alerts to land before leaving them queued
 
 BANNER = f"""{BOLD}{MAGENTA}
   ┌─────────────────────────────────────────┐
@@ -82,84 +58,159 @@ SHUTDOWN_MSG = f"""
 {DIM}─────────────────────────────────────────────{RESET}
 """
 
-# ── Slack Emoji per tier ────────────────────────────────
-TIER_EMOJI = {
-    2:  ":eyes:",
-    4:  ":sweat_smile:",
-    6:  ":grimacing:",
-    8:  ":skull:",
-    10: ":rotating_light:",
-    12: ":fire::skull::fire:",
-}
+_idle_source = None
 
 
-def log(msg: str, color: str = DIM):
-    """Print a timestamped, styled log line."""
-    ts = datetime.now().strftime("%H:%M:%S")
-    print(f"  {DIM}{ts}{RESET}  {color}{msg}{RESET}")
+def get_idle_seconds() -> float:
+    """Seconds since the last keyboard/mouse input, from the default idle source."""
+    global _idle_source
+    if _idle_source is None:
+        _idle_source = warn_if_blind(select_idle_source())
+    return _idle_source.idle_seconds()
 
 
-def get_idle_seconds() -> float:
-    """Read macOS HIDIdleTime from ioreg (nanoseconds → seconds)."""
-    try:
-        output = subprocess.check_output(
-            ["ioreg", "-c", "IOHIDSystem", "-d", "4"],
-            text=True,
-        )
-        for line in output.splitlines():
-            if "HIDIdleTime" in line and "=" in line:
-                raw = line.split("=")[-1].strip()
-                return int(raw) / 1_000_000_000
-    except (subprocess.CalledProcessError, ValueError):
-        pass
-    return 0.0
-
-
-def send_slack_message(webhook_url: str, text: str) -> bool:
-    """Post a message to a Slack Incoming Webhook."""
-    payload = json.dumps({"text": text}).encode("utf-8")
-    req = Request(webhook_url, data=payload, headers={"Content-Type": "application/json"})
-    try:
-        with urlopen(req) as resp:
-            return resp.status == 200
-    except URLError as e:
-        log(f"Slack send failed: {e}", RED)
-        return False
+def warn_if_blind(idle_source: IdleSource) -> IdleSource:
+    """Warn when the source sees no input (the "none" fallback); returns it."""
+    if idle_source.name == IdleSource.name:
+        log("No idle source works here, so every second counts as active. On Linux, "
+            "read access to /dev/input (the `input` group) fixes it.", RED)
+    return idle_source
+
+
+def on_delivery(entries: list, ok: bool, error: str):
+    """Report a background Slack delivery once it lands or is given up on."""
+    top = max(entries, key=lambda e: e.tier)
+    if ok:
+        print_tier_alert(top.tier, top.note, dry_run=False)
+    else:
+        tiers = ", ".join(f"{e.tier}h" for e in entries)
+        log(f"Couldn't send tier {tiers} ({error}) — kept in outbox", RED)
+
+
+class State:
+    """Today's counters: the day (YYYY-MM-DD), active seconds, tiers fired so far."""
+
+    __slots__ = ("date", "active_seconds", "fired_tiers")
+
+    def __init__(self, day: str, active_seconds: float = 0.0, fired_tiers: list = None):
+        self.date = day
+        self.active_seconds = active_seconds
+        self.fired_tiers = fired_tiers if fired_tiers is not None else []
+
+    def __repr__(self) -> str:
+        return f"State({self.date!r}, {self.active_seconds!r}, {self.fired_tiers!r})"
+
+
+def new_state(day: str = None) -> State:
+    """Fresh counters for a day."""
+    return State(day or str(date.today()))
+
+
+_journal = None
 
 
-def load_state() -> dict:
+def _state_journal() -> StateJournal:
+    global _journal
+    if _journal is None:
+        _journal = StateJournal(JOURNAL_FILE, SNAPSHOT_FILE)
+    return _journal
+
+
+def load_state() -> State:
     """Load persisted state (survives restarts within the same day)."""
+    recovered = _state_journal().recover()
+    if recovered is not None:
+        day, active, fired = recovered
+        if day == date.today().toordinal():
+            return State(str(date.today()), active, fired_list(fired, THRESHOLDS))
+        return new_state()
+    return _load_json_state()
+
+
+def _load_json_state() -> State:
+    """Read the JSON state file written before the journal existed."""
     if os.path.exists(STATE_FILE):
+        import json
         try:
             with open(STATE_FILE) as f:
                 state = json.load(f)
             if state.get("date") == str(date.today()):
-                return state
-        except (json.JSONDecodeError, KeyError):
+                # Older versions counted whole minutes
+                active = state["active_seconds"] if "active_seconds" in state else state.get("active_minutes", 0) * 60
+                return State(state["date"], float(active), list(state.get("fired_tiers", [])))
+        except (json.JSONDecodeError, KeyError, TypeError):
             pass
-    return {"date": str(date.today()), "active_minutes": 0, "fired_tiers": []}
+    return new_state()
+
+
+def save_state(state: State):
+    """Append the current counters to the state journal (a few bytes per tick)."""
+    _state_journal().append(
+        date.fromisoformat(state.date).toordinal(),
+        state.active_seconds,
+        fired_mask(state.fired_tiers, THRESHOLDS),
+    )
+
 
+def pick_message(tier: int, culprit: tuple = None, streak: int = 1, bank=None) -> str:
+    """The next message for the given tier, naming the (app, seconds) culprit if given.
 
-def save_state(state: dict):
-    """Persist state to disk."""
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f)
+    Messages come from the pack named by PHILOSCREEN_MESSAGES (see
+    msgbank.py), else messages.py, and don't repeat until a tier's run out.
+    `bank` is a message_bank() other than this user's own.
+    """
+    bank = bank or message_bank()
+    msg = bank.message(tier, streak)
+    if culprit:
+        app, seconds = culprit
+        msg += " " + bank.culprit(app, format_time(int(seconds // 60)))
+    return msg
 
 
-def pick_message(tier: int) -> str:
-    """Pick a random message for the given tier."""
-    return random.choice(TIERS[tier])
+def message_bank(rotation_file: str = None, save_each: bool = True):
+    """The msgbank.Bank for PHILOSCREEN_MESSAGES (else messages.py), with its rotation in ROTATION_FILE.
 
+    Team tools pass their own `rotation_file`, and save_each=False to save
+    it once per batch of picks (bank.rotation.flush()) rather than per pick.
+    """
+    from msgbank import open_bank
+    return open_bank(os.environ.get("PHILOSCREEN_MESSAGES") or None, rotation_file or ROTATION_FILE, PACK_DIRS,
+                     save_each)
 
-def format_time(minutes: int) -> str:
-    """Format minutes into a human-readable string."""
-    hours = minutes // 60
-    mins = minutes % 60
-    if hours and mins:
-        return f"{hours}h {mins}m"
-    elif hours:
-        return f"{hours}h"
-    return f"{mins}m"
+
+def release_messages():
+    """Save the message rotation and close the pack, if a message was picked."""
+    msgbank = sys.modules.get("msgbank")
+    if msgbank is not None:
+        msgbank.close_banks()
+
+
+def due_tiers(active_seconds: float, fired: int, thresholds: list = THRESHOLDS) -> list:
+    """Thresholds reached but not fired yet; `fired` is a bitmask over `thresholds` positions."""
+    hours = active_seconds / 3600
+    return [t for i, t in enumerate(thresholds) if hours >= t and not fired >> i & 1]
+
+
+def tick(state: State, now: float, elapsed: float, idle: float, was_idle: bool,
+         thresholds: list = THRESHOLDS, idle_threshold: float = IDLE_THRESHOLD,
+         elsewhere: float = 0.0, fired_elsewhere: int = 0) -> tuple:
+    """One wakeup's bookkeeping: midnight reset, active credit, tiers now due.
+
+    Returns (state, credit, due). `state` is a new State after midnight; the
+    due tiers are already marked fired. run() and trace replay both go
+    through here, so a simulation runs the daemon's own logic. With --sync,
+    `elsewhere` is today's active seconds on other devices that don't
+    overlap this one's, and `fired_elsewhere` the tiers they already fired.
+    """
+    today = str(date.fromtimestamp(now))
+    if today != state.date:
+        state = new_state(today)
+    credit = active_span(elapsed, idle, was_idle, idle_threshold)
+    state.active_seconds += credit
+    fired = fired_mask(state.fired_tiers, thresholds) | fired_elsewhere
+    due = due_tiers(state.active_seconds + elsewhere, fired, thresholds)
+    state.fired_tiers.extend(due)
+    return state, credit, due
 
 
 def progress_bar(active_minutes: int, width: int = 24) -> str:
@@ -186,9 +237,9 @@ def progress_bar(active_minutes: int, width: int = 24) -> str:
     return f"{color}{bar}{RESET} {DIM}{next_tier}h{RESET}"
 
 
-def render_status(state: dict, idle: float):
+def render_status(state: State, idle: float):
     """Print a compact, aligned status line."""
-    mins = state["active_minutes"]
+    mins = int(state.active_seconds // 60)
     bar = progress_bar(mins)
     active_str = format_time(mins)
     idle_str = f"{idle:.0f}s"
@@ -204,97 +255,412 @@ def render_status(state: dict, idle: float):
     )
 
 
-def print_startup(state: dict, dry_run: bool):
+def print_startup(state: State, dry_run: bool, idle_source: IdleSource = None, sinks: list = None):
     """Print startup info block."""
     print(BANNER)
-    mode = f"{YELLOW}dry run{RESET}" if dry_run else f"{GREEN}live → Slack{RESET}"
-    active = format_time(state["active_minutes"])
-    fired = ", ".join(f"{t}h" for t in state["fired_tiers"]) or "none"
+    if dry_run:
+        mode = f"{YELLOW}dry run{RESET}"
+    else:
+        mode = f"{GREEN}live → {', '.join(s.name for s in sinks) if sinks else 'slack'}{RESET}"
+    active = format_time(int(state.active_seconds // 60))
+    fired = ", ".join(f"{t}h" for t in state.fired_tiers) or "none"
 
     print(f"  {DIM}{'─' * 43}{RESET}")
     print(f"  {DIM}mode{RESET}      {mode}")
     print(f"  {DIM}active{RESET}    {BOLD}{active}{RESET}")
     print(f"  {DIM}fired{RESET}     {fired}")
-    print(f"  {DIM}polling{RESET}   every {POLL_INTERVAL}s")
+    print(f"  {DIM}polling{RESET}   on deadlines {DIM}(idle back-off from {POLL_INTERVAL}s){RESET}")
+    if idle_source is not None:
+        if idle_source.name == IdleSource.name:
+            print(f"  {DIM}idle src{RESET}  {RED}none — every second counts as active{RESET}")
+        else:
+            cost = probe_cost(idle_source)
+            print(f"  {DIM}idle src{RESET}  {idle_source.name} {DIM}({cost:.1f}µs/probe){RESET}")
     print(f"  {DIM}idle ≥{RESET}    {IDLE_THRESHOLD}s counts as away")
     print(f"  {DIM}{'─' * 43}{RESET}")
     print()
 
 
-def print_tier_alert(threshold: int, msg: str, dry_run: bool):
-    """Print a beautifully formatted tier alert in the terminal."""
-    color = TIER_COLORS.get(threshold, WHITE)
-    label = "DRY RUN" if dry_run else "SENT"
-
-    print()
-    print(f"  {color}{'━' * 43}{RESET}")
-    print(f"  {color}{BOLD}  ⚡ TIER {threshold}h{RESET}  {DIM}[{label}]{RESET}")
-    print(f"  {color}{'─' * 43}{RESET}")
-    # Word-wrap the message to ~39 chars
-    words = msg.split()
-    lines = []
-    current = ""
-    for word in words:
-        if len(current) + len(word) + 1 <= 39:
-            current = f"{current} {word}" if current else word
-        else:
-            lines.append(current)
-            current = word
-    if current:
-        lines.append(current)
-    for line in lines:
-        print(f"  {color}  {line}{RESET}")
-    print(f"  {color}{'━' * 43}{RESET}")
-    print()
-
-
-def run(webhook_url: str, dry_run: bool = False):
-    """Main loop: poll idle time, accumulate active minutes, fire messages."""
+def default_sinks(webhook_url: str, dry_run: bool) -> list:
+    """The terminal for a dry run, otherwise Slack."""
+    from notify import SlackSink, StdoutSink
+    if dry_run:
+        return [StdoutSink()]
+    return [SlackSink(webhook_url, OUTBOX_FILE, on_result=on_delivery)]
+
+
+def run(webhook_url: str, dry_run: bool = False, idle_source: IdleSource = None,
+        clock: SystemClock = None, sinks: list = None, metrics=None, profiler=None, sync=None,
+        apps=None, status=None, events=None, headless: bool = False):
+    """Main loop: sample idle time, accumulate active seconds, fire messages.
+
+    With `metrics` (a metrics.Metrics) or `profiler` (a profiling.Profiler),
+    each tick's timings go to them. With `sync` (a sync.Sync), tiers fire
+    on the day's total across devices. With `apps` (an apps.AppTracker),
+    active time is credited to the frontmost app and alerts name the
+    day's biggest one. With `status` (a statusapi.StatusServer), each tick's
+    counters are published to its clients. With `events` (an
+    events.EventLog), ticks, tiers and sends are logged as JSON lines.
+    `headless` skips the banner and the per-tick status line.
+    """
+    from notify import Notifier
+
+    if idle_source is None:
+        idle_source = select_idle_source()
+    if clock is None:
+        clock = SystemClock()
     state = load_state()
-    print_startup(state, dry_run)
+    if sinks is None:
+        sinks = default_sinks(webhook_url, dry_run)
+    if not headless:
+        print_startup(state, dry_run, idle_source, sinks)
+    warn_if_blind(idle_source)
+    if status is not None:
+        status.idle_source = idle_source.name
+    history = History(HISTORY_FILE)
+    notifier = Notifier(sinks, on_result=events.send_results() if events is not None else None)
+    if events is not None:
+        events.emit("start", day=state.date, active=round(state.active_seconds, 1),
+                    sinks=[sink.name for sink in sinks], idle_source=idle_source.name)
+    if metrics is not None:
+        metrics.notifier = notifier
+    if profiler is not None:
+        profiler.notifier = notifier
+        profiler.start()
+    try:
+        _loop(state, notifier, idle_source, clock, history, metrics, profiler, sync, apps, status,
+              events, headless)
+    finally:
+        if status is not None:
+            status.close()
+        if apps is not None:
+            apps.close()
+        if profiler is not None:
+            profiler.stop()
+        if sync is not None:
+            sync.close()
+        _state_journal().close()
+        history.close()
+        notifier.close()
+        release_messages()
+        if not dry_run:
+            for name, sent, failed, late, p50, p99 in notifier.summary():
+                if sent or failed:
+                    log(f"{name}: {sent} sent, {failed} failed, {late} timed out, "
+                        f"p50 {p50 * 1e3:.1f}ms p99 {p99 * 1e3:.1f}ms")
+        if events is not None:
+            events.emit("stop")
+            events.close()
+
+
+def _record(history: History, state: State, credit: float, due: list, start: float):
+    """Put a tick's active span, starting at `start`, and newly fired tiers in the history.
+
+    When the tick went idle, the activity was at the start of the interval;
+    otherwise it was at the end.
+    """
+    if credit:
+        history.mark_span(start, start + credit)
+    if due:
+        history.set_fired(date.fromisoformat(state.date).toordinal(), fired_mask(state.fired_tiers, THRESHOLDS))
+
+
+def tier_streak(history: History, day: str, tier: int) -> int:
+    """Days in a row, today included, that `tier` has been reached."""
+    bit = 1 << THRESHOLDS.index(tier)
+    today = date.fromisoformat(day).toordinal()
+    streak = 1
+    while streak < 366 and history.fired(today - streak) & bit:
+        streak += 1
+    return streak
+
+
+def _loop(state: State, notifier, idle_source: IdleSource, clock: SystemClock, history: History,
+          metrics=None, profiler=None, sync=None, apps=None, status=None, events=None, headless=False):
+    """Tick until interrupted. Never blocks on the network."""
+    from notify import Alert
+
+    # Monotonic, so suspend, clock changes and slow calls can't skew the count
+    last = clock.monotonic()
+    last_wall = clock.time()
+    was_idle = False
+    slept = 0.0
 
     while True:
-        # Reset at midnight
-        if str(date.today()) != state["date"]:
+        started = time.perf_counter()
+        now = clock.time()
+        idle = idle_source.idle_seconds()
+        probed = time.perf_counter()
+        mono = clock.monotonic()
+        day = state.date
+        elsewhere, fired_elsewhere = 0.0, 0
+        if sync is not None:
+            # Other devices' minutes as of now; ours are marked below
+            today = date.fromtimestamp(now)
+            sync.merge(str(today))
+            elsewhere = 60.0 * sync.elsewhere(history.bitmap(today.toordinal()))
+            fired_elsewhere = sync.remote_fired
+        state, credit, due = tick(state, now, mono - last, idle, was_idle,
+                                  elsewhere=elsewhere, fired_elsewhere=fired_elsewhere)
+        if state.date != day:
             log("New day — resetting counters", CYAN)
-            state = {"date": str(date.today()), "active_minutes": 0, "fired_tiers": []}
             print()
+        _record(history, state, credit, due, last_wall if idle >= IDLE_THRESHOLD else now - credit)
+        if sync is not None:
+            sync.publish(state.date, history.bitmap(date.fromisoformat(state.date).toordinal()),
+                         fired_mask(state.fired_tiers, THRESHOLDS))
+        if apps is not None:
+            apps.observe(state.date, credit)
+        was_idle = idle >= IDLE_THRESHOLD
+        last, last_wall = mono, now
+
+        # Tiers we just crossed
+        culprit = apps.culprit(state.date) if due and apps is not None else None
+        for threshold in due:
+            text = pick_message(threshold, culprit, tier_streak(history, state.date, threshold))
+            notifier.notify(Alert(threshold, state.active_seconds + elsewhere, text, state.date))
+            if events is not None:
+                events.emit("tier", day=state.date, tier=threshold,
+                            active=round(state.active_seconds + elsewhere, 1), culprit=culprit[0] if culprit else None)
+
+        notifier.poll()
+        saving = time.perf_counter()
+        save_state(state)
+        saved = time.perf_counter()
+        if status is not None:
+            status.publish(state, idle)
+        if not headless:
+            render_status(state, idle)
+        rendered = time.perf_counter()
+        if metrics is not None:
+            metrics.observe_tick(probed - started, saved - saving, rendered - started, state, idle)
+        if profiler is not None:
+            profiler.observe_tick(probed - started, saved - saving, rendered - saved, rendered - started)
+        # A tier another device fired is done here too; left out, it looks due and unfired forever
+        fired = state.fired_tiers
+        if fired_elsewhere:
+            fired = fired_list(fired_mask(fired, THRESHOLDS) | fired_elsewhere, THRESHOLDS)
+        slept = next_wakeup(
+            now, idle, state.active_seconds + elsewhere, fired,
+            THRESHOLDS, IDLE_THRESHOLD, POLL_INTERVAL, slept,
+        )
+        if events is not None:
+            events.tick(state.date, state.active_seconds, idle, credit, slept, (saved - saving) * 1e6)
+            events.poll(slept)
+        clock.sleep(slept)
 
-        idle = get_idle_seconds()
 
-        if idle < IDLE_THRESHOLD:
-            state["active_minutes"] += 1
+# ── One-shot tick ───────────────────────────────────────
+# What a resident loop keeps in local variables, kept between --tick runs:
+# last tick's wall time, whether it was idle, whether alerts are still queued
+_TICK = "<dBB"
 
-        active_hours = state["active_minutes"] / 60
 
-        # Check if we crossed a new tier
-        for threshold in THRESHOLDS:
-            if active_hours >= threshold and threshold not in state["fired_tiers"]:
-                msg = pick_message(threshold)
-                timestamp = datetime.now().strftime("%I:%M %p")
-                emoji = TIER_EMOJI.get(threshold, ":eyes:")
-                tagline = random.choice(SLACK_TAGLINES)
-                slack_msg = (
-                    f"{emoji} *Screen Time Alert — {format_time(state['active_minutes'])}*\n\n"
-                    f"{msg}\n\n"
-                    f"_{tagline} | {timestamp}_"
-                )
+def _read_tick(fd: int) -> tuple:
+    import struct
+    data = os.pread(fd, struct.calcsize(_TICK), 0)
+    if len(data) < struct.calcsize(_TICK):
+        return None, False, False
+    last, was_idle, pending = struct.unpack(_TICK, data)
+    return last, bool(was_idle), bool(pending)
 
-                if dry_run:
-                    print_tier_alert(threshold, msg, dry_run=True)
-                else:
-                    sent = send_slack_message(webhook_url, slack_msg)
-                    if sent:
-                        print_tier_alert(threshold, msg, dry_run=False)
-                    else:
-                        log(f"Failed to send tier {threshold}h — will retry", RED)
-                        continue
 
-                state["fired_tiers"].append(threshold)
+def tick_once(webhook_url: str, specs: list, idle_source: IdleSource = None,
+              clock: SystemClock = None) -> list:
+    """One sample-evaluate-persist cycle, for a timer to run every minute or so.
+
+    Returns the tiers that fired. Alerts go out only when something is due
+    (or still queued from last time), so a quiet tick imports nothing
+    beyond the basics and exits in milliseconds. A tick that finds the
+    previous one still running does nothing.
+    """
+    import fcntl
+    import struct
 
+    clock = clock or SystemClock()
+    fd = os.open(TICK_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return []
+        now = clock.time()
+        idle = (idle_source or warn_if_blind(select_idle_source())).idle_seconds()
+        last, was_idle, pending = _read_tick(fd)
+        elapsed = 0.0 if last is None else now - last
+        if not 0 <= elapsed <= IDLE_THRESHOLD:
+            # Missed ticks (asleep, timer late, clock moved): the gap is
+            # unknown, so it's treated like a return from being away
+            elapsed, was_idle = min(max(elapsed, 0.0), IDLE_THRESHOLD), True
+
+        state, credit, due = tick(load_state(), now, elapsed, idle, was_idle)
+        if credit:
+            history = History(HISTORY_FILE)
+            _record(history, state, credit, due, now - elapsed if idle >= IDLE_THRESHOLD else now - credit)
+            history.close()
         save_state(state)
-        render_status(state, idle)
-        time.sleep(POLL_INTERVAL)
+        _state_journal().close()
+
+        if due or pending:
+            pending = _send_once(state, due, webhook_url, specs)
+        os.pwrite(fd, struct.pack(_TICK, now, idle >= IDLE_THRESHOLD, pending), 0)
+        return due
+    finally:
+        os.close(fd)
+
+
+def _send_once(state: State, due: list, webhook_url: str, specs: list) -> bool:
+    """Hand the due alerts to the sinks and wait for them. True if some are still queued."""
+    from notify import Alert, Notifier, parse_sinks
+
+    sinks = parse_sinks(specs, webhook_url, on_slack_result=on_delivery, outbox_path=OUTBOX_FILE)
+    notifier = Notifier(sinks)
+    if due:
+        history = History(HISTORY_FILE)
+        for threshold in due:
+            text = pick_message(threshold, streak=tier_streak(history, state.date, threshold))
+            notifier.notify(Alert(threshold, state.active_seconds, text, state.date))
+        history.close()
+        release_messages()
+    notifier.flush(TICK_SEND_TIMEOUT)
+    pending = False
+    for sink in sinks:
+        delivery = getattr(sink, "delivery", None)
+        if delivery is not None:
+            delivery.flush(TICK_SEND_TIMEOUT)
+            pending = pending or len(sink.drainer.outbox) > 0
+    notifier.close()
+    return pending
+
+
+# ── Lean daemon ─────────────────────────────────────────
+EXIT_PENDING = 3            # --send: some alerts are still in the outbox
+
+
+class _ChildSender:
+    """Sends alerts from short-lived `--send` children so the daemon never loads the sinks.
+
+    One child at a time, since each one drains the whole outbox; alerts
+    that come due meanwhile wait for it. A child that exits with
+    EXIT_PENDING left alerts in the outbox, so once it's gone the next
+    poll() starts one that only drains.
+    """
+
+    def __init__(self, webhook_url: str, specs: list):
+        self.specs = specs
+        self.env = dict(os.environ, PHILOSCREEN_WEBHOOK=webhook_url) if webhook_url else dict(os.environ)
+        self.child = None
+        self.waiting = deque()
+        self.pending = False
+
+    def send(self, state: State, due: list):
+        self.waiting.append([state.date, repr(state.active_seconds), ",".join(map(str, due))])
+        self.poll()
+
+    def poll(self):
+        """Reap the child if it's done and start the next one. Never blocks."""
+        if self.child is not None:
+            try:
+                done, status = os.waitpid(self.child, os.WNOHANG)
+            except ChildProcessError:
+                done, status = self.child, 0
+            if not done:
+                return
+            self.child = None
+            if os.WIFEXITED(status) and os.WEXITSTATUS(status) == EXIT_PENDING:
+                self.pending = True
+        if self.waiting or self.pending:
+            self._spawn(self.waiting.popleft() if self.waiting else [])
+
+    def _spawn(self, args: list):
+        argv = [sys.executable, os.path.abspath(__file__), "--send", *args]
+        for spec in self.specs:
+            argv += ["--sink", spec]
+        try:
+            self.child = os.posix_spawn(sys.executable, argv, self.env)
+            self.pending = False
+        except OSError as e:
+            log(f"Couldn't start a sender ({e}) — will retry", RED)
+            if args:
+                self.waiting.appendleft(args)
+
+
+def run_lean(webhook_url: str, dry_run: bool = False, specs: list = None,
+             idle_source: IdleSource = None, clock: SystemClock = None):
+    """The daemon with only the counters, the journal and the history resident.
+
+    No banner, status line or metrics, and no sinks: alerts go out through
+    `--send` children (see _ChildSender). A dry run prints them here. The
+    message text is imported for an alert and dropped again after it.
+    """
+    sys.modules.pop("messages", None)
+    idle_source = warn_if_blind(idle_source or select_idle_source())
+    clock = clock or SystemClock()
+    sender = None if dry_run else _ChildSender(webhook_url, specs or ["slack"])
+    state = load_state()
+    history = History(HISTORY_FILE)
+    log(f"philoscreen (lean) — {format_time(int(state.active_seconds / 60))} so far today", CYAN)
+
+    last = clock.monotonic()
+    last_wall = clock.time()
+    was_idle = False
+    slept = 0.0
+    try:
+        while True:
+            now = clock.time()
+            idle = idle_source.idle_seconds()
+            mono = clock.monotonic()
+            state, credit, due = tick(state, now, mono - last, idle, was_idle)
+            _record(history, state, credit, due, last_wall if idle >= IDLE_THRESHOLD else now - credit)
+            was_idle = idle >= IDLE_THRESHOLD
+            last, last_wall = mono, now
+
+            if due:
+                if sender is None:
+                    for threshold in due:
+                        text = pick_message(threshold, streak=tier_streak(history, state.date, threshold))
+                        print_tier_alert(threshold, text, dry_run=True)
+                    release_messages()
+                    sys.modules.pop("messages", None)
+                else:
+                    sender.send(state, due)
+            elif sender is not None:
+                sender.poll()
+            save_state(state)
+            slept = next_wakeup(
+                now, idle, state.active_seconds, state.fired_tiers,
+                THRESHOLDS, IDLE_THRESHOLD, POLL_INTERVAL, slept,
+            )
+            clock.sleep(slept)
+    finally:
+        _state_journal().close()
+        history.close()
+
+
+def _plain_argv(argv: list, mode: str):
+    """(webhook, dry run, sinks) if argv is just `mode` plus those flags, else None.
+
+    Lets a timer-driven --tick or a --lean daemon skip argparse, which
+    costs more to import than the rest of a tick.
+    """
+    webhook, dry_run, sinks = None, False, []
+    args = iter(argv)
+    for arg in args:
+        if arg == mode:
+            continue
+        if arg == "--dry-run":
+            dry_run = True
+        elif arg in ("--webhook", "--sink"):
+            value = next(args, None)
+            if value is None:
+                return None
+            if arg == "--webhook":
+                webhook = value
+            else:
+                sinks.append(value)
+        else:
+            return None
+    return webhook, dry_run, sinks
 
 
 def print_test_success():
@@ -307,60 +673,297 @@ def print_test_success():
     print()
 
 
+def find_webhook(explicit: str = None) -> str:
+    """The webhook from the flag, the environment or the .env file, in that order."""
+    webhook_url = (
+        explicit
+        or os.environ.get("PHILOSCREEN_WEBHOOK", "")
+        or os.environ.get("SCREEN_SHAME_WEBHOOK", "")  # backward compat
+    )
+
+    # Auto-load from .env file if no webhook provided
+    if not webhook_url:
+        env_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+        if os.path.exists(env_file):
+            with open(env_file) as f:
+                for line in f:
+                    if line.startswith("PHILOSCREEN_WEBHOOK=") or line.startswith("SCREEN_SHAME_WEBHOOK="):
+                        webhook_url = line.split("=", 1)[1].strip()
+                        break
+    return webhook_url
+
+
+def _plain_specs(mode: str, webhook_url: str, dry_run: bool, sinks: list) -> list:
+    specs = ["stdout"] if dry_run else sinks or ["slack"]
+    if "slack" in specs and not webhook_url:
+        print(f"{RED}Error:{RESET} {mode} needs a webhook (--webhook, PHILOSCREEN_WEBHOOK or .env) or --dry-run",
+              file=sys.stderr)
+        sys.exit(1)
+    return specs
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _main_tick(webhook_url: str, dry_run: bool, sinks: list):
+    specs = _plain_specs("--tick", webhook_url, dry_run, sinks)
+    try:
+        tick_once(webhook_url, specs)
+    except (ValueError, OSError) as e:
+        print(f"{RED}Error:{RESET} {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _main_lean(webhook_url: str, dry_run: bool, sinks: list):
+    specs = _plain_specs("--lean", webhook_url, dry_run, sinks)
+    try:
+        run_lean(webhook_url, dry_run, specs)
+    except KeyboardInterrupt:
+        log("philoscreen stopped.", GREEN)
+
+
+def _main_send(argv: list):
+    """`--send [DAY ACTIVE TIERS] [--sink SPEC]...`, run by a lean daemon.
+
+    Delivers the alerts (or, with no DAY, only what's queued in the
+    outbox) and exits with EXIT_PENDING if some are still queued.
+    """
+    sinks = [argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg == "--sink"]
+    if argv[:1] and argv[0] != "--sink":
+        day, active, tiers = argv[:3]
+        state = State(day, float(active))
+        due = [int(t) for t in tiers.split(",") if t]
+    else:
+        state, due = new_state(), []
+    webhook_url = find_webhook()
+    try:
+        pending = _send_once(state, due, webhook_url, sinks or ["slack"])
+    except (ValueError, OSError) as e:
+        print(f"{RED}Error:{RESET} {e}", file=sys.stderr)
+        sys.exit(1)
+    if pending:
+        sys.exit(EXIT_PENDING)
+
+
 def main():
+    for mode, entry in (("--tick", _main_tick), ("--lean", _main_lean)):
+        if mode in sys.argv:
+            plain = _plain_argv(sys.argv[1:], mode)
+            if plain is not None:
+                webhook, dry_run, sinks = plain
+                entry(find_webhook(webhook), dry_run, sinks)
+                return
+    if sys.argv[1:2] == ["--send"]:
+        _main_send(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["report"]:
+        import report
+        report.main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["evaluate"]:
+        import evaluate
+        evaluate.main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["status"]:
+        import statusapi
+        statusapi.main(sys.argv[2:], STATUS_SOCKET)
+        return
+    if sys.argv[1:2] == ["trace"]:
+        import idletrace
+        idletrace.main(sys.argv[2:])
+        return
+
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Passive-aggressive screen time monitor",
         formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog=f"""
+        epilog="""
 examples:
   %(prog)s --dry-run              Run locally, print messages to terminal
   %(prog)s --webhook URL          Run with Slack integration
   %(prog)s --webhook URL --test   Send a test message and exit
+  %(prog)s --sink slack --sink jsonl=~/shame.jsonl
+                                  Slack, plus a local log of every alert
+  %(prog)s --tick                 One tick and exit, for a launchd/systemd timer
+  %(prog)s --lean                 Daemon with the smallest footprint: no status line,
+                                  alerts sent from a short-lived child
+  %(prog)s --metrics-port 9464    Also serve Prometheus/OpenMetrics on localhost
+  %(prog)s --sync ~/Dropbox/philoscreen
+                                  Fire tiers on the total across your devices
+  %(prog)s --headless --events    No terminal output per tick; JSON lines to
+                                  ~/.philoscreen-events.jsonl instead (for launchd)
+  %(prog)s --messages team        Alert text from packs/team.txt, never the same
+                                  message twice until a tier's run out
+  %(prog)s --status-socket        Serve today's time to status bars on ~/.philoscreen.sock
+  %(prog)s status --watch         Print it, and again each time it changes
+  %(prog)s report --from 2026-01-01 --to 2026-03-31
+                                  Totals, streaks and heatmap from your history
+  %(prog)s evaluate --state-dir DIR --workers 8
+                                  One-shot tier check over a team's state files
+  %(prog)s trace simulate DIR --idle-threshold 180,300,600
+                                  Replay recorded idle traces to tune the tiers
         """,
     )
     parser.add_argument("--webhook", help="Slack Incoming Webhook URL")
     parser.add_argument("--dry-run", action="store_true", help="Print messages to stdout instead of Slack")
+    parser.add_argument("--sink", action="append", metavar="SPEC",
+                        help="where alerts go, repeatable: slack[=URL], webhook=URL, jsonl=PATH, stdout "
+                             "(default: slack)")
     parser.add_argument("--test", action="store_true", help="Send a single test message and exit")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve OpenMetrics on localhost:PORT/metrics")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="write cProfile stats and tracemalloc snapshots to DIR every few ticks")
+    parser.add_argument("--profile-every", type=int, metavar="N", default=12,
+                        help="ticks between --profile snapshots (default: 12)")
+    parser.add_argument("--sync", metavar="DIR",
+                        help="shared directory (Dropbox, Syncthing, …) for combining time across devices")
+    parser.add_argument("--device", metavar="NAME",
+                        help="this device's name in the --sync directory (default: the hostname)")
+    parser.add_argument("--status-socket", metavar="PATH", nargs="?", const=STATUS_SOCKET,
+                        help=f"serve today's time on a Unix socket for status bars (default: {STATUS_SOCKET})")
+    parser.add_argument("--headless", action="store_true",
+                        help="no banner or per-tick status line, for running under launchd/systemd")
+    parser.add_argument("--events", metavar="PATH", nargs="?", const=EVENTS_FILE,
+                        help=f"log ticks, tiers and sends as JSON lines (default: {EVENTS_FILE})")
+    parser.add_argument("--events-max-mb", type=float, metavar="MB", default=8.0,
+                        help="rotate the --events file past this size (default: 8)")
+    parser.add_argument("--events-gzip", action="store_true", help="gzip rotated --events files")
+    parser.add_argument("--messages", metavar="PACK",
+                        help="a message pack file, or a pack name in packs/ or ~/.philoscreen-packs/ "
+                             "(default: messages.py; or set PHILOSCREEN_MESSAGES)")
+    parser.add_argument("--no-apps", action="store_true",
+                        help="don't record which app is in front (per-app totals and roasts)")
+    parser.add_argument("--tick", action="store_true",
+                        help="run one tick and exit, for launchd StartInterval or a systemd timer")
+    parser.add_argument("--lean", action="store_true",
+                        help="keep as little resident as possible: no status line, alerts sent from a child")
     args = parser.parse_args()
+    if args.messages:
+        # The environment, so --send children and --tick runs pick from it too
+        os.environ["PHILOSCREEN_MESSAGES"] = args.messages
+        from msgbank import Pack, find_pack
+        try:
+            Pack(find_pack(args.messages, PACK_DIRS)).close()
+        except (ValueError, OSError) as e:
+            print(f"\n  {RED}Error:{RESET} {e}\n", file=sys.stderr)
+            sys.exit(1)
+    if args.tick or args.lean:
+        # Both keep nothing resident beyond the counters; --headless and
+        # --no-apps already hold for them, everything else would be ignored
+        if args.tick and args.lean:
+            parser.error("--tick and --lean are alternatives; pick one")
+        mode = "--tick" if args.tick else "--lean"
+        unsupported = [flag for flag, given in (
+            ("--test", args.test), ("--metrics-port", args.metrics_port),
+            ("--profile", args.profile), ("--sync", args.sync), ("--status-socket", args.status_socket),
+            ("--events", args.events),
+        ) if given]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} can't be combined with {mode}; "
+                         f"run the full daemon for that")
+    if args.tick:
+        _main_tick(find_webhook(args.webhook), args.dry_run, args.sink)
+        return
+    if args.lean:
+        _main_lean(find_webhook(args.webhook), args.dry_run, args.sink)
+        return
 
-    webhook_url = (
-        args.webhook
-        or os.environ.get("PHILOSCREEN_WEBHOOK", "")
-        or os.environ.get("SCREEN_SHAME_WEBHOOK", "")  # backward compat
-    )
+    from notify import parse_sinks
 
-    # Auto-load from .env file if no webhook provided
-    if not webhook_url:
-        env_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
-        if os.path.exists(env_file):
-            with open(env_file) as f:
-                for line in f:
-                    if line.startswith("PHILOSCREEN_WEBHOOK=") or line.startswith("SCREEN_SHAME_WEBHOOK="):
-                        webhook_url = line.split("=", 1)[1].strip()
-                        break
+    webhook_url = find_webhook(args.webhook)
+    specs = ["stdout"] if args.dry_run else args.sink or ["slack"]
+    if "slack" in specs and not webhook_url:
+        print(f"\n  {RED}Error:{RESET} provide --webhook URL or set SCREEN_SHAME_WEBHOOK")
+        print(f"  {DIM}Or use --dry-run to judge yourself locally.{RESET}\n")
+        sys.exit(1)
+    metrics = None
+    on_result = on_delivery
+    if args.metrics_port and not args.test:
+        from metrics import Metrics
+        metrics = Metrics()
+        on_result = metrics.slack_results(on_delivery)
+    try:
+        sinks = parse_sinks(specs, webhook_url, on_slack_result=on_result, outbox_path=OUTBOX_FILE)
+    except (ValueError, OSError) as e:
+        print(f"\n  {RED}Error:{RESET} {e}\n", file=sys.stderr)
+        sys.exit(1)
 
     if args.test:
-        if not webhook_url:
-            print(f"\n  {RED}Error: provide --webhook or set PHILOSCREEN_WEBHOOK{RESET}\n", file=sys.stderr)
-            sys.exit(1)
         msg = ":wave: *philoscreen test* — If you're reading this, the roasting pipeline is operational. Prepare to be judged."
-        if send_slack_message(webhook_url, msg):
+        failed = [s.name for s in sinks if not s.test(msg)]
+        for sink in sinks:
+            sink.close()
+        if not failed:
             print_test_success()
         else:
-            print(f"\n  {RED}Failed to send test message.{RESET}\n", file=sys.stderr)
+            print(f"\n  {RED}Failed to send test message to {', '.join(failed)}.{RESET}\n", file=sys.stderr)
             sys.exit(1)
         return
 
-    if not webhook_url and not args.dry_run:
-        print(f"\n  {RED}Error:{RESET} provide --webhook URL or set SCREEN_SHAME_WEBHOOK")
-        print(f"  {DIM}Or use --dry-run to judge yourself locally.{RESET}\n")
-        sys.exit(1)
+    if metrics is not None:
+        from metrics import serve_metrics
+        try:
+            serve_metrics(metrics, args.metrics_port)
+        except OSError as e:
+            print(f"\n  {RED}Error:{RESET} can't serve metrics on port {args.metrics_port}: {e}\n", file=sys.stderr)
+            sys.exit(1)
+
+    profiler = None
+    if args.profile and not args.test:
+        from profiling import Profiler
+        profiler = Profiler(args.profile, args.profile_every)
+        log(f"Profiling into {profiler.directory} every {args.profile_every} ticks", CYAN)
+
+    sync = None
+    if args.sync and not args.test:
+        from sync import Sync
+        try:
+            sync = Sync(args.sync, args.device)
+        except OSError as e:
+            print(f"\n  {RED}Error:{RESET} can't use {args.sync} for --sync: {e}\n", file=sys.stderr)
+            sys.exit(1)
+        log(f"Syncing as {sync.device!r} through {sync.directory}", CYAN)
+
+    apps = None
+    if not args.no_apps and not args.test:
+        from apps import AppTracker, AppUsage, select_window_source
+        source = select_window_source()
+        if source.name != "none":
+            apps = AppTracker(source, AppUsage(APPS_DIR))
+            log(f"Tracking apps via {source.name}", CYAN)
+
+    status = None
+    if args.status_socket and not args.test:
+        from statusapi import StatusServer
+        try:
+            status = StatusServer(args.status_socket).start()
+        except OSError as e:
+            print(f"\n  {RED}Error:{RESET} can't serve {args.status_socket}: {e}\n", file=sys.stderr)
+            sys.exit(1)
+
+    events = None
+    if args.events and not args.test:
+        from events import EventLog
+        try:
+            events = EventLog(args.events, max_bytes=int(args.events_max_mb * 2**20), compress=args.events_gzip)
+        except OSError as e:
+            print(f"\n  {RED}Error:{RESET} can't write {args.events}: {e}\n", file=sys.stderr)
+            sys.exit(1)
 
+    # launchd and systemd stop the daemon with SIGTERM: shut down as Ctrl-C does, so run() saves and flushes
+    import signal
+    signal.signal(signal.SIGTERM, _interrupt)
     try:
-        run(webhook_url, dry_run=args.dry_run)
+        run(webhook_url, dry_run=args.dry_run, sinks=sinks, metrics=metrics, profiler=profiler, sync=sync,
+            apps=apps, status=status, events=events, headless=args.headless)
     except KeyboardInterrupt:
         print(SHUTDOWN_MSG)
 
 
 if __name__ == "__main__":
+    # The tools that still import this module (evaluate, server, idletrace, …) get this copy, not a second one
+    sys.modules.setdefault("screen_shame", sys.modules[__name__])
     main()
@@ -0,0 +1,461 @@
+"""
+philoscreen team server: one process, many people.
+
+Instead of one `run()` loop per laptop, each machine sends a tiny UDP
+heartbeat and a single asyncio process keeps everyone's counters and
+fires the same THRESHOLDS/TIERS escalation as the solo daemon.
+
+Heartbeat datagrams are ASCII lines, several per datagram if you like:
+
+    <user id> <idle seconds> [<unix timestamp>]\\n
+
+Usage:
+    python3 server.py serve [--port 47620] [--webhook URL | --dry-run]
+    python3 server.py loadgen --users 10000 --seconds 10
+    python3 server.py bench --users 10000           (both, with numbers)
+
+A client can be a shell one-liner on a timer:
+    echo "$USER $(idle-seconds)" | nc -u -w0 server 47620
+
+Per-user state lives in parallel arrays indexed by a small integer id,
+so memory grows with the roster and not with traffic. Tiers fire from a
+timer wheel keyed by each session's projected time to its next tier, so
+a tick only looks at the sessions that are actually due.
+
+    python3 server.py ticks --sessions 1000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import socket
+import sys
+import time
+from array import array
+from datetime import date
+
+from messages import THRESHOLDS
+from scheduler import active_span, seconds_to_midnight
+from common import (
+    BOLD, CYAN, DIM, IDLE_THRESHOLD, RESET, TIER_COLORS, WHITE,
+    format_time, log, slack_alert,
+)
+from screen_shame import due_tiers, message_bank, pick_message
+from timerwheel import TimerWheel
+
+HEARTBEAT_PORT = 47620
+OUTBOX_FILE = os.path.expanduser("~/.philoscreen-server-outbox.db")       # the team's alerts, not yours
+ROTATION_FILE = os.path.expanduser("~/.philoscreen-server-rotation")   # the team's message order, not yours
+STATS_EVERY = 10            # seconds between stats lines
+TICK = 1.0                  # seconds between tier checks
+DRAIN_EVERY = 60.0          # seconds between outbox drains when no tier fired (retries)
+TIER_SECONDS = [t * 3600 for t in THRESHOLDS]
+
+
+class Roster:
+    """Everyone's counters as parallel arrays, indexed by a small int per user.
+
+    Each session with an unfired tier ahead and a live, non-idle heartbeat
+    has exactly one timer: the second its active time would cross that
+    tier if it stays active. Heartbeats only file a timer when there is
+    none; tick() checks the sessions whose timer came due, fires what they
+    have crossed and re-files the ones that were idle along the way.
+    """
+
+    __slots__ = ("index", "names", "active", "seen", "stamp", "idle_flags", "fired",
+                 "due", "wheel")
+
+    def __init__(self, now: float = None):
+        self.index = {}             # user id → slot
+        self.names = []             # slot → user id
+        self.active = array("d")    # active seconds today
+        self.seen = array("d")      # monotonic time of the last heartbeat
+        self.stamp = array("d")     # sender's timestamp on the last heartbeat
+        self.idle_flags = bytearray()
+        self.fired = array("I")     # bitmask over THRESHOLDS positions
+        self.due = array("q")       # second the session's timer is filed under, 0: none
+        self.wheel = TimerWheel(time.monotonic() if now is None else now)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def slot(self, user: str) -> int:
+        i = self.index.get(user)
+        if i is None:
+            i = self.index[user] = len(self.names)
+            self.names.append(user)
+            self.active.append(0.0)
+            self.seen.append(-1.0)
+            self.stamp.append(0.0)
+            self.idle_flags.append(0)
+            self.fired.append(0)
+            self.due.append(0)
+        return i
+
+    def heartbeat(self, i: int, idle: float, stamp: float, now: float):
+        """Account one heartbeat for slot `i`."""
+        if stamp and stamp < self.stamp[i]:
+            return                  # reordered datagram
+        self.stamp[i] = stamp
+        last = self.seen[i]
+        self.seen[i] = now
+        # First contact, or a gap too long to vouch for: count from here
+        if 0 <= now - last <= IDLE_THRESHOLD:
+            self.active[i] += active_span(now - last, idle, bool(self.idle_flags[i]), IDLE_THRESHOLD)
+        self.idle_flags[i] = idle >= IDLE_THRESHOLD
+        if not self.due[i]:
+            self._schedule(i, now)
+
+    def projected(self, i: int, now: float) -> float:
+        """Active seconds at `now`, counting the span since the last heartbeat if it's live."""
+        since = now - self.seen[i]
+        if self.idle_flags[i] or not 0 <= since <= IDLE_THRESHOLD:
+            return self.active[i]
+        return self.active[i] + since
+
+    def _schedule(self, i: int, now: float):
+        mask = self.fired[i]
+        tier = (~mask & (mask + 1)).bit_length() - 1      # lowest unfired
+        if tier >= len(TIER_SECONDS) or self.idle_flags[i] or not 0 <= now - self.seen[i] <= IDLE_THRESHOLD:
+            return                  # nothing left, or nothing moving: the next heartbeat files it
+        when = math.ceil(now + TIER_SECONDS[tier] - self.projected(i, now))
+        self.due[i] = when
+        self.wheel.schedule(when, i)
+
+    def tick(self, now: float) -> list:
+        """(slot, threshold, active seconds) for every tier crossed by `now`."""
+        out = []
+        for i in self.wheel.advance(now):
+            self.due[i] = 0
+            active = self.projected(i, now)
+            for t in due_tiers(active, self.fired[i]):
+                self.fired[i] |= 1 << THRESHOLDS.index(t)
+                out.append((i, t, active))
+            self._schedule(i, now)
+        return out
+
+    def reset(self):
+        """Midnight: everyone starts over, the roster stays."""
+        n = len(self.names)
+        self.active = array("d", bytes(8 * n))
+        self.fired = array("I", bytes(4 * n))
+        self.due = array("q", bytes(8 * n))
+        self.wheel.clear()
+
+
+class HeartbeatServer(asyncio.DatagramProtocol):
+    """Parses heartbeats into the roster; hands each TICK's crossed tiers to `notify` as one list."""
+
+    def __init__(self, roster: Roster, notify):
+        self.roster = roster
+        self.notify = notify
+        self.received = 0
+        self.rejected = 0
+
+    def datagram_received(self, data: bytes, addr):
+        now = time.monotonic()
+        roster = self.roster
+        for line in data.split(b"\n"):
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                user = parts[0].decode()
+                idle = float(parts[1])
+                stamp = float(parts[2]) if len(parts) > 2 else 0.0
+            except (IndexError, ValueError, UnicodeDecodeError):
+                self.rejected += 1
+                continue
+            self.received += 1
+            roster.heartbeat(roster.slot(user), idle, stamp, now)
+
+    def tick(self, now: float):
+        names = self.roster.names
+        alerts = [(names[i], t, active) for i, t, active in self.roster.tick(now)]
+        if alerts:
+            self.notify(alerts)
+
+
+def rss_kib() -> int:
+    """Current resident set size in KiB (Linux), falling back to the peak."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class Dispatcher:
+    """Turns each tick's crossed tiers into alerts, on a worker thread of its own.
+
+    Picking messages, the outbox transaction, saving the rotation and
+    draining are all file work, and on the event loop they'd hold up
+    heartbeats for longer the bigger the backlog. One worker keeps ticks in
+    order and the message bank on one thread.
+    """
+
+    def __init__(self, webhook_url: str, dry_run: bool, outbox_path: str = OUTBOX_FILE,
+                 rotation_file: str = ROTATION_FILE):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.webhook_url = webhook_url
+        # A tier burst picks thousands of messages: the rotation is saved once per batch
+        self.bank = message_bank(rotation_file, save_each=False)
+        self.drainer = None
+        if not dry_run:
+            from delivery import Delivery
+            from outbox import Drainer, Outbox, by_user
+            self.drainer = Drainer(Outbox(outbox_path), Delivery().start(), group_by=by_user)
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="philoscreen-dispatch")
+
+    def submit(self, alerts: list):
+        """Queue one tick's (user, threshold, active seconds) alerts; never blocks. [] just drains."""
+        return self._worker.submit(self._send, alerts)
+
+    def _send(self, alerts: list):
+        bank = self.bank
+        if self.drainer is None:
+            for user, threshold, active in alerts:
+                log(f"{user} hit {threshold}h ({format_time(int(active // 60))}): "
+                    f"{pick_message(threshold, bank=bank)}", TIER_COLORS.get(threshold, WHITE))
+            bank.rotation.flush()
+            return
+        if alerts:
+            day, now = str(date.today()), time.time()
+            self.drainer.outbox.enqueue_many([
+                (self.webhook_url, slack_alert(threshold, active, f"*{user}* — {pick_message(threshold, bank=bank)}"),
+                 day, threshold, user, now)
+                for user, threshold, active in alerts
+            ])
+            bank.rotation.flush()
+        self.drainer.drain()
+
+    def close(self):
+        self._worker.shutdown(wait=True)
+        self.bank.rotation.flush()
+        if self.drainer is not None:
+            self.drainer.delivery.stop()
+            self.drainer.outbox.close()
+
+
+async def serve(host: str, port: int, webhook_url: str, dry_run: bool, stats: bool = True,
+                ready=None, stop: asyncio.Event = None) -> HeartbeatServer:
+    """Run until cancelled or `stop` is set. `ready(server, port)` fires once bound."""
+    loop = asyncio.get_running_loop()
+    stop = stop or asyncio.Event()
+    roster = Roster()
+    dispatcher = Dispatcher(webhook_url, dry_run)
+    server = HeartbeatServer(roster, dispatcher.submit)
+    transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=(host, port))
+    sock = transport.get_extra_info("socket")
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+    port = transport.get_extra_info("sockname")[1]
+    log(f"Listening for heartbeats on udp://{host}:{port}", CYAN)
+
+    def rollover():
+        log("New day — resetting counters", CYAN)
+        roster.reset()
+        loop.call_later(seconds_to_midnight(time.time()) + 1, rollover)
+    loop.call_later(seconds_to_midnight(time.time()) + 1, rollover)
+
+    def tick():
+        server.tick(time.monotonic())
+        loop.call_later(TICK, tick)
+    loop.call_later(TICK, tick)
+
+    def drain():
+        dispatcher.submit([])       # what failed earlier, once its back-off is over
+        loop.call_later(DRAIN_EVERY, drain)
+    loop.call_later(DRAIN_EVERY, drain)
+
+    if ready is not None:
+        ready(server, port)
+    try:
+        last, count = time.monotonic(), 0
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), STATS_EVERY)
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            if stats and now - last >= STATS_EVERY:
+                rate = (server.received - count) / (now - last)
+                log(f"{len(roster)} users  {rate:,.0f} heartbeats/s  rss {rss_kib() // 1024} MiB"
+                    f"  rejected {server.rejected}")
+                last, count = now, server.received
+    finally:
+        transport.close()
+        dispatcher.close()
+    return server
+
+
+# ── Load generator ─────────────────────────────────────
+def loadgen(host: str, port: int, users: int, seconds: float, rate: float = 0,
+            per_datagram: int = 32) -> int:
+    """Send heartbeats for `users` synthetic people at `rate` lines/s (0: flat out).
+
+    Returns lines sent.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    names = [f"user{i:06d}" for i in range(users)]
+    start = time.monotonic()
+    deadline = start + seconds
+    sent, i = 0, 0
+    while True:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        if rate:
+            ahead = start + sent / rate - now
+            if ahead > 0:
+                time.sleep(ahead)
+        stamp = time.time()
+        lines = []
+        for _ in range(per_datagram):
+            # Mostly active, some idle, so every code path gets exercised
+            idle = 12.0 if i % 7 else IDLE_THRESHOLD + 60.0
+            lines.append(f"{names[i % users]} {idle} {stamp:.3f}")
+            i += 1
+        try:
+            sock.sendto("\n".join(lines).encode(), (host, port))
+            sent += per_datagram
+        except OSError:
+            time.sleep(0.001)
+    sock.close()
+    return sent
+
+
+def bench(users: int, seconds: float, rate: float):
+    """Server on this process's event loop, load generator in a subprocess."""
+    import subprocess
+
+    async def main():
+        stop = asyncio.Event()
+        bound = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(serve("127.0.0.1", 0, "", True, stats=False, stop=stop,
+                                         ready=lambda s, p: bound.set_result((s, p))))
+        server, port = await bound
+        rss_before = rss_kib()
+        t = time.monotonic()
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), "loadgen", "--port", str(port),
+            "--users", str(users), "--seconds", str(seconds), "--rate", str(rate),
+            stdout=subprocess.PIPE,
+        )
+        out, _ = await proc.communicate()
+        await asyncio.sleep(0.2)
+        elapsed = time.monotonic() - t
+        stop.set()
+        await task
+        sent = int(out.split()[-1])
+        print(f"  users          {len(server.roster):,}")
+        print(f"  heartbeats     {server.received:,} processed / {sent:,} sent "
+              f"({server.received / max(sent, 1):.0%})")
+        print(f"  throughput     {server.received / elapsed:,.0f} heartbeats/s on one core"
+              f" {DIM}(offered {'flat out' if not rate else f'{rate:,.0f}/s'}){RESET}")
+        print(f"  rss            {rss_before // 1024} → {rss_kib() // 1024} MiB")
+
+    asyncio.run(main())
+
+
+# ── Tier-check benchmark ───────────────────────────────
+def _seed_roster(n: int, now: float, seed: int = 7) -> Roster:
+    """`n` live, active sessions spread over the first eight hours of a day."""
+    import random
+    rng = random.Random(seed)
+    roster = Roster(now)
+    for k in range(n):
+        i = roster.slot(f"user{k:07d}")
+        roster.active[i] = rng.uniform(0, 8 * 3600)
+        roster.fired[i] = (1 << sum(roster.active[i] >= s for s in TIER_SECONDS)) - 1
+        roster.seen[i] = now
+        roster._schedule(i, now)
+    return roster
+
+
+def _scan_tick(roster: Roster, fired_tiers: list, now: float) -> list:
+    """The per-session loop the solo daemon uses, run over every session."""
+    out = []
+    for i in range(len(roster.names)):
+        hours = roster.projected(i, now) / 3600
+        fired = fired_tiers[i]
+        for threshold in THRESHOLDS:
+            if hours >= threshold and threshold not in fired:
+                fired.append(threshold)
+                out.append((i, threshold))
+    return out
+
+
+def tick_bench(sizes: list, window: int = 240):
+    """Per-tick cost of the wheel against scanning every session, at each size."""
+    print(f"\n  {BOLD}{WHITE}tier check per 1s tick{RESET}  {DIM}(all sessions active, "
+          f"{window}s window){RESET}")
+    print(f"  {DIM}{'sessions':>10}  {'scan':>10}  {'wheel':>10}  {'speedup':>8}  fired{RESET}")
+    for n in sizes:
+        start = 1_000_000.0
+        roster = _seed_roster(n, start)
+        fired_tiers = [[t for t in THRESHOLDS if a >= t * 3600] for a in roster.active]
+        # Scanning is slow at size: time a few ticks, or the whole window when it's cheap
+        scan_ticks = window if n <= 10_000 else 3
+        scanned = []
+        t = time.perf_counter()
+        for s in range(1, scan_ticks + 1):
+            scanned += _scan_tick(roster, fired_tiers, start + s)
+        scan = (time.perf_counter() - t) / scan_ticks
+        fired = []
+        t = time.perf_counter()
+        for s in range(1, window + 1):
+            fired += roster.tick(start + s)
+        wheel = (time.perf_counter() - t) / window
+        if scan_ticks == window:
+            assert sorted(scanned) == sorted((i, th) for i, th, _ in fired), "wheel and scan disagree"
+        print(f"  {n:>10,}  {scan * 1e3:>8.2f}ms  {wheel * 1e6:>8.1f}µs  {scan / wheel:>7,.0f}x  {len(fired):,}")
+    print()
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="philoscreen team server")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="accept heartbeats and fire tiers")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=HEARTBEAT_PORT)
+    p.add_argument("--webhook", default=os.environ.get("PHILOSCREEN_WEBHOOK", ""))
+    p.add_argument("--dry-run", action="store_true")
+    p = sub.add_parser("loadgen", help="send synthetic heartbeats")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=HEARTBEAT_PORT)
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--seconds", type=float, default=10)
+    p.add_argument("--rate", type=float, default=0, help="heartbeats per second (default: flat out)")
+    p = sub.add_parser("bench", help="run server and load generator together")
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--seconds", type=float, default=5)
+    p.add_argument("--rate", type=float, default=50_000, help="offered heartbeats per second (0: flat out)")
+    p = sub.add_parser("ticks", help="benchmark per-tick tier checks against a full scan")
+    p.add_argument("--sessions", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    p.add_argument("--window", type=int, default=240, help="simulated seconds of ticks")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "serve":
+        if not args.webhook and not args.dry_run:
+            parser.error("provide --webhook URL (or PHILOSCREEN_WEBHOOK) or --dry-run")
+        try:
+            asyncio.run(serve(args.host, args.port, args.webhook, args.dry_run))
+        except KeyboardInterrupt:
+            print(f"\n  {DIM}server stopped.{RESET}\n")
+    elif args.cmd == "loadgen":
+        print(loadgen(args.host, args.port, args.users, args.seconds, args.rate))
+    elif args.cmd == "bench":
+        bench(args.users, args.seconds, args.rate)
+    else:
+        tick_bench(args.sessions, args.window)
+
+
+if __name__ == "__main__":
+    main()
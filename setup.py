@@ -26,6 +26,8 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ENV_FILE = os.path.join(SCRIPT_DIR, ".env")
 PLIST_PATH = os.path.expanduser("~/Library/LaunchAgents/com.philoscreen.plist")
 MAIN_SCRIPT = os.path.join(SCRIPT_DIR, "screen_shame.py")
+SYSTEMD_DIR = os.path.expanduser("~/.config/systemd/user")
+TICK_INTERVAL = 60      # seconds between --tick runs; must stay under IDLE_THRESHOLD
 
 # ── Colors ──────────────────────────────────────────────
 RESET   = "\033[0m"
@@ -117,7 +119,16 @@ def load_env() -> str:
     return ""
 
 
-def install_launchd(webhook_url: str):
+def install_launchd(webhook_url: str, interval: int = None):
+    """A resident LaunchAgent, or with `interval`, one `--tick` run every `interval` seconds."""
+    if interval:
+        args = f"<string>{MAIN_SCRIPT}</string>\n                <string>--tick</string>"
+        schedule = f"<key>StartInterval</key>\n            <integer>{interval}</integer>"
+    else:
+        # Nobody watches the terminal output of a LaunchAgent
+        args = (f"<string>{MAIN_SCRIPT}</string>\n                <string>--headless</string>"
+                f"\n                <string>--events</string>")
+        schedule = "<key>KeepAlive</key>\n            <true/>"
     plist = textwrap.dedent(f"""\
         <?xml version="1.0" encoding="UTF-8"?>
         <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN"
@@ -129,7 +140,7 @@ def install_launchd(webhook_url: str):
             <key>ProgramArguments</key>
             <array>
                 <string>/usr/bin/python3</string>
-                <string>{MAIN_SCRIPT}</string>
+                {args}
             </array>
             <key>EnvironmentVariables</key>
             <dict>
@@ -138,8 +149,7 @@ def install_launchd(webhook_url: str):
             </dict>
             <key>RunAtLoad</key>
             <true/>
-            <key>KeepAlive</key>
-            <true/>
+            {schedule}
             <key>StandardOutPath</key>
             <string>/tmp/philoscreen.log</string>
             <key>StandardErrorPath</key>
@@ -158,6 +168,55 @@ def install_launchd(webhook_url: str):
     return result.returncode == 0
 
 
+def install_systemd_timer(webhook_url: str, interval: int = TICK_INTERVAL) -> bool:
+    """A systemd user timer that runs `--tick` every `interval` seconds."""
+    service = textwrap.dedent(f"""\
+        [Unit]
+        Description=philoscreen tick
+
+        [Service]
+        Type=oneshot
+        ExecStart={sys.executable} {MAIN_SCRIPT} --tick
+        Environment=PHILOSCREEN_WEBHOOK={webhook_url}
+        """)
+    timer = textwrap.dedent(f"""\
+        [Unit]
+        Description=Run philoscreen every {interval} seconds
+
+        [Timer]
+        OnBootSec={interval}
+        OnUnitActiveSec={interval}
+        AccuracySec=1
+
+        [Install]
+        WantedBy=timers.target
+        """)
+    os.makedirs(SYSTEMD_DIR, exist_ok=True)
+    for name, text in (("philoscreen.service", service), ("philoscreen.timer", timer)):
+        path = os.path.join(SYSTEMD_DIR, name)
+        with open(path, "w") as f:
+            f.write(text)
+        os.chmod(path, 0o600)   # the service holds the webhook
+    try:
+        subprocess.run(["systemctl", "--user", "daemon-reload"], capture_output=True, check=False)
+        result = subprocess.run(["systemctl", "--user", "enable", "--now", "philoscreen.timer"],
+                                capture_output=True, check=False)
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+def uninstall_systemd_timer():
+    timer = os.path.join(SYSTEMD_DIR, "philoscreen.timer")
+    if os.path.exists(timer):
+        subprocess.run(["systemctl", "--user", "disable", "--now", "philoscreen.timer"],
+                       capture_output=True, check=False)
+    for name in ("philoscreen.timer", "philoscreen.service"):
+        path = os.path.join(SYSTEMD_DIR, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
 def uninstall_launchd():
     if os.path.exists(PLIST_PATH):
         subprocess.run(["launchctl", "unload", PLIST_PATH],
@@ -251,12 +310,25 @@ def main():
     print()
 
     if ask_yes_no("Enable auto-start?"):
-        if install_launchd(webhook_url):
-            success("Auto-start enabled! philoscreen is now running.")
-            info("It will start automatically on every login.")
-            info("Logs: /tmp/philoscreen.log")
+        if sys.platform != "darwin":
+            # No LaunchAgents here: a systemd user timer running one tick a minute
+            if install_systemd_timer(webhook_url):
+                success(f"Auto-start enabled! A systemd timer runs philoscreen every {TICK_INTERVAL}s.")
+                info("Logs: journalctl --user -u philoscreen")
+            else:
+                fail("Couldn't install the systemd timer. You can set it up manually later.")
         else:
-            fail("Couldn't install auto-start. You can set it up manually later.")
+            print(f"  {DIM}  philoscreen can stay running in the background, or wake up once a{RESET}")
+            print(f"  {DIM}  minute, check, and exit (no memory used in between).{RESET}")
+            interval = TICK_INTERVAL if ask_yes_no("Wake up once a minute instead of staying running?",
+                                                   default=False) else None
+            if install_launchd(webhook_url, interval):
+                success("Auto-start enabled! philoscreen is now running.")
+                info("It will start automatically on every login.")
+                info("Logs: /tmp/philoscreen.log" if interval else
+                     "Events: ~/.philoscreen-events.jsonl (errors: /tmp/philoscreen.log)")
+            else:
+                fail("Couldn't install auto-start. You can set it up manually later.")
     else:
         info("Skipped. You can always enable it later by running setup again.")
 
@@ -283,8 +355,10 @@ def main():
 def handle_uninstall():
     clear()
     header("Uninstall auto-start")
-    if os.path.exists(PLIST_PATH):
+    timer = os.path.join(SYSTEMD_DIR, "philoscreen.timer")
+    if os.path.exists(PLIST_PATH) or os.path.exists(timer):
         uninstall_launchd()
+        uninstall_systemd_timer()
         success("Auto-start removed. philoscreen will no longer run on login.")
     else:
         info("Auto-start wasn't enabled. Nothing to remove.")
@@ -0,0 +1,207 @@
+"""
+Multi-device totals: one day's screen time across several machines.
+
+    python3 screen_shame.py --sync ~/Dropbox/philoscreen [--device NAME]
+
+Each device appends what's new in its own activity to its own files in a
+shared directory (Dropbox, iCloud Drive, Syncthing, a network share) and
+reads everyone else's:
+
+    DIR/<device>/<YYYY-MM-DD>.bits      one file per device per day
+
+A file is a run of 2-byte records:
+
+    byte index  u8   which byte of the day's 180-byte minute bitmap
+                     (history.py's layout); 255, 254, … are bytes 0, 1, …
+                     of the fired-tiers mask
+    bits        u8   bits set in that byte
+
+Records only ever set bits, so merging is a bitwise OR: a grow-only set
+of active minutes and one of fired tiers. Order, repeats and duplicate
+deliveries don't change the result, and a minute two devices were both
+active in counts once. Each device writes only its own files, so a sync
+tool never sees two writers on one file.
+
+Merging is incremental. Only today's files are opened, and each is read
+from where the last read stopped, so a tick costs the records appended
+since the previous one, however long the history is. Only whole records
+are read, so a half-synced append is picked up next time. A file that got
+shorter (replaced by the sync tool) is read again from the start, which
+the OR makes harmless.
+"""
+
+import os
+import socket
+
+from history import BITMAP_SIZE
+
+_FIRED_TOP = 255            # record index of the fired mask's first byte; counts down
+
+
+def default_device() -> str:
+    """This machine's short hostname, made safe for a directory name."""
+    name = socket.gethostname().split(".")[0] or "device"
+    return "".join(c if c.isalnum() or c in "-_" else "-" for c in name)
+
+
+def _bits(data) -> int:
+    return int.from_bytes(bytes(data), "little") if len(data) else 0
+
+
+def _popcount(n: int) -> int:
+    return bin(n).count("1")
+
+
+class Sync:
+    """Publishes this device's minutes and merges the other devices', one day at a time."""
+
+    def __init__(self, directory: str, device: str = None):
+        self.directory = os.path.expanduser(directory)
+        self.device = device or default_device()
+        os.makedirs(os.path.join(self.directory, self.device), exist_ok=True)
+        self.day = None
+        self.remote_fired = 0       # tiers other devices fired today, over THRESHOLDS positions
+        self._remote = 0            # union of the other devices' minutes today
+        self._sent = 0              # our minutes already in our file
+        self._sent_fired = 0
+        self._read = {}             # device -> bytes of its file merged so far
+        self._fd = None
+
+    def _start_day(self, day: str):
+        if self._fd is not None:
+            os.close(self._fd)
+        # Nothing published yet as far as we know: after a restart the
+        # whole day goes out again, which the OR makes harmless
+        self.day = day
+        self.remote_fired = self._remote = self._sent = self._sent_fired = 0
+        self._read.clear()
+        path = os.path.join(self.directory, self.device, f"{day}.bits")
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+    def publish(self, day: str, bitmap, fired: int = 0) -> int:
+        """Append whatever in `bitmap` and `fired` isn't in our file for `day` yet. Returns records written."""
+        if day != self.day:
+            self._start_day(day)
+        new = _bits(bitmap) & ~self._sent
+        new_fired = fired & ~self._sent_fired
+        if not new and not new_fired:
+            return 0
+        out = bytearray()
+        for i, b in enumerate(new.to_bytes(BITMAP_SIZE, "little")):
+            if b:
+                out += bytes((i, b))
+        for i, b in enumerate(new_fired.to_bytes((new_fired.bit_length() + 7) // 8, "little")):
+            if b:
+                out += bytes((_FIRED_TOP - i, b))
+        os.write(self._fd, out)     # one write, so a record is never split by us
+        self._sent |= new
+        self._sent_fired |= new_fired
+        return len(out) // 2
+
+    def merge(self, day: str) -> int:
+        """Read the records other devices appended for `day` since last time. Returns how many."""
+        if day != self.day:
+            self._start_day(day)
+        try:
+            devices = os.listdir(self.directory)
+        except OSError:
+            return 0
+        merged = 0
+        for device in devices:
+            if device == self.device:
+                continue
+            path = os.path.join(self.directory, device, f"{day}.bits")
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            done = self._read.get(device, 0)
+            if size < done:
+                done = 0
+            size -= size % 2
+            if size == done:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    f.seek(done)
+                    data = f.read(size - done)
+            except OSError:
+                continue
+            remote, fired = bytearray(BITMAP_SIZE), 0
+            for i in range(0, len(data) - 1, 2):
+                index, bits = data[i], data[i + 1]
+                if index < BITMAP_SIZE:
+                    remote[index] |= bits
+                else:
+                    fired |= bits << 8 * (_FIRED_TOP - index)
+            self._remote |= _bits(remote)
+            self.remote_fired |= fired
+            self._read[device] = done + len(data) - len(data) % 2
+            merged += len(data) // 2
+        return merged
+
+    def elsewhere(self, bitmap) -> int:
+        """Minutes today that other devices were active in and this one wasn't."""
+        return _popcount(self._remote & ~_bits(bitmap))
+
+    def union(self, bitmap) -> int:
+        """Minutes today that any device was active in."""
+        return _popcount(self._remote | _bits(bitmap))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import time
+
+    def minutes(*spans) -> bytes:
+        bits = 0
+        for start, end in spans:
+            bits |= ((1 << (end - start)) - 1) << start
+        return bits.to_bytes(BITMAP_SIZE, "little")
+
+    root = tempfile.mkdtemp(prefix="philoscreen-sync-")
+    day = "2026-01-05"
+    laptop, desktop = Sync(root, "laptop"), Sync(root, "desktop")
+    mine = minutes((9 * 60, 12 * 60))                       # laptop 09:00–12:00
+    theirs = minutes((11 * 60, 14 * 60))                    # desktop 11:00–14:00
+    laptop.publish(day, mine, fired=0b1)
+    desktop.publish(day, theirs)
+    laptop.merge(day)
+    print(f"laptop alone {sum(bin(b).count('1') for b in mine) / 60:.1f}h, "
+          f"with the desktop {laptop.union(mine) / 60:.1f}h "
+          f"(+{laptop.elsewhere(mine)} min from the desktop, overlap counted once)")
+
+    # Idempotent: republishing, re-reading and a sync tool's duplicate change nothing
+    desktop.publish(day, theirs)
+    with open(os.path.join(root, "desktop", f"{day}.bits"), "rb") as f:
+        os.write(desktop._fd, f.read())
+    fresh = Sync(root, "laptop")
+    fresh.merge(day)
+    fresh.merge(day)
+    assert fresh.union(mine) == laptop.union(mine) == 300, fresh.union(mine)
+    desktop.merge(day)
+    assert desktop.remote_fired == 0b1
+    print("duplicates and re-reads: same union, same fired tiers")
+
+    # Flat: a year of earlier days on disk, and a tick reads only today's new records
+    past = Sync(root, "desktop")
+    for d in range(365):
+        past.publish(f"2025-{1 + d // 31 % 12:02d}-{1 + d % 28:02d}", theirs)
+    past.close()
+    n = 2000
+    t = time.perf_counter()
+    for i in range(n):
+        desktop.publish(day, minutes((11 * 60, 14 * 60 + 1 + i % 500)))
+        laptop.merge(day)
+    per_tick = (time.perf_counter() - t) / n
+    print(f"publish + merge per tick with a year of history: {per_tick * 1e6:.0f}µs")
+    laptop.close()
+    desktop.close()
+    fresh.close()
+    shutil.rmtree(root)
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """screen_shame with every file it touches under tmp_path."""
+    import screen_shame
+    for name in ("STATE_FILE", "JOURNAL_FILE", "SNAPSHOT_FILE", "HISTORY_FILE", "OUTBOX_FILE", "ROTATION_FILE"):
+        monkeypatch.setattr(screen_shame, name, str(tmp_path / name.lower()))
+    monkeypatch.setattr(screen_shame, "_journal", None)
+    yield tmp_path
+    if screen_shame._journal is not None:
+        screen_shame._journal.close()
+        screen_shame._journal = None
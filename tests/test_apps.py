@@ -0,0 +1,65 @@
+import os
+import random
+from datetime import date, timedelta
+
+from apps import NAMES_FILE, AppTracker, AppUsage, FakeWindowSource, top_apps
+from scheduler import FakeClock
+
+
+def test_names_are_stored_once_however_often_they_are_credited(tmp_path):
+    usage = AppUsage(str(tmp_path))
+    for _ in range(3):
+        usage.add("2026-01-05", "Slack", 60)
+        usage.add("2026-01-05", "Google\nChrome ", 30)
+        usage.add("2026-01-05", "Google Chrome", 30)
+    usage.close()
+    with open(tmp_path / NAMES_FILE, encoding="utf-8") as f:
+        assert f.read().splitlines() == ["Slack", "Google Chrome"]
+    assert os.path.getsize(tmp_path / "2026-01-05.bin") == 2 * 4
+
+
+def test_a_reopened_store_carries_on_where_it_stopped(tmp_path):
+    usage = AppUsage(str(tmp_path))
+    usage.add("2026-01-05", "Slack", 600)
+    usage.add("2026-01-05", "Terminal", 900)
+    usage.close()
+
+    usage = AppUsage(str(tmp_path))
+    usage.add("2026-01-05", "Slack", 600.4)
+    usage.add("2026-01-05", "Figma", 100)
+    assert usage.top("2026-01-05", 5) == [("Slack", 1200), ("Terminal", 900), ("Figma", 100)]
+    assert usage.intern("Terminal") == 1
+    usage.close()
+
+
+def test_top_apps_sums_the_range_like_adding_up_each_day(tmp_path):
+    rng = random.Random(22)
+    apps = ["Slack", "Terminal", "Figma", "Safari", "Mail", "Music"]
+    first = date(2026, 1, 1)
+    usage = AppUsage(str(tmp_path))
+    naive = {}
+    for d in range(30):
+        day = first + timedelta(days=d)
+        if rng.random() < 0.2:
+            continue
+        for _ in range(rng.randrange(1, 40)):
+            name, seconds = rng.choice(apps[:rng.randrange(1, 7)]), rng.randrange(1, 600)
+            usage.add(str(day), name, seconds)
+            if date(2026, 1, 5) <= day <= date(2026, 1, 20):
+                naive[name] = naive.get(name, 0) + seconds
+    usage.close()
+    expected = sorted(naive.items(), key=lambda kv: kv[1], reverse=True)[:3]
+    assert top_apps(str(tmp_path), date(2026, 1, 5), date(2026, 1, 20), 3) == expected
+
+
+def test_the_tracker_credits_whatever_is_in_front(tmp_path):
+    clock = FakeClock(1000.0)
+    source = FakeWindowSource(clock.time, [(1000, 1100, "Slack"), (1100, 1400, "Terminal")])
+    tracker = AppTracker(source, AppUsage(str(tmp_path)))
+    for _ in range(10):
+        tracker.observe("2026-01-05", 60)
+        clock.sleep(60)
+    tracker.observe("2026-01-05", 0)
+    assert tracker.usage.top("2026-01-05", 5) == [("Terminal", 300), ("Slack", 120)]
+    assert tracker.culprit("2026-01-05") == ("Terminal", 300)
+    tracker.close()
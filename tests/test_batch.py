@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+import batch
+from common import SLACK_TAGLINES, slack_alert
+from messages import THRESHOLDS
+from msgbank import Bank, Pack, Rotation
+from screen_shame import due_tiers
+
+ENGINES = ["numpy", "python"] if batch.np is not None else ["python"]
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(batch, "np", None)
+    return request.param
+
+
+def _sessions(n: int = 5000, seed: int = 11):
+    rng = random.Random(seed)
+    active = [rng.uniform(0, 14 * 3600) for _ in range(n)]
+    fired = [rng.getrandbits(len(THRESHOLDS)) & rng.getrandbits(len(THRESHOLDS)) for _ in range(n)]
+    active[:4] = [7200.0, 7199.999999999999, 0.0, 43200.0]
+    return active, fired
+
+
+def _columns(active, fired):
+    if batch.np is None:
+        return active, fired
+    return batch.np.asarray(active), batch.np.asarray(fired, dtype=batch.np.uint32)
+
+
+def test_evaluate_matches_due_tiers(engine):
+    active, fired = _sessions()
+    rows, positions, after = batch.evaluate(*_columns(active, fired))
+    expected = [(i, t) for i in range(len(active)) for t in due_tiers(active[i], fired[i])]
+    assert [(int(r), THRESHOLDS[p]) for r, p in zip(rows, positions)] == expected
+    assert [int(f) for f in after] == [
+        f | sum(1 << THRESHOLDS.index(t) for t in due_tiers(a, f)) for a, f in zip(active, fired)
+    ]
+
+
+def test_render_matches_slack_alert(engine):
+    active, fired = _sessions(2000)
+    cols = _columns(active, fired)
+    bank = Bank(rotation=Rotation())
+    rows, positions, _ = batch.evaluate(*cols)
+    messages, taglines = picks = batch.draw(positions, bank)
+    texts = batch.render(rows, positions, cols[0], picks, "09:41 AM", bank)
+    assert len(texts) == len(positions)
+    for k, text in enumerate(texts):
+        t = THRESHOLDS[positions[k]]
+        assert text == texts[k] == slack_alert(t, active[rows[k]], bank.text(t, messages[k]),
+                                               SLACK_TAGLINES[taglines[k]], "09:41 AM")
+
+
+def test_draw_follows_the_rotation_without_neighbouring_repeats(engine):
+    bank = Bank(rotation=Rotation())
+    positions = [0, 1] * 50
+    messages, _ = batch.draw(positions, bank)
+    for p in (0, 1):
+        picks = [int(m) for m, q in zip(messages, positions) if q == p]
+        assert all(a != b for a, b in zip(picks, picks[1:]))
+        assert sorted(picks[:6]) == list(range(6))      # a full cycle before anything comes back
+
+
+def test_render_uses_the_message_pack(engine, tmp_path):
+    path = tmp_path / "pack.txt"
+    path.write_text("[2]\n{hours} hours, from the pack.\n")
+    bank = Bank(Pack(str(path)), Rotation())
+    rows, positions, _ = batch.evaluate(*_columns([7300.0, 14500.0], [0, 0]))
+    texts = list(batch.render(rows, positions, _columns([7300.0, 14500.0], [0, 0])[0], None, "09:41 AM", bank))
+    assert "2 hours, from the pack." in texts[0]
+    assert [THRESHOLDS[p] for p in positions] == [2, 2, 4]
+    assert "from the pack" not in texts[2]      # tier 4 falls back to messages.py
+    bank.close()
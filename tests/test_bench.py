@@ -0,0 +1,7 @@
+import bench
+
+
+def test_lean_daemon_stays_within_its_memory_budgets(tmp_path):
+    rss, growth = bench.bench_lean(str(tmp_path))
+    assert rss / 1e6 <= bench.LEAN_RSS_BUDGET
+    assert growth <= bench.LEAN_GROWTH_BUDGET
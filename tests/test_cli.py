@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+import screen_shame
+
+
+@pytest.mark.parametrize("mode", ["--tick", "--lean"])
+@pytest.mark.parametrize("extra", [["--sync", "DIR"], ["--events"], ["--status-socket"], ["--metrics-port", "9464"],
+                                   ["--profile", "DIR"], ["--test"]])
+def test_tick_and_lean_reject_flags_they_would_ignore(home, mode, extra):
+    result = subprocess.run([sys.executable, screen_shame.__file__, mode, "--dry-run", *extra],
+                            capture_output=True, text=True, env={"HOME": str(home), "PATH": ""}, timeout=30)
+    assert result.returncode == 2
+    assert f"can't be combined with {mode}" in result.stderr
+
+
+def test_sinks_and_report_do_not_pull_in_the_cli():
+    code = "import sys, notify, report; print('screen_shame' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=screen_shame.os.path.dirname(screen_shame.__file__), timeout=30)
+    assert result.stdout.strip() == "False"
+
+
+def test_running_the_cli_loads_it_once(home):
+    # evaluate imports screen_shame, and has to get the running __main__ rather than a second copy
+    result = subprocess.run([sys.executable, "-X", "importtime", screen_shame.__file__, "evaluate", "--help"],
+                            capture_output=True, text=True, env={"HOME": str(home), "PATH": ""}, timeout=30)
+    assert result.returncode == 0
+    assert "evaluate" in result.stderr
+    assert not [line for line in result.stderr.splitlines() if line.split("|")[-1].strip() == "screen_shame"]
@@ -0,0 +1,115 @@
+import time
+
+import delivery
+from delivery import Delivery, TokenBucket, serve_stand_in
+
+
+def test_latencies_keep_only_the_recent_window(monkeypatch):
+    monkeypatch.setattr(delivery, "LATENCY_WINDOW", 8)
+    server, url = serve_stand_in()
+    sender = Delivery(rate=None).start()
+    try:
+        for i in range(30):
+            sender.submit(url, {"text": f"alert {i}"})
+        assert sender.flush(10)
+        assert sender.sent == 30
+        assert len(sender.latencies) == 8
+    finally:
+        sender.stop()
+        server.shutdown()
+
+
+def test_sends_share_one_kept_alive_connection():
+    server, url = serve_stand_in()
+    sender = Delivery(rate=None).start()
+    try:
+        for i in range(20):
+            sender.submit(url, {"text": f"alert {i}"})
+        assert sender.flush(10)
+        assert (server.hits, server.connections) == (20, 1)
+    finally:
+        sender.stop()
+        server.shutdown()
+
+
+def test_server_errors_are_retried_until_the_attempts_run_out():
+    server, url = serve_stand_in(status=503)
+    results = []
+    sender = Delivery(on_result=lambda job, ok: results.append((ok, job.attempts, job.permanent)),
+                      rate=None, max_attempts=3, base_delay=0.01, max_delay=0.02).start()
+    try:
+        sender.submit(url, {"text": "alert"})
+        assert sender.flush(10)
+        assert results == [(False, 3, False)]
+        assert (server.hits, sender.retried, sender.failed) == (3, 2, 1)
+    finally:
+        sender.stop()
+        server.shutdown()
+
+
+def test_a_refused_post_is_not_retried():
+    server, url = serve_stand_in(status=404)
+    results = []
+    sender = Delivery(on_result=lambda job, ok: results.append((ok, job.attempts, job.permanent)),
+                      rate=None, base_delay=0.01).start()
+    try:
+        sender.submit(url, {"text": "alert"})
+        assert sender.flush(10)
+        assert results == [(False, 1, True)]
+        assert server.hits == 1
+    finally:
+        sender.stop()
+        server.shutdown()
+
+
+def test_backoff_stays_between_half_and_all_of_the_capped_delay():
+    for attempt in range(12):
+        delay = min(300.0, 2 ** attempt)
+        assert all(delay / 2 <= delivery.backoff(attempt, 1.0, 300.0) <= delay for _ in range(50))
+
+
+def test_the_bucket_hands_out_one_slot_per_interval_after_the_burst():
+    bucket = TokenBucket(rate=2.0, burst=1)
+    assert [bucket.reserve(100.0) for _ in range(4)] == [0.0, 0.5, 1.0, 1.5]
+    assert bucket.reserve(103.0) == 0.0                 # idle long enough: back to no wait
+    bucket = TokenBucket(rate=2.0, burst=3)
+    assert [bucket.reserve(100.0) for _ in range(5)] == [0.0, 0.0, 0.0, 0.5, 1.0]
+    bucket.pause(110.0)
+    assert bucket.reserve(100.0) == 9.0                 # Retry-After holds the webhook
+
+
+def test_paced_sends_stay_under_the_webhook_limit():
+    results = {}
+    for rate in (None, 10.0):
+        server, url = serve_stand_in(rate_limit=20.0)
+        sender = Delivery(rate=rate, max_attempts=1).start()
+        try:
+            start = time.monotonic()
+            for i in range(10):
+                sender.submit(url, {"text": f"alert {i}"})
+            assert sender.flush(10)
+            results[rate] = (server.throttled, time.monotonic() - start)
+        finally:
+            sender.stop()
+            server.shutdown()
+    assert results[None][0] > 0                 # flat out, the webhook pushes back
+    throttled, elapsed = results[10.0]
+    assert throttled == 0 and elapsed >= 9 / 10 * 0.9
+
+
+def test_retry_after_holds_every_send_to_that_webhook():
+    server, url = serve_stand_in(status=429, retry_after=0.3)
+    results = []
+    sender = Delivery(on_result=lambda job, ok: results.append(time.monotonic()), rate=100.0,
+                      max_attempts=2, base_delay=0.01, max_delay=0.02).start()
+    try:
+        start = time.monotonic()
+        sender.submit(url, {"text": "first"})
+        sender.submit(url, {"text": "second"})
+        assert sender.flush(10)
+        assert sender.throttled == server.hits == 4
+        # Each retry waited out the 0.3s, and the second job waited behind the first's pause
+        assert max(results) - start >= 0.6
+    finally:
+        sender.stop()
+        server.shutdown()
@@ -0,0 +1,39 @@
+import json
+from datetime import date
+
+import evaluate
+from delivery import serve_stand_in
+from journal import StateJournal
+
+
+def test_fired_marks_go_beside_the_state_which_is_left_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(evaluate, "ROTATION_FILE", str(tmp_path / "rotation"))
+    today = date.today()
+    journal = StateJournal(str(tmp_path / "alice.wal"), str(tmp_path / "alice.snap"))
+    journal.recover()
+    journal.append(today.toordinal(), 5 * 3600, 0)
+    with open(tmp_path / "bob.json", "w") as f:
+        json.dump({"date": str(today), "active_seconds": 2.5 * 3600, "fired_tiers": []}, f)
+    before = {p: (tmp_path / p).read_bytes() for p in ("alice.wal", "bob.json")}
+
+    alerts, (scanned, _, _) = evaluate.evaluate_dir(str(tmp_path), 1, str(today))
+    assert scanned == 2
+    assert sorted((evaluate.user_of(path), due) for path, *_, due in alerts) == [("alice", [2, 4]), ("bob", [2])]
+    outbox = str(tmp_path / "team-outbox.db")
+    stand_in, url = serve_stand_in()
+    evaluate.dispatch(alerts, url, dry_run=False, outbox_path=outbox, timeout=10)
+    stand_in.shutdown()
+    assert stand_in.hits == 2
+
+    assert {p: (tmp_path / p).read_bytes() for p in before} == before
+    assert evaluate.read_fired(str(tmp_path / "alice.wal"), str(today)) == 0b11
+    # The next run finds nothing new, even though the daemon's journal never heard about it
+    journal.append(today.toordinal(), 5 * 3600 + 60, 0)
+    journal.close()
+    assert evaluate.evaluate_dir(str(tmp_path), 1, str(today))[0] == []
+
+
+def test_the_evaluator_has_its_own_outbox():
+    import common
+    assert evaluate.OUTBOX_FILE != common.OUTBOX_FILE
+    assert evaluate.ROTATION_FILE.endswith("evaluate-rotation")
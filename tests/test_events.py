@@ -0,0 +1,44 @@
+import json
+import signal
+import subprocess
+import sys
+import time
+
+import screen_shame
+from events import EventLog
+
+
+def lines(path):
+    with open(path) as f:
+        return [json.loads(line)["event"] for line in f]
+
+
+def test_tick_lines_wait_but_not_through_a_long_sleep(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path), flush_every=30.0)
+    log.tick("2026-01-05", 3600.0, 4.0, 60.0, 60.0, 10.0)
+    log.poll(5.0)
+    assert lines(path) == []
+    log.poll(300.0)
+    assert lines(path) == ["tick"]
+    log.close()
+
+
+def test_events_other_than_ticks_are_written_at_once(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path))
+    log.emit("tier", day="2026-01-05", tier=2, active=7200.0, culprit=None)
+    assert lines(path) == ["tier"]
+    log.close()
+
+
+def test_sigterm_stops_the_daemon_cleanly(home):
+    path = home / "events.jsonl"
+    daemon = subprocess.Popen([sys.executable, screen_shame.__file__, "--dry-run", "--headless", "--events", str(path)],
+                              stdout=subprocess.DEVNULL, env={"HOME": str(home), "PATH": ""})
+    deadline = time.monotonic() + 20
+    while not (path.exists() and "tick" in lines(path)) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    daemon.send_signal(signal.SIGTERM)
+    assert daemon.wait(20) == 0
+    assert lines(path)[-1] == "stop"
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from history import INDEX_HEADER_SIZE, ROW_SIZE, History
+
+DAY = 739000
+
+
+def filled(path, days=200):
+    history = History(str(path))
+    for i in range(days):
+        for minute in range(0, 60 * (i % 7 + 1), 7):
+            history.mark_minute(DAY + i, minute)
+    return history
+
+
+def test_reopening_checks_the_newest_row_without_rebuilding(tmp_path, monkeypatch):
+    filled(tmp_path / "history").close()
+    monkeypatch.setattr(History, "rebuild_index", lambda self: pytest.fail("rebuilt a good index"))
+    reads = []
+    minutes = History.minutes
+    monkeypatch.setattr(History, "minutes", lambda self, day: reads.append(day) or minutes(self, day))
+    history = History(str(tmp_path / "history"))
+    assert len(reads) <= 64             # the days after the newest, in its GROW_DAYS chunk
+    monkeypatch.undo()
+    assert history.rollup(DAY + 199)[0] == sum(history.minutes(DAY + i) for i in range(200))
+    history.close()
+
+
+def test_a_wrong_newest_row_is_rebuilt(tmp_path):
+    history = filled(tmp_path / "history")
+    good = history.rollup(DAY + 199)
+    history._imap[INDEX_HEADER_SIZE + 199 * ROW_SIZE] ^= 1
+    history.close()
+    history = History(str(tmp_path / "history"))
+    assert history.rollup(DAY + 199) == good
+    history.close()
+
+
+def test_rebuilding_never_shrinks_the_index_under_another_map(tmp_path):
+    path = str(tmp_path / "history")
+    filled(path).close()
+    reader = History(path)
+    size = os.path.getsize(path + ".idx")
+    with open(path + ".idx", "r+b") as f:
+        f.write(b"stale!!!")          # the next open rebuilds it: 200 rows, 256 mapped
+    writer = History(path)
+    assert os.path.getsize(path + ".idx") == size
+    writer.close()
+    reader.close()
@@ -0,0 +1,24 @@
+import idle
+import screen_shame
+import statusapi
+
+
+def test_with_no_working_source_the_fallback_is_the_blind_one(monkeypatch):
+    monkeypatch.setattr(idle.sys, "platform", "sunos5")
+    assert idle.select_idle_source().name == "none"
+
+
+def test_a_blind_source_is_warned_about(capsys):
+    screen_shame.warn_if_blind(idle.IdleSource())
+    assert "every second counts as active" in capsys.readouterr().out
+    screen_shame.warn_if_blind(idle.FakeIdleSource(lambda: 0.0, []))
+    assert capsys.readouterr().out == ""
+
+
+def test_status_shows_a_blind_source():
+    snapshot = ("2026-01-05", 3600.0, 0.0, ())
+    values, status, text = statusapi.render(snapshot, [2, 4], "none")
+    assert values["idle_source"] == "none"
+    assert '"idle_source":"none"' in status
+    assert text == "1h 00m · 2h in 1h 00m · no idle source\n"
+    assert statusapi.render(snapshot, [2, 4], "evdev")[2] == "1h 00m · 2h in 1h 00m\n"
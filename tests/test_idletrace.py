@@ -0,0 +1,82 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+import idletrace
+from idle import FakeIdleSource
+from idletrace import TraceIdleSource, TraceWriter, read_trace, simulate
+from scheduler import FakeClock
+from screen_shame import new_state, tick
+
+ENGINES = ["numpy", "python"] if idletrace.np is not None else ["python"]
+ORIGIN = datetime(2026, 1, 5, 8).timestamp()   # a morning, local time: no midnight in the trace
+SPANS = [(ORIGIN + 600, ORIGIN + 4000), (ORIGIN + 4500, ORIGIN + 4600), (ORIGIN + 9000, ORIGIN + 20000)]
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(idletrace, "np", None)
+    return request.param
+
+
+def recorded(path, end=ORIGIN + 24000, every=5.0):
+    clock = FakeClock(ORIGIN)
+    source = FakeIdleSource(clock.time, SPANS, origin=ORIGIN)
+    writer = TraceWriter(str(path), flush_every=16, origin=ORIGIN)
+    truth = []
+    while clock.now <= end:
+        idle = source.idle_seconds()
+        writer.sample(clock.now, idle)
+        truth.append((clock.now, idle))
+        clock.sleep(every)
+    writer.close()
+    return truth
+
+
+def test_a_replayed_trace_gives_back_the_recorded_idle_times(tmp_path, engine):
+    path = tmp_path / "me.trace"
+    truth = recorded(path)
+    instants, start, end = read_trace(str(path))
+    assert (start, end) == (ORIGIN, truth[-1][0])
+    clock = FakeClock(start)
+    replay = TraceIdleSource(clock.time, instants)
+    for t, idle in truth:
+        clock.now = t
+        assert replay.idle_seconds() == pytest.approx(idle, abs=1.0 + idletrace.UNIT)
+    # Idle stretches cost nothing: far fewer records than samples
+    assert os.path.getsize(path) < len(truth)
+
+
+def test_a_truncated_trace_reads_up_to_the_damage(tmp_path, engine):
+    path = tmp_path / "me.trace"
+    recorded(path)
+    full = read_trace(str(path))
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 7)
+    instants, start, end = read_trace(str(path))
+    assert start == full[1] and end <= full[2]
+    assert list(instants) == list(full[0][:len(instants)])
+
+
+def test_simulation_matches_polling_every_few_seconds(tmp_path):
+    path = tmp_path / "me.trace"
+    recorded(path)
+    instants, start, end = read_trace(str(path))
+    result = simulate(instants, start, end, thresholds=[1, 2, 3, 5], idle_threshold=300)
+
+    clock = FakeClock(start)
+    source = TraceIdleSource(clock.time, instants)
+    state, last, was_idle, fired = new_state(str(date.fromtimestamp(start))), start, False, []
+    while clock.now < end:
+        idle = source.idle_seconds()
+        state, _, due = tick(state, clock.now, clock.now - last, idle, was_idle, [1, 2, 3, 5], 300)
+        fired += due
+        last, was_idle = clock.now, idle >= 300
+        clock.sleep(5.0)
+
+    # Off only by the guesses at when someone came back from a long sleep (see active_span)
+    assert sum(result["days"].values()) == pytest.approx(state.active_seconds, rel=0.03)
+    assert [t for _, t, _ in result["fires"]] == fired == [1, 2, 3]
+    assert result["wakeups"] < clock.wakeups / 10
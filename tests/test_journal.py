@@ -0,0 +1,66 @@
+import os
+
+from journal import RECORD_SIZE, StateJournal, fired_list, fired_mask, latest, pack
+
+DAY = 739000
+
+
+def journal(tmp_path, **kwargs):
+    return StateJournal(str(tmp_path / "state.wal"), str(tmp_path / "state.snap"), **kwargs)
+
+
+def written(tmp_path, n):
+    j = journal(tmp_path)
+    j.recover()
+    for i in range(1, n + 1):
+        j.append(DAY, 60.0 * i, i % 4)
+    j.close()
+    return str(tmp_path / "state.wal")
+
+
+def test_a_torn_tail_is_cut_off_and_the_rest_stands(tmp_path):
+    path = written(tmp_path, 5)
+    with open(path, "ab") as f:
+        f.write(pack(6, DAY, 360.0, 2)[:RECORD_SIZE // 2])
+    j = journal(tmp_path)
+    assert j.recover() == (DAY, 300.0, 1)
+    assert os.path.getsize(path) == 5 * RECORD_SIZE
+    j.append(DAY, 360.0, 2)
+    j.close()
+    assert journal(tmp_path).recover() == (DAY, 360.0, 2)
+
+
+def test_a_bad_crc_ends_the_journal_there(tmp_path):
+    path = written(tmp_path, 5)
+    with open(path, "r+b") as f:
+        f.seek(3 * RECORD_SIZE + 8)
+        f.write(b"\xff")
+    assert latest(path, str(tmp_path / "state.snap"))[1:] == (DAY, 180.0, 3)
+    assert os.path.getsize(path) == 5 * RECORD_SIZE        # latest() only reads
+    assert journal(tmp_path).recover() == (DAY, 180.0, 3)
+    assert os.path.getsize(path) == 3 * RECORD_SIZE
+
+
+def test_records_older_than_the_snapshot_lose_to_it(tmp_path):
+    # A crash between writing the snapshot and emptying the journal
+    path = written(tmp_path, 5)
+    with open(tmp_path / "state.snap", "wb") as f:
+        f.write(pack(9, DAY + 1, 30.0, 0))
+    assert journal(tmp_path).recover() == (DAY + 1, 30.0, 0)
+    assert os.path.getsize(path) == 5 * RECORD_SIZE
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    j = journal(tmp_path, compact_every=4)
+    j.recover()
+    for i in range(1, 7):
+        j.append(DAY, 60.0 * i, 0)
+    j.close()
+    assert os.path.getsize(tmp_path / "state.wal") == 2 * RECORD_SIZE
+    assert journal(tmp_path).recover() == (DAY, 360.0, 0)
+
+
+def test_fired_tiers_round_trip_through_the_mask():
+    thresholds = [2, 4, 6, 8, 10, 12]
+    for fired in ([], [2], [4, 8], thresholds):
+        assert fired_list(fired_mask(fired, thresholds), thresholds) == fired
@@ -0,0 +1,57 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import CONTENT_TYPE, Histogram, Metrics, serve_metrics
+from notify import Alert, JsonlSink, Notifier
+from screen_shame import State
+
+
+def samples(text: str) -> dict:
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if line and not line.startswith("#"))
+
+
+def test_buckets_are_cumulative_and_inclusive():
+    h = Histogram((1.0, 2.0, 5.0))
+    for value in (0.5, 1.0, 1.5, 2.0, 4.0, 9.0):
+        h.observe(value)
+    got = samples("\n".join(h.lines("x")))
+    assert [got[f'x_bucket{{le="{le}"}}'] for le in ("1.0", "2.0", "5.0", "+Inf")] == ["2", "4", "5", "6"]
+    assert got["x_count"] == "6" and float(got["x_sum"]) == 18.0
+
+
+def test_a_scrape_reports_the_ticks_sinks_and_next_tier(tmp_path):
+    m = Metrics(thresholds=[2, 4])
+    notifier = Notifier([JsonlSink(str(tmp_path / "alerts.jsonl"))])
+    m.notifier = notifier
+    notifier.notify(Alert(2, 7300.0, "2h", "2026-01-05"))
+    assert notifier.flush(5)
+    for _ in range(3):
+        m.observe_tick(3e-6, 1.2e-5, 6e-5, State("2026-01-05", 7300.0, [2]), 4.0)
+    text = m.render()
+    got = samples(text)
+    assert text.endswith("# EOF\n")
+    assert got["philoscreen_ticks_total"] == "3"
+    assert got["philoscreen_tick_seconds_count"] == "3"
+    assert got['philoscreen_sink_alerts_total{sink="jsonl:alerts.jsonl"}'] == "1"
+    assert got["philoscreen_next_tier_hours"] == "4"
+    assert float(got["philoscreen_next_tier_remaining_seconds"]) == 4 * 3600 - 7300.0
+    # Every family is declared once, before its samples
+    types = [line.split()[2] for line in text.splitlines() if line.startswith("# TYPE")]
+    assert len(types) == len(set(types))
+    notifier.close()
+
+
+def test_the_endpoint_serves_metrics_and_nothing_else():
+    server = serve_metrics(Metrics(), 0)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(base + "/metrics", timeout=5) as r:
+            assert r.headers["Content-Type"] == CONTENT_TYPE
+            assert "philoscreen_ticks_total 0" in r.read().decode()
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(base + "/other", timeout=5)
+        assert e.value.code == 404
+    finally:
+        server.shutdown()
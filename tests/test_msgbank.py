@@ -0,0 +1,33 @@
+from messages import TIERS
+from msgbank import Bank, BuiltinPack, Pack, Rotation
+
+
+def test_every_pick_is_saved_before_the_next(tmp_path):
+    path = str(tmp_path / "rotation")
+    bank = Bank(BuiltinPack(), rotation=Rotation(path))
+    picks = [bank.message(4) for _ in range(3)]
+    # No close(): a process that dies here must not have the next one replay these
+    restarted = Bank(BuiltinPack(), rotation=Rotation(path))
+    picks += [restarted.message(4) for _ in range(len(TIERS[4]) - 3)]
+    assert sorted(picks) == sorted(set(picks))
+    assert len(picks) == len(TIERS[4])
+
+
+def test_bulk_callers_save_once_per_batch(tmp_path):
+    path = tmp_path / "rotation"
+    bank = Bank(BuiltinPack(), rotation=Rotation(str(path), save_each=False))
+    picks = [bank.message(4) for _ in range(3)]
+    assert not path.exists()
+    bank.rotation.flush()
+    restarted = Bank(BuiltinPack(), rotation=Rotation(str(path)))
+    picks += [restarted.message(4) for _ in range(len(TIERS[4]) - 3)]
+    assert len(set(picks)) == len(TIERS[4])
+
+
+def test_pack_lines_are_compiled_once(tmp_path):
+    path = tmp_path / "pack.txt"
+    path.write_text("[2]\n{hours} hours, day {streak}.\n")
+    pack = Pack(str(path))
+    assert pack.template("2", 0) is pack.template("2", 0)
+    assert Bank(pack).message(2, streak=3) == "2 hours, day 3."
+    pack.close()
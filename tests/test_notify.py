@@ -0,0 +1,56 @@
+import threading
+import time
+
+from notify import Alert, Notifier, Sink
+
+
+class HangingSink(Sink):
+    """Hangs on the first alert until released; answers the rest at once."""
+
+    name = "hanging"
+
+    def __init__(self, timeout):
+        super().__init__(timeout)
+        self.release = threading.Event()
+        self.got = []
+
+    def send(self, alert):
+        if not self.got:
+            self.got.append(alert.tier)
+            self.release.wait(10)
+        else:
+            self.got.append(alert.tier)
+
+
+def test_a_send_past_its_timeout_is_abandoned_and_failed():
+    sink = HangingSink(timeout=0.2)
+    results = []
+    notifier = Notifier([sink], on_result=lambda s, a, ok, secs, error: results.append((a.tier, ok, error)))
+    start = time.monotonic()
+    notifier.notify(Alert(2, 7200.0, "one", "2026-01-05"))
+    notifier.notify(Alert(4, 14400.0, "two", "2026-01-05"))
+    assert notifier.flush(5)
+    assert time.monotonic() - start < 2
+    sink.release.set()
+
+    assert results[0][:2] == (2, False) and "abandoned" in results[0][2]
+    assert results[1] == (4, True, "")
+    assert sink.got == [2, 4]
+    (name, sent, failed, late, _, _), = notifier.summary()
+    assert (sent, failed, late) == (1, 1, 1)
+    notifier.close()
+
+
+def test_sends_reuse_one_thread_per_sink_until_one_hangs():
+    sink = HangingSink(timeout=0.2)
+    sink.name = "reused"
+    notifier = Notifier([sink])
+    notifier.notify(Alert(2, 7200.0, "hangs", "2026-01-05"))
+    for i in range(50):
+        notifier.notify(Alert(4, 14400.0, f"alert {i}", "2026-01-05"))
+    assert notifier.flush(5)
+    senders = [t for t in threading.enumerate() if t.name == "philoscreen-send-reused"]
+    assert len(senders) == 2        # the hung send's, and its replacement
+    assert len(sink.got) == 51
+    sink.release.set()
+    notifier.close()
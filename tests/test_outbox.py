@@ -0,0 +1,88 @@
+import sqlite3
+import time
+
+from delivery import Delivery, serve_stand_in
+from outbox import Drainer, Entry, Outbox, by_user, coalesce
+
+
+def drain_once(status, box):
+    server, url = serve_stand_in(status=status)
+    delivery = Delivery(base_delay=0.01, max_attempts=2, rate=None).start()
+    drainer = Drainer(box, delivery)
+    box.enqueue(url, "2h in", "2026-01-05", 2)
+    try:
+        drainer.drain()
+        assert delivery.flush(10)
+        return server.hits
+    finally:
+        delivery.stop()
+        server.shutdown()
+
+
+def test_a_refused_webhook_is_dead_lettered_not_retried(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.db"))
+    assert drain_once(404, box) == 1
+    assert len(box) == 0
+    assert box.pending(now=time.time() + 10 ** 6) == []
+    (entry, error), = box.dead()
+    assert entry.text == "2h in" and entry.attempts == 1 and "404" in error
+    box.close()
+
+
+def test_a_failing_webhook_backs_off_between_drains(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.db"), retry_base=60.0, retry_max=600.0)
+    assert drain_once(503, box) == 2            # the Delivery worker's own retries
+    assert len(box) == 1 and box.dead() == []
+    now = time.time()
+    assert box.pending(now=now) == []
+    assert [e.attempts for e in box.pending(now=now + 61)] == [1]
+    ids = [e.id for e in box.pending(now=now + 61)]
+    for _ in range(10):
+        box.failed(ids, "503")
+    assert box.pending(now=now + 599) == []
+    assert len(box.pending(now=now + 601)) == 1
+    box.close()
+
+
+def test_an_outbox_from_before_retries_is_upgraded(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, day TEXT NOT NULL, "
+               "tier INTEGER NOT NULL, text TEXT NOT NULL, note TEXT NOT NULL DEFAULT '', created REAL NOT NULL, "
+               "attempts INTEGER NOT NULL DEFAULT 0, error TEXT NOT NULL DEFAULT '')")
+    db.execute("INSERT INTO outbox (url, day, tier, text, created) VALUES ('http://x', '2026-01-05', 2, 'old', 1.0)")
+    db.commit()
+    db.close()
+    box = Outbox(path)
+    assert [e.text for e in box.pending()] == ["old"]
+    box.close()
+
+
+def test_alerts_waiting_for_a_slot_join_one_digest_per_user(tmp_path):
+    server, url = serve_stand_in()
+    box = Outbox(str(tmp_path / "outbox.db"))
+    groups = []
+    delivery = Delivery(rate=5.0).start()
+    drainer = Drainer(box, delivery, on_result=lambda group, ok, error: groups.append(
+        (group[0].note, sorted(e.tier for e in group), ok)), group_by=by_user)
+    try:
+        box.enqueue(url, "bob 2h", "2026-01-05", 2, "bob")
+        box.enqueue(url, "alice 2h", "2026-01-05", 2, "alice")
+        drainer.drain()                     # bob takes the slot; alice waits 0.2s for the next
+        box.enqueue(url, "alice 4h", "2026-01-05", 4, "alice")
+        drainer.drain()
+        assert delivery.flush(10)
+        assert server.hits == 2
+        assert sorted(groups) == [("alice", [2, 4], True), ("bob", [2], True)]
+        assert len(box) == 0
+    finally:
+        delivery.stop()
+        server.shutdown()
+        box.close()
+
+
+def test_a_fresh_group_reads_as_a_digest_and_an_old_one_as_held():
+    entries = [Entry(1, "http://x", "2026-01-05", 2, "2h text", "", 1000.0, 0),
+               Entry(2, "http://x", "2026-01-05", 4, "4h text", "", 1010.0, 0)]
+    assert coalesce(entries, now=1020.0) == "4h text\n\n_also crossed: 2h_"
+    assert "_held while offline: 2h at" in coalesce(entries, now=1000.0 + 3600)
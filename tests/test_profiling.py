@@ -0,0 +1,36 @@
+import os
+import pstats
+import tracemalloc
+
+from profiling import Profiler
+
+LEAK = []
+
+
+def leaky_tick():
+    LEAK.append(bytearray(64 * 1024))
+
+
+def test_rotations_keep_the_newest_sets_and_the_files_load(tmp_path):
+    profiler = Profiler(str(tmp_path), every=3, keep=2)
+    profiler.start()
+    try:
+        for _ in range(7):
+            leaky_tick()
+            profiler.observe_tick(3e-6, 1e-5, 2e-5, 6e-5)
+    finally:
+        profiler.stop()
+    names = sorted(os.listdir(tmp_path))
+    assert [n.split("-")[0] for n in names] == ["growth"] * 2 + ["heap"] * 2 + ["profile"] * 2
+    assert names[-1].endswith("-0003.prof")                 # the partial period at stop()
+
+    path = str(tmp_path / names[-1])
+    assert any(func[2] == "leaky_tick" for func in pstats.Stats(path).stats)
+    tracemalloc.Snapshot.load(str(tmp_path / names[3]))
+
+    with open(tmp_path / names[1]) as f:
+        growth = f.read()
+    assert "1 ticks" in growth and "idle probe" in growth
+    since_start = growth.split("since the first snapshot")[1]
+    assert f"{__file__}:{leaky_tick.__code__.co_firstlineno + 1}" in since_start.splitlines()[1]
+    LEAK.clear()
@@ -0,0 +1,85 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import report
+from history import History
+from messages import THRESHOLDS
+
+ENGINES = ["numpy", "python"] if report.np is not None else ["python"]
+FIRST = date(2026, 1, 1)
+DAYS = 120
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(report, "np", None)
+    return request.param
+
+
+@pytest.fixture
+def history(tmp_path):
+    rng = random.Random(8)
+    history = History(str(tmp_path / "history"))
+    for i in range(DAYS):
+        day = FIRST.toordinal() + i
+        if rng.random() < 0.2:
+            continue                    # a day off
+        start = rng.randrange(1440)
+        for minute in range(start, min(1440, start + rng.randrange(600))):
+            if rng.random() < 0.9:
+                history.mark_minute(day, minute)
+        history.set_fired(day, rng.getrandbits(len(THRESHOLDS)))
+    yield history
+    history.close()
+
+
+def test_range_sums_match_walking_the_bitmaps(history):
+    hours = {d: [sum(history.is_active(d, m) for m in range(h * 60, h * 60 + 60)) for h in range(24)]
+             for d in range(FIRST.toordinal() - 5, FIRST.toordinal() + DAYS + 40)}
+
+    def naive(first, last):
+        return [sum(hours[d][h] for d in range(first.toordinal(), last.toordinal() + 1)) for h in range(24)]
+
+    rng = random.Random(3)
+    for _ in range(20):
+        first = FIRST + timedelta(days=rng.randrange(-5, DAYS))
+        last = first + timedelta(days=rng.randrange(40))
+        assert report.range_minutes(history, first, last) == sum(naive(first, last))
+        assert report.hour_totals(history, first, last) == naive(first, last)
+
+
+def test_columns_and_sessions_match_a_day_by_day_walk(history, engine):
+    days = range(FIRST.toordinal(), FIRST.toordinal() + DAYS)
+    records = history.records(days[0], days[-1])
+    minutes, fired = report._columns(records)
+    assert list(minutes) == [history.minutes(d) for d in days]
+    assert list(fired) == [history.fired(d) for d in days]
+
+    best = (0, 0)
+    for i, d in enumerate(days):
+        run = 0
+        for m in range(1440):
+            run = run + 1 if history.is_active(d, m) else 0
+            if run > best[0]:
+                best = (run, i)
+    assert report.longest_session(records) == best
+    records.release()
+
+    over = [m >= THRESHOLDS[0] * 60 for m in minutes]
+    length, end = report.longest_streak(over)
+    assert all(over[end - length + 1:end + 1]) and not any(
+        all(over[i:i + length + 1]) for i in range(len(over) - length))
+    active = [f for f, m in zip(fired, minutes) if m]
+    assert report.tier_hit_rates(fired, minutes) == pytest.approx(
+        [sum(f >> i & 1 for f in active) / len(active) for i in range(len(THRESHOLDS))])
+
+
+def test_periods_cover_the_range_without_gaps():
+    first, last = date(2026, 1, 7), date(2026, 3, 3)
+    for by in ("day", "week", "month"):
+        buckets = report.periods(first, last, by)
+        assert buckets[0][1] == first and buckets[-1][2] == last
+        assert all(b[1] == a[2] + timedelta(days=1) for a, b in zip(buckets, buckets[1:]))
@@ -0,0 +1,43 @@
+import pytest
+
+from messages import THRESHOLDS
+from scheduler import MAX_IDLE_SLEEP, active_span, next_wakeup, simulate_day
+
+H = 3600
+DAYS = {
+    "workday": [(9 * H, 12.5 * H), (13.25 * H, 17.75 * H), (20 * H, 22.5 * H)],
+    "choppy": [(s, s + 50 * 60) for s in range(9 * H, 18 * H, H)],
+    "marathon": [(7 * H, 23.5 * H)],
+    "away": [],
+}
+
+
+@pytest.mark.parametrize("day", sorted(DAYS))
+def test_scheduled_loop_wakes_far_less_for_the_same_alerts(day):
+    old = simulate_day(DAYS[day], THRESHOLDS, fixed=True)
+    new = simulate_day(DAYS[day], THRESHOLDS)
+    assert old["wakeups"] == 1440
+    assert new["wakeups"] * 4 < old["wakeups"]
+    assert new["fired"] == old["fired"]
+    assert abs(new["active"] - new["true_active"]) <= abs(old["active"] - old["true_active"])
+
+
+def test_active_sleep_stops_at_the_next_tier_or_possible_idle():
+    # 1h55m in, 10s since the last input: the 2h tier is 5 minutes off, going idle 290s off
+    assert next_wakeup(0.0, 10.0, 2 * H - 300, [], THRESHOLDS, 300, 60) == 290
+    # Tier 2h 30s off comes first
+    assert next_wakeup(0.0, 10.0, 2 * H - 30, [], THRESHOLDS, 300, 60) == 30
+
+
+def test_idle_back_off_grows_and_is_capped():
+    sleeps = [60.0]
+    for _ in range(20):
+        sleeps.append(next_wakeup(0.0, 900.0, 0.0, [], THRESHOLDS, 300, 60, sleeps[-1]))
+    assert sleeps == sorted(sleeps)
+    assert sleeps[-1] == MAX_IDLE_SLEEP
+
+
+def test_active_span_credits_activity_up_to_the_idle_threshold():
+    # Went idle 400s ago, last woke 600s ago: active for the 200s before the last input, plus the 300s threshold
+    assert active_span(600, 400, False, 300) == 500
+    assert active_span(600, 10, False, 300) == 600
@@ -0,0 +1,36 @@
+import os
+
+import screen_shame
+from delivery import serve_stand_in
+from server import Dispatcher, HeartbeatServer, Roster
+
+
+def test_a_tick_hands_over_its_alerts_as_one_batch():
+    batches = []
+    roster = Roster(0.0)
+    server = HeartbeatServer(roster, batches.append)
+    for user in ("alice", "bob"):
+        i = roster.slot(user)
+        roster.active[i] = 2 * 3600 - 5
+        roster.heartbeat(i, 0.0, 0.0, 0.0)
+    server.tick(1.0)
+    assert batches == []
+    server.tick(10.0)
+    assert [sorted(user for user, _, _ in batch) for batch in batches] == [["alice", "bob"]]
+
+
+def test_dispatcher_uses_its_own_files_and_sends_a_batch(home):
+    stand_in, url = serve_stand_in()
+    outbox, rotation = str(home / "server-outbox.db"), str(home / "server-rotation")
+    dispatcher = Dispatcher(url, False, outbox_path=outbox, rotation_file=rotation)
+    try:
+        dispatcher.submit([("alice", 2, 7200.0), ("bob", 2, 7300.0)]).result(10)
+        assert dispatcher.drainer.delivery.flush(10)
+        assert stand_in.hits == 2
+        assert len(dispatcher.drainer.outbox) == 0
+    finally:
+        dispatcher.close()
+        stand_in.shutdown()
+    assert os.path.exists(rotation)
+    assert not os.path.exists(screen_shame.ROTATION_FILE)
+    assert not os.path.exists(screen_shame.OUTBOX_FILE)
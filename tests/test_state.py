@@ -0,0 +1,43 @@
+import json
+from datetime import date
+
+import screen_shame
+from screen_shame import State, load_state, save_state
+
+
+def _legacy(home, **fields):
+    with open(screen_shame.STATE_FILE, "w") as f:
+        json.dump(fields, f)
+
+
+def test_legacy_minutes_file_from_today(home):
+    _legacy(home, date=str(date.today()), active_minutes=125, fired_tiers=[2])
+    state = load_state()
+    assert (state.date, state.active_seconds, state.fired_tiers) == (str(date.today()), 7500.0, [2])
+
+
+def test_legacy_seconds_file_from_today(home):
+    _legacy(home, date=str(date.today()), active_seconds=4321.5, fired_tiers=[])
+    state = load_state()
+    assert (state.date, state.active_seconds, state.fired_tiers) == (str(date.today()), 4321.5, [])
+
+
+def test_legacy_file_from_another_day_starts_fresh(home):
+    _legacy(home, date="2020-01-01", active_seconds=9999.0, fired_tiers=[2, 4])
+    state = load_state()
+    assert (state.date, state.active_seconds, state.fired_tiers) == (str(date.today()), 0.0, [])
+
+
+def test_corrupt_legacy_file_starts_fresh(home):
+    with open(screen_shame.STATE_FILE, "w") as f:
+        f.write("{not json")
+    assert load_state().active_seconds == 0.0
+
+
+def test_journal_wins_over_legacy_file(home):
+    _legacy(home, date=str(date.today()), active_minutes=10)
+    save_state(State(str(date.today()), 3600.0, [2]))
+    screen_shame._journal.close()
+    screen_shame._journal = None
+    state = load_state()
+    assert (state.active_seconds, state.fired_tiers) == (3600.0, [2])
@@ -0,0 +1,67 @@
+import json
+import os
+import socket
+import time
+
+import pytest
+
+from screen_shame import State
+from statusapi import StatusServer, query
+
+
+def answered(path, request, unless="error: no data yet"):
+    deadline = time.monotonic() + 5
+    while True:
+        answer = query(path, request)
+        if answer != unless or time.monotonic() > deadline:
+            return answer
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def served(tmp_path):
+    path = str(tmp_path / "status.sock")
+    server = StatusServer(path, thresholds=[2, 4], idle_source="evdev").start()
+    yield server, path
+    server.close()
+
+
+def test_requests_round_trip_through_the_socket(served):
+    server, path = served
+    assert query(path, "status") == "error: no data yet"
+    server.publish(State("2026-01-05", 8100.0, [2]), 4.0)
+    assert json.loads(answered(path, "status")) == {
+        "day": "2026-01-05", "active_seconds": 8100.0, "idle_seconds": 4.0, "fired": [2],
+        "next_tier": 4, "next_tier_in": 6300.0, "idle_source": "evdev"}
+    assert query(path, "text") == "2h 15m · 4h in 1h 45m"
+    assert query(path, "get fired") == "[2]"
+    assert query(path, "get next_tier_in") == "6300.0"
+    assert query(path, "bogus").startswith("error: unknown request")
+
+
+def test_a_subscriber_hears_only_changes(served):
+    server, path = served
+    server.publish(State("2026-01-05", 60.0, []), 0.0)
+    answered(path, "text")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(path)
+        sock.sendall(b"subscribe text\n")
+        lines = sock.makefile("r", encoding="utf-8")
+        assert lines.readline() == "1m · 2h in 1h 59m\n"
+        server.publish(State("2026-01-05", 60.0, []), 30.0)       # same text: nothing sent
+        server.publish(State("2026-01-05", 180.0, []), 0.0)
+        assert lines.readline() == "3m · 2h in 1h 57m\n"
+
+
+def test_one_daemon_per_socket_and_a_stale_one_is_replaced(tmp_path, served):
+    _, path = served
+    with pytest.raises(OSError, match="already being served"):
+        StatusServer(path)
+    stale = str(tmp_path / "stale.sock")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(stale)
+    sock.close()                        # the file stays, nobody listens: a crash
+    server = StatusServer(stale).start()
+    server.close()
+    assert not os.path.exists(stale)
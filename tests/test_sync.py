@@ -0,0 +1,141 @@
+import os
+import random
+from datetime import datetime
+
+import pytest
+
+import screen_shame
+from history import BITMAP_SIZE
+from idle import FakeIdleSource
+from notify import Sink
+from scheduler import FakeClock
+from sync import Sync
+
+H = 3600
+DAY = "2026-01-05"
+
+
+class _Done(Exception):
+    pass
+
+
+class RecordingClock(FakeClock):
+    def __init__(self, start, until):
+        super().__init__(start)
+        self.until = until
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append((self.now, seconds))
+        super().sleep(seconds)
+        if self.now >= self.until:
+            raise _Done
+
+
+class CountingSink(Sink):
+    name = "counting"
+
+    def __init__(self):
+        super().__init__()
+        self.tiers = []
+
+    def send(self, alert):
+        self.tiers.append(alert.tier)
+
+
+def test_a_tier_fired_elsewhere_does_not_bring_back_the_poll_cadence(home, capsys):
+    midnight = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+    day = str(datetime.now().date())
+    desktop = Sync(str(home / "sync"), "desktop")
+    desktop.publish(day, bytes(BITMAP_SIZE), fired=0b1)     # the 2h tier, and no minutes of its own
+    laptop = Sync(str(home / "sync"), "laptop")
+
+    clock = RecordingClock(midnight + 9 * H, midnight + 13 * H)
+    source = FakeIdleSource(lambda: clock.now, [(midnight + 9 * H, midnight + 13 * H)])
+    sink = CountingSink()
+    with pytest.raises(_Done):
+        screen_shame.run("", dry_run=True, idle_source=source, clock=clock, sinks=[sink], sync=laptop,
+                         headless=True)
+    desktop.close()
+
+    assert sink.tiers == []
+    after = [seconds for now, seconds in clock.sleeps if now >= midnight + 11.1 * H]
+    assert after and screen_shame.POLL_INTERVAL not in after
+
+
+def random_day(rng):
+    bits = 0
+    for _ in range(rng.randrange(1, 6)):
+        start = rng.randrange(1440)
+        bits |= ((1 << rng.randrange(1, 240)) - 1) << start
+    return (bits & ((1 << 1440) - 1)).to_bytes(BITMAP_SIZE, "little")
+
+
+def grown(rng, bitmap):
+    """`bitmap` with a few more minutes set, as a day goes on."""
+    more = int.from_bytes(random_day(rng), "little") & rng.getrandbits(1440)
+    return (int.from_bytes(bitmap, "little") | more).to_bytes(BITMAP_SIZE, "little")
+
+
+def test_merging_is_an_or_whatever_the_order_or_repeats(tmp_path):
+    rng = random.Random(21)
+    root = str(tmp_path / "sync")
+    devices = {name: Sync(root, name) for name in ("desktop", "laptop", "phone")}
+    days = {name: bytes(BITMAP_SIZE) for name in devices}
+    fired = {name: 0 for name in devices}
+    watcher = Sync(root, "watcher")
+    for _ in range(60):
+        name = rng.choice(sorted(devices))
+        days[name] = grown(rng, days[name])
+        if rng.random() < 0.1:
+            fired[name] |= 1 << rng.randrange(6)
+        devices[name].publish(DAY, days[name], fired[name])
+        if rng.random() < 0.3:
+            watcher.merge(DAY)
+    watcher.merge(DAY)
+
+    # A sync tool delivers one file twice over and another's records backwards
+    path = os.path.join(root, "desktop", f"{DAY}.bits")
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "ab") as f:
+        f.write(data)
+    path = os.path.join(root, "phone", f"{DAY}.bits")
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(b"".join(data[i:i + 2] for i in range(len(data) - 2, -1, -2)))
+    late = Sync(root, "late")
+    late.merge(DAY)
+    late.merge(DAY)
+    watcher.merge(DAY)
+
+    union = 0
+    for bitmap in days.values():
+        union |= int.from_bytes(bitmap, "little")
+    none = bytes(BITMAP_SIZE)
+    for reader in (watcher, late):
+        assert reader.union(none) == bin(union).count("1")
+        assert reader.remote_fired == fired["desktop"] | fired["laptop"] | fired["phone"]
+    # Commutative: each device sees everyone but itself, and all agree on the total
+    for name, sync in devices.items():
+        sync.merge(DAY)
+        assert sync.union(days[name]) == bin(union).count("1")
+        assert sync.elsewhere(days[name]) == bin(union & ~int.from_bytes(days[name], "little")).count("1")
+    for sync in (*devices.values(), watcher, late):
+        sync.close()
+
+
+def test_a_half_synced_record_waits_for_the_rest(tmp_path):
+    root = str(tmp_path / "sync")
+    path = os.path.join(root, "desktop", f"{DAY}.bits")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(bytes((0, 0b1, 1)))
+    laptop = Sync(root, "laptop")
+    assert laptop.merge(DAY) == 1
+    with open(path, "ab") as f:
+        f.write(bytes((0b11,)))
+    assert laptop.merge(DAY) == 1
+    assert laptop.union(bytes(BITMAP_SIZE)) == 3
+    laptop.close()
@@ -0,0 +1,56 @@
+import random
+
+import timerwheel
+from messages import THRESHOLDS
+from server import _scan_tick, _seed_roster
+from timerwheel import TimerWheel
+
+
+def linear(timers: list, start: int, now: int) -> list:
+    """What a scan over every (when, item) finds due in (start, now]."""
+    return [item for when, item in timers if start < when <= now]
+
+
+def test_the_wheel_fires_what_a_linear_scan_does(monkeypatch):
+    # Two rings of 64 slots: 4096s before timers go to the overflow list
+    monkeypatch.setattr(timerwheel, "LEVELS", 2)
+    rng = random.Random(5)
+    start = 1_000_123
+    wheel = TimerWheel(start)
+    timers = []
+    for k in range(3000):
+        when = start + rng.choice((rng.randrange(-10, 70), rng.randrange(4200), rng.randrange(20_000)))
+        wheel.schedule(when, k)
+        timers.append((max(when, start + 1), k))       # a past second means the next tick
+    assert len(wheel) == 3000
+
+    now = start
+    while now < start + 20_500:
+        step = rng.choice((1, 1, 7, 63, 64, 65, 700))
+        fired = wheel.advance(now + step)
+        expected = linear(timers, now, now + step)
+        assert sorted(fired) == sorted(expected)
+        now += step
+    assert len(wheel) == 0
+
+
+def test_timers_filed_mid_run_land_on_their_second():
+    wheel = TimerWheel(0)
+    wheel.advance(4000)
+    wheel.schedule(4000 + 64 * 64 + 1, "later")
+    wheel.schedule(4001, "next")
+    wheel.schedule(10, "late")              # already past: the next tick
+    assert wheel.advance(4001) == ["next", "late"]
+    assert wheel.advance(4000 + 64 * 64) == []
+    assert wheel.advance(4000 + 64 * 64 + 1) == ["later"]
+
+
+def test_roster_ticks_fire_what_scanning_every_session_does():
+    start = 1_000_000.0
+    wheel_roster, scan_roster = _seed_roster(500, start), _seed_roster(500, start)
+    fired_tiers = [[t for n, t in enumerate(THRESHOLDS) if mask >> n & 1] for mask in scan_roster.fired]
+    scanned, fired = [], []
+    for s in range(1, 241):
+        scanned += _scan_tick(scan_roster, fired_tiers, start + s)
+        fired += [(i, t) for i, t, _ in wheel_roster.tick(start + s)]
+    assert fired and sorted(fired) == sorted(scanned)
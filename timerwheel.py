@@ -0,0 +1,92 @@
+"""
+Hierarchical timer wheel for philoscreen's per-session tier deadlines.
+
+Thousands of sessions each have one interesting moment: when their
+active time will cross the next tier. Instead of checking every session
+on every tick, each is filed under that projected second and a tick only
+touches the sessions whose second has come.
+
+LEVELS rings of SLOTS slots each; ring L covers SLOTS**(L+1) seconds at a
+resolution of SLOTS**L. A timer goes into the lowest ring whose span
+still agrees with the current time on all the higher bits, so it always
+lands strictly ahead of the ring's cursor. When a ring's cursor wraps
+into a slot, that slot's timers are re-filed one ring down, and by the
+time they reach ring 0 they fire on their exact second. Scheduling is
+O(1); a tick is O(due + cascaded).
+"""
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS      # 64
+LEVELS = 4                  # 64**4 s ≈ 194 days; later timers wait in an overflow list
+_MASK = SLOTS - 1
+
+
+class TimerWheel:
+    """Whole-second timers carrying an opaque item each."""
+
+    __slots__ = ("now", "rings", "overflow", "count")
+
+    def __init__(self, now: int = 0):
+        self.now = int(now)
+        self.rings = [[[] for _ in range(SLOTS)] for _ in range(LEVELS)]
+        self.overflow = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def schedule(self, when: int, item):
+        """File `item` to come due at second `when` (the next tick if that's past)."""
+        self.count += 1
+        self._place(max(int(when), self.now + 1), item)
+
+    def _place(self, when: int, item):
+        diff = when ^ self.now
+        for level in range(LEVELS):
+            shift = SLOT_BITS * level
+            if diff >> (shift + SLOT_BITS) == 0:
+                self.rings[level][(when >> shift) & _MASK].append((when, item))
+                return
+        self.overflow.append((when, item))
+
+    def advance(self, now: int) -> list:
+        """Move the clock to `now` and return the items that came due, oldest first."""
+        now = int(now)
+        due = []
+        rings = self.rings
+        t = self.now
+        while t < now:
+            t += 1
+            self.now = t
+            if not t & _MASK:
+                self._cascade(t)
+            slot = rings[0][t & _MASK]
+            if slot:
+                due.extend(item for _, item in slot)
+                slot.clear()
+        self.count -= len(due)
+        return due
+
+    def _cascade(self, t: int):
+        """`t` crossed a ring boundary: re-file the slots the higher cursors just entered."""
+        if not t & ((1 << SLOT_BITS * LEVELS) - 1) and self.overflow:
+            pending, self.overflow = self.overflow, []
+            for when, item in pending:
+                self._place(when, item)
+        for level in range(LEVELS - 1, 0, -1):
+            shift = SLOT_BITS * level
+            if t & ((1 << shift) - 1):
+                continue
+            slot = self.rings[level][(t >> shift) & _MASK]
+            if slot:
+                pending = slot[:]
+                slot.clear()
+                for when, item in pending:
+                    self._place(when, item)
+
+    def clear(self):
+        for ring in self.rings:
+            for slot in ring:
+                slot.clear()
+        self.overflow.clear()
+        self.count = 0